@@ -1,12 +1,19 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import os
+from pebbles.cache import cache_global, version_archivos
+from pebbles.escritura import DestinoSnapshot, get_escritor
+from pebbles.metricas import Cronometro, metricas_global
+from pebbles.kpis import flujo_civil
+from pebbles.graficos import figura_flujo_civil
 
 # Configuración de la página
 st.set_page_config(page_title="Control Pebbles v3", layout="wide", page_icon="🏗️")
 
+crono_v3 = Cronometro(metricas_global) # Tiempos por etapa de este rerun
+
 DB_FILE = 'avance_pebbles_v3.csv'
+JOURNAL_FILE = 'avance_pebbles_v3.journal' # Diario de escritura (lote en curso)
 
 # --- DEFINICIÓN DE JERARQUÍA Y UNIDADES ---
 # Diccionario de predecesoras: 'Actividad': 'Su_Predecesora'
@@ -69,21 +76,39 @@ def load_data():
         df_new.to_csv(DB_FILE, index=False)
         return df_new
 
-def save_data(df):
-    df.to_csv(DB_FILE, index=False)
+# Las escrituras no reescriben el CSV desde el estado de una sesión:
+# los avances se suman sobre lo que haya en disco (bajo bloqueo y en lotes)
+destino_v3 = DestinoSnapshot(DB_FILE, claves=['Disciplina', 'Partida'], columna='Ejecutado')
 
-# Cargar estado
-if 'df_v3' not in st.session_state:
-    st.session_state.df_v3 = load_data()
+def save_data(df):
+    # Solo metas y fotos; 'Ejecutado' lo mantiene registrar_avance
+    destino_v3.actualizar_columnas(df, ['Total', 'Imagen URL'])
+    cache_global.invalidar('df_v3')
 
-df = st.session_state.df_v3.copy()
+def registrar_avance(disciplina, partida, cantidad):
+    get_escritor(JOURNAL_FILE, destino_v3).registrar(
+        [{'Disciplina': disciplina, 'Partida': partida, 'Cantidad': cantidad}]
+    )
+    cache_global.invalidar('df_v3')
 
 # Cálculo de avance porcentual
 def get_progress(row):
     if row['Total'] <= 0: return 0
     return min((row['Ejecutado'] / row['Total']) * 100, 100.0)
 
-df['% Avance'] = df.apply(get_progress, axis=1)
+def con_avance(df):
+    # Misma regla que get_progress, para todas las filas a la vez
+    df['% Avance'] = (df['Ejecutado'] / df['Total'] * 100).clip(upper=100.0).where(df['Total'] > 0, 0.0)
+    return df
+
+def get_data():
+    # Una sola copia compartida por todas las sesiones (copy-on-write), ligada al mtime del archivo.
+    # El % Avance se calcula una vez por versión del archivo, no en cada rerun.
+    return cache_global.obtener('df_v3', version_archivos(DB_FILE), lambda: con_avance(load_data()))
+
+# Cargar estado
+with crono_v3.etapa('load_data'):
+    df = get_data()
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -91,6 +116,7 @@ with st.sidebar:
     st.caption("v3.0 Lógica Constructiva")
     st.markdown("---")
     opcion = st.radio("Menú", ["Dashboard General", "Reportar Avance", "Configuración"])
+crono_v3.vista = f"v3 · {opcion}"
 
 # --- VISTAS ---
 
@@ -139,7 +165,6 @@ if opcion == "Configuración":
         # Nota: Pandas update logic simplificada
         df_final = pd.concat([edited_mec, edited_civ])
         # Aseguramos el orden original si es necesario, pero concat funciona bien aquí
-        st.session_state.df_v3 = df_final
         save_data(df_final)
         st.success("Metrados actualizados correctamente.")
         st.rerun()
@@ -154,8 +179,8 @@ elif opcion == "Reportar Avance":
     partida_sel = st.selectbox("Actividad / Elemento", df_filtrado['Partida'].tolist())
     
     # Datos actuales
-    idx = df[df['Partida'] == partida_sel].index[0] # Buscar en DF original
-    row = df.loc[idx]
+    df_por_clave = df.set_index(['Disciplina', 'Partida'], drop=False) # Clave compuesta (no solo Partida)
+    row = df_por_clave.loc[(tipo_trabajo, partida_sel)]
     
     # --- VISUALIZACIÓN ---
     c1, c2 = st.columns([1, 2])
@@ -180,7 +205,7 @@ elif opcion == "Reportar Avance":
         
         if predecesora:
             # Buscar datos de la predecesora
-            row_pred = df[(df['Disciplina']=='Obras Civiles') & (df['Partida']==predecesora)].iloc[0]
+            row_pred = df_por_clave.loc[('Obras Civiles', predecesora)]
             avance_pred = get_progress(row_pred)
             avance_actual = row['% Avance']
             
@@ -226,7 +251,7 @@ elif opcion == "Reportar Avance":
             # Re-verificación de lógica civil al guardar (para evitar bypass)
             if tipo_trabajo == "Obras Civiles" and predecesora:
                 pct_futuro = ((row['Ejecutado'] + nuevo_avance) / row['Total']) * 100
-                row_pred = df[(df['Disciplina']=='Obras Civiles') & (df['Partida']==predecesora)].iloc[0]
+                row_pred = df_por_clave.loc[('Obras Civiles', predecesora)]
                 pct_pred = get_progress(row_pred)
                 
                 # Tolerancia del 5% para permitir traslapes lógicos en obra
@@ -235,8 +260,7 @@ elif opcion == "Reportar Avance":
                     es_valido = False
 
             if es_valido and nuevo_avance > 0:
-                st.session_state.df_v3.at[idx, 'Ejecutado'] += nuevo_avance
-                save_data(st.session_state.df_v3)
+                registrar_avance(row['Disciplina'], partida_sel, nuevo_avance)
                 st.success("✅ Avance registrado correctamente")
                 st.rerun()
 
@@ -277,21 +301,11 @@ elif opcion == "Dashboard General":
     
     # Creamos un gráfico de barras ordenado por la jerarquía
     orden_civil = list(JERARQUIA_CIVIL.keys())
-    df_civ_ordenado = df_civ.set_index('Partida').reindex(orden_civil).reset_index()
-    
-    fig_civ = px.bar(
-        df_civ_ordenado, 
-        x='Partida', 
-        y='% Avance',
-        color='% Avance',
-        color_continuous_scale='RdYlGn',
-        range_y=[0, 100],
-        text_auto='.1f',
-        title="Secuencia Constructiva (Validación de Predecesoras)"
-    )
-    # Agregamos flechas o líneas para denotar dependencia visualmente
-    fig_civ.update_traces(marker_line_color='black', marker_line_width=1.5)
-    st.plotly_chart(fig_civ, use_container_width=True)
+    df_civ_ordenado = flujo_civil(df_civ, orden_civil)
+    
+    with crono_v3.etapa('figuras'):
+        fig_civ = figura_flujo_civil(df_civ_ordenado)
+        st.plotly_chart(fig_civ, use_container_width=True)
     
     st.markdown("""
     > **Nota:** El gráfico debe mostrar una escalera descendente (o igualada). 
@@ -300,19 +314,69 @@ elif opcion == "Dashboard General":
 
     st.subheader("Detalle Mecánico")
     st.dataframe(df_mec[['Partida', 'Total', 'Ejecutado', '% Avance', 'Unidad']], use_container_width=True)
+
+crono_v3.cerrar()
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import os
 import datetime
+import functools
+from pebbles.proyectos import get_registro
+from pebbles.esquema import HistorialCompacto
+from pebbles.escritura import get_escritor, escribir_atomico
+from pebbles.cache import version_archivos, DatosVista
+from pebbles.wbs import CatalogoWBS, NIVELES_WBS, completar_columnas_wbs
+from pebbles.dependencias import (
+    GrafoDependencias, CicloError, leer_dependencias, TOLERANCIA_PCT,
+)
+from pebbles.reportes import paginar, tabla_pagina
+from pebbles.exportar import exportar, FORMATOS as FORMATOS_EXPORTACION
+from pebbles.importacion import leer_archivo, validar_lote
+from pebbles.kpis import get_acumulados
+from pebbles.graficos import figura_esfuerzo, figura_curva_s, frecuencia_para, TITULOS_FRECUENCIA
+from pebbles.valor_ganado import leer_linea_base, valor_ganado, resumen_valor_ganado, curva_plan, serie_esfuerzo
+from pebbles.curva_s import IndiceAcumulado, curva_s, fechas_curva
+from pebbles.metricas import Cronometro, metricas_global
+from pebbles.imagenes import get_almacen, es_referencia, ANCHO_MINIATURA
+from pebbles.precalculo import corte_defecto, rango_productividad, ventana_resumen
 
 # --- CONFIGURACIÓN ---
 st.set_page_config(page_title="Control Pebbles Histórico", layout="wide", page_icon="📅")
 
-FILE_CATALOGO = 'pebbles_catalogo.csv'   # Guarda las Metas, Unidades, Fotos
-FILE_HISTORIAL = 'pebbles_historial.csv' # Guarda CADA avance reportado con fecha
+BACKEND = os.environ.get('PEBBLES_BACKEND', 'sqlite') # 'sqlite', 'csv' o 'particionado' (un CSV por mes)
+DIR_PROYECTOS = os.environ.get('PEBBLES_PROYECTOS', 'proyectos') # Un subdirectorio por obra
+
+# --- PROYECTO ACTIVO ---
+# Solo el proyecto elegido se carga; los que nadie usa se cierran solos (pebbles.proyectos)
+registro = get_registro(DIR_PROYECTOS, BACKEND)
+if 'proyecto_nuevo' in st.session_state:
+    st.session_state['proyecto'] = st.session_state.pop('proyecto_nuevo')
+nombre_proyecto = st.sidebar.selectbox("🏢 Proyecto", registro.listar(), key="proyecto")
+with st.sidebar.expander("➕ Nuevo proyecto"):
+    nombre_nuevo = st.text_input("Nombre", key="nombre_proyecto_nuevo")
+    if st.button("Crear proyecto", disabled=not nombre_nuevo.strip()):
+        try:
+            st.session_state['proyecto_nuevo'] = registro.crear(nombre_nuevo)
+        except ValueError as e:
+            st.error(f"⛔ {e}")
+        else:
+            st.rerun()
+proyecto = registro.obtener(nombre_proyecto)
+
+FILE_CATALOGO = proyecto.ruta('pebbles_catalogo.csv')   # Guarda las Metas, Unidades, Fotos
+FILE_HISTORIAL = proyecto.ruta('pebbles_historial.csv') # Historial original en CSV (se migra a SQLite una sola vez)
+FILE_HISTORIAL_DB = proyecto.ruta('pebbles_historial.db') # Guarda CADA avance reportado con fecha (indexado)
+FILE_DIARIO = proyecto.ruta('pebbles_historial.journal') # Diario de escritura (lote en curso)
+FILE_DEPENDENCIAS = proyecto.ruta('pebbles_dependencias.csv') # Predecesoras (varias por actividad, cualquier disciplina)
+FILE_LINEA_BASE = proyecto.ruta('pebbles_linea_base.csv') # Plan: Inicio y Fin de cada partida (valor ganado)
+DIR_IMAGENES = proyecto.ruta('pebbles_imagenes') # Fotos subidas (originales + cache de miniaturas)
+DIR_EXPORTACIONES = proyecto.ruta('pebbles_exportaciones') # Descargas generadas (cache por versión de los datos)
+
+backend = proyecto.backend
+cache_proyecto = proyecto.cache # Datos de este proyecto compartidos entre sus sesiones
 
 # --- LÓGICA DE OBRAS CIVILES (Predecesoras) ---
+# Semilla del grafo de dependencias: se copia a FILE_DEPENDENCIAS la primera vez
 JERARQUIA_CIVIL = {
     'Excavaciones': None,
     'Solado': 'Excavaciones',
@@ -337,43 +401,408 @@ def init_db():
             uni = 'm³' if it in ['Excavaciones','Vaciado de Concreto'] else 'Und'
             data.append({'Disciplina': 'Civil', 'Partida': it, 'Unidad': uni, 'Meta': 100.0, 'Img': ''})
             
-        pd.DataFrame(data).to_csv(FILE_CATALOGO, index=False)
+        completar_columnas_wbs(pd.DataFrame(data)).to_csv(FILE_CATALOGO, index=False)
+    else:
+        # Asegurar columnas WBS (Area, Elemento, Peso) si viene de versión anterior
+        df_cat = backend.leer_catalogo()
+        if not {'Area', 'Elemento', 'Peso'}.issubset(df_cat.columns):
+            backend.guardar_catalogo(completar_columnas_wbs(df_cat))
 
-    # 2. Inicializar Historial (Vacío al principio)
-    if not os.path.exists(FILE_HISTORIAL):
-        df_hist = pd.DataFrame(columns=['Fecha', 'Disciplina', 'Partida', 'Cantidad', 'Nota'])
-        df_hist.to_csv(FILE_HISTORIAL, index=False)
+    # 2. Inicializar Historial (Vacío al principio; migra el CSV antiguo si existe)
+    backend.init()
 
-def load_data():
-    cat = pd.read_csv(FILE_CATALOGO)
-    hist = pd.read_csv(FILE_HISTORIAL)
-    # Convertir columna fecha a datetime
-    if not hist.empty:
-        hist['Fecha'] = pd.to_datetime(hist['Fecha']).dt.date
+    # 3. Inicializar Dependencias (desde la jerarquía civil)
+    if not os.path.exists(FILE_DEPENDENCIAS):
+        leer_dependencias(FILE_DEPENDENCIAS, JERARQUIA_CIVIL, 'Civil')
+
+    # 4. Inicializar Línea Base (una fila por partida, fechas a completar en Configuración)
+    if not os.path.exists(FILE_LINEA_BASE):
+        leer_linea_base(FILE_LINEA_BASE, backend.leer_catalogo())
+
+def almacen_imagenes():
+    return get_almacen(DIR_IMAGENES)
+
+def imagen_referencia(valor, ancho=ANCHO_MINIATURA):
+    # Foto subida -> miniatura en cache; URL http(s) -> se muestra tal cual; si no, None
+    if es_referencia(valor):
+        return almacen_imagenes().miniatura(valor, ancho)
+    if isinstance(valor, str) and valor.startswith('http'):
+        return valor
+    return None
+
+def escritor():
+    # Group commit: los reportes simultáneos se graban juntos en una sola escritura durable
+    return get_escritor(FILE_DIARIO, backend)
+
+def datos_guardados(nombre=None):
+    # Después de cada guardado: se descarta lo cacheado y se despierta el precálculo del tablero
+    cache_proyecto.invalidar(nombre)
+    precalculo.avisar()
+
+def precalculado(clave, calcular):
+    # Artefacto de la publicación que muestra el tablero (controles en su valor inicial);
+    # con otros valores se calcula en el momento (y queda en la cache del proyecto)
+    valor = publicacion.artefactos.get(clave)
+    return calcular() if valor is None else valor
+
+def load_data(**filtros):
+    # Solo se leen las filas pedidas (Disciplina, Partida, rango de Fecha, límite).
+    # El resultado se comparte entre sesiones hasta que cambie la versión de los datos.
+    # El historial queda en formato compacto (categorías, int32/float32, notas aparte).
+    version = backend.version()
+    cat = cache_proyecto.obtener('catalogo', version, backend.leer_catalogo)
+    hist = cache_proyecto.obtener(
+        ('historial',) + tuple(sorted(filtros.items())), version,
+        lambda: HistorialCompacto.desde_dataframe(backend.leer_historial(**filtros)),
+    )
     return cat, hist
 
-def get_acumulados(df_cat, df_hist):
-    # Sumariza el historial para saber cuánto llevamos acumulado por partida
-    if df_hist.empty:
-        df_cat['Ejecutado'] = 0.0
-    else:
-        resumen = df_hist.groupby('Partida')['Cantidad'].sum().reset_index()
-        df_cat = pd.merge(df_cat, resumen, on='Partida', how='left').fillna(0)
-        df_cat.rename(columns={'Cantidad': 'Ejecutado'}, inplace=True)
+# Agrupación del dashboard -> frecuencia del rollup
+FRECUENCIAS_DASHBOARD = {"Diario": 'D', "Semanal": 'W-MON', "Mensual": 'M'}
+
+def get_rollup(freq, disciplina=None):
+    # Producción ya agregada por (periodo, Disciplina, Partida)
+    return cache_proyecto.obtener(
+        ('rollup', freq, disciplina), backend.version(), lambda: backend.rollup(freq, disciplina)
+    )
+
+def get_grafo():
+    # Grafo con orden topológico precalculado; se rehace solo si cambia el archivo
+    return cache_proyecto.obtener(
+        'grafo', version_archivos(FILE_DEPENDENCIAS),
+        lambda: GrafoDependencias.desde_dataframe(leer_dependencias(FILE_DEPENDENCIAS)),
+    )
+
+def get_catalogo():
+    return cache_proyecto.obtener('catalogo', backend.version(), backend.leer_catalogo)
+
+def get_master():
+    # Master tiene Metas + Acumulados
+    with crono.etapa('get_acumulados'):
+        return cache_proyecto.obtener(
+            'master', backend.version(), lambda: get_acumulados(get_catalogo().copy(deep=False), backend.resumen_por_partida())
+        )
+
+def get_avances():
+    # {(Disciplina, Partida): % Avance} para consultas O(1)
+    df_master = get_master()
+    return dict(zip(zip(df_master['Disciplina'], df_master['Partida']), df_master['% Avance']))
+
+def get_master_por_clave():
+    # Master indexado por (Disciplina, Partida): búsqueda directa en vez de filtros booleanos
+    return cache_proyecto.obtener(
+        'master_por_clave', backend.version(), lambda: get_master().set_index(['Disciplina', 'Partida'], drop=False)
+    )
+
+def get_wbs():
+    # Árbol del catálogo (cambia solo con el catálogo); los % se sincronizan de forma incremental
+    wbs = cache_proyecto.obtener('wbs', version_archivos(FILE_CATALOGO), lambda: CatalogoWBS(get_catalogo()))
+    return wbs.sincronizar(get_avances())
+
+def get_fechas_con_avance():
+    return cache_proyecto.obtener('fechas_con_avance', backend.version(), backend.fechas_con_avance)
+
+def get_tabla_pagina(fechas):
+    # Página del resumen (Partidas x días + TOTAL ACUMULADO) con el CSS del degradado ya calculado
+    return cache_proyecto.obtener(('pivot', fechas), backend.version(), lambda: tabla_pagina(backend, fechas, get_master()))
+
+def get_indice_acumulado():
+    # Acumulados por partida y fecha (desde el rollup diario) para consultas "al día X"
+    def construir():
+        master = get_master()
+        return IndiceAcumulado(backend.rollup('D'), zip(master['Disciplina'], master['Partida']))
+    return cache_proyecto.obtener('indice_acumulado', backend.version(), construir)
+
+def get_linea_base():
+    return cache_proyecto.obtener('linea_base', version_archivos(FILE_LINEA_BASE), lambda: leer_linea_base(FILE_LINEA_BASE))
+
+def get_valor_ganado(fecha_corte):
+    # EV/SPI/pronóstico de todas las partidas; se recalcula solo si cambia el historial, el catálogo o el plan
+    return cache_proyecto.obtener(
+        ('valor_ganado', fecha_corte), (backend.version(), version_archivos(FILE_LINEA_BASE)),
+        lambda: valor_ganado(get_indice_acumulado(), get_master(), get_linea_base(), fecha_corte),
+    )
+
+def get_esfuerzo(freq, disciplina=None):
+    # Producción del periodo en % ponderado del proyecto (desde el rollup)
+    return cache_proyecto.obtener(
+        ('esfuerzo', freq, disciplina), backend.version(), lambda: serie_esfuerzo(get_rollup(freq, disciplina), get_master())
+    )
+
+def get_figura_esfuerzo(freq, disciplina, desde, hasta):
+    # Figura ya preparada por (agrupación, filtro, rango) y versión de los datos: un rerun no la rehace
+    def construir():
+        grouper = get_esfuerzo(freq, disciplina)
+        grouper = grouper[(grouper['Fecha'] >= pd.Timestamp(desde)) & (grouper['Fecha'] <= pd.Timestamp(hasta))]
+        return figura_esfuerzo(grouper, TITULOS_FRECUENCIA[freq])
+    return cache_proyecto.obtener(('figura_esfuerzo', freq, disciplina, desde, hasta), backend.version(), construir)
+
+def get_figura_curva_s(fecha_corte):
+    # Curva S + plan (reducida con LTTB) por fecha de corte y versión de historial, catálogo y plan
+    def construir():
+        indice, master = get_indice_acumulado(), get_master()
+        fechas_grafico = fechas_curva(indice.primer_dia, max(indice.ultimo_dia, pd.Timestamp(fecha_corte)))
+        curva = pd.concat([curva_s(indice, master, fechas_grafico), curva_plan(get_linea_base(), master, fechas_grafico)], ignore_index=True)
+        return figura_curva_s(curva, fecha_corte)
+    return cache_proyecto.obtener(
+        ('figura_curva_s', fecha_corte), (backend.version(), version_archivos(FILE_LINEA_BASE)), construir
+    )
+
+# Datasets disponibles y los que declara cada vista (se calculan al primer uso)
+DATASETS = {
+    'catalogo': get_catalogo,
+    'master': get_master,
+    'grafo': get_grafo,
+    'wbs': get_wbs,
+    'linea_base': get_linea_base,
+}
+DATOS_POR_VISTA = {
+    "Panel de Control (Dashboard)": (), # Lee la publicación del precálculo
+    "Reportar Avance Diario": ('master', 'grafo', 'wbs'),
+    "Configuración Metas": ('catalogo', 'linea_base'),
+}
+
+# --- FRAGMENTOS (se re-ejecutan solos al tocar sus widgets) ---
+
+def cronometrado(fragmento):
+    # Un fragmento puede re-ejecutarse sin el resto del script, cuando el 'crono'
+    # del rerun completo ya se cerró: cada ejecución mide y registra lo suyo
+    @functools.wraps(fragmento)
+    def medir(*args, **kwargs):
+        global crono
+        general, crono = crono, Cronometro(metricas_global, f"{menu} · {fragmento.__name__}")
+        try:
+            return fragmento(*args, **kwargs)
+        finally:
+            crono.cerrar()
+            crono = general
+    return medir
+
+@st.fragment
+@cronometrado
+def formulario_avance(disc_sel, partida_sel):
+    row = get_master_por_clave().loc[(disc_sel, partida_sel)]
+    
+    # FORMULARIO DE INGRESO
+    col_inp1, col_inp2, col_inp3 = st.columns(3)
+    
+    with col_inp1:
+        fecha_input = st.date_input("Fecha de Ejecución", datetime.date.today())
+    
+    with col_inp2:
+        qty_input = st.number_input(f"Cantidad Avanzada ({row['Unidad']})", min_value=0.0, step=1.0)
+        
+    with col_inp3:
+        nota_input = st.text_input("Nota / Comentario (Opcional)", placeholder="Ej. Turno noche, Sector B")
+
+    # VALIDACIÓN DE SECUENCIA (PREDECESORAS según el grafo de dependencias)
+    bloqueo_logico = False
+    grafo = get_grafo()
+    avances = get_avances()
+    nodo = (disc_sel, partida_sel)
+    predecesoras = grafo.predecesoras.get(nodo, [])
+    
+    if predecesoras:
+        # % de la predecesora más atrasada (es la que limita)
+        pct_pred = grafo.limite_pct(nodo, avances)
+        predecesor = min(predecesoras, key=lambda p: avances.get(p, 0.0))[1]
+        
+        # Calculamos cómo quedaría el avance con lo nuevo
+        pct_nuevo = ((row['Ejecutado'] + qty_input) / row['Meta']) * 100
+        
+        st.caption("🔗 Requiere: " + ", ".join(f"{p[1]} ({avances.get(p, 0.0):.1f}%)" for p in predecesoras))
+        
+        # Regla: No puedes superar significativamente al predecesor
+        if pct_nuevo > (pct_pred + TOLERANCIA_PCT): # Damos 2% de tolerancia
+            st.error(f"⛔ ERROR DE SECUENCIA: No puedes avanzar '{partida_sel}' al {pct_nuevo:.1f}% porque '{predecesor}' solo va al {pct_pred:.1f}%.")
+            bloqueo_logico = True
+
+    # BOTÓN DE REGISTRO
+    btn = st.button("✅ Registrar Avance", type="primary", disabled=bloqueo_logico)
     
-    # Calcular %
-    df_cat['% Avance'] = (df_cat['Ejecutado'] / df_cat['Meta']) * 100
-    df_cat['% Avance'] = df_cat['% Avance'].clip(upper=100) # Tope visual 100%
-    return df_cat
+    if btn:
+        if qty_input > 0:
+            # Crear nueva fila para el historial
+            new_row = {
+                'Fecha': fecha_input,
+                'Disciplina': disc_sel,
+                'Partida': partida_sel,
+                'Cantidad': qty_input,
+                'Nota': nota_input
+            }
+            # Guardar (append en lote, con bloqueo y diario)
+            escritor().registrar([new_row])
+            datos_guardados()
+            
+            st.balloons()
+            st.success(f"Guardado: {qty_input} {row['Unidad']} el día {fecha_input}.")
+        else:
+            st.warning("La cantidad debe ser mayor a 0.")
+            
+    # MOSTRAR ÚLTIMOS REGISTROS DE ESTA PARTIDA
+    st.subheader(f"Últimos movimientos: {partida_sel}")
+    _, filtro_hist = load_data(disciplina=disc_sel, partida=partida_sel, limite=5)
+    if not filtro_hist.empty:
+        st.dataframe(filtro_hist.a_dataframe(), use_container_width=True)
+
+@st.fragment(run_every=2)
+def esperar_publicacion(version):
+    # Mientras el precálculo trabaja: cuando publica una versión nueva se redibuja el tablero
+    publicada = precalculo.publicada
+    if publicada is not None and publicada.version != version:
+        st.rerun()
+
+@st.fragment
+@cronometrado
+def curva_avance(indice, df_master):
+    # Avance "al día X", valor ganado y Curva S por disciplina; cada consulta es una búsqueda binaria por partida
+    hasta = corte_defecto(indice, publicacion.version[-1])
+    fecha_corte = st.slider(
+        "Avance al día",
+        min_value=min(indice.primer_dia.date(), hasta - datetime.timedelta(days=1)), # El slider necesita min < max
+        max_value=hasta,
+        value=hasta,
+        format="DD/MM/YYYY",
+    )
+    with crono.etapa('curva_s'):
+        avance_corte = precalculado(
+            ('avance_corte', fecha_corte), lambda: curva_s(indice, df_master, pd.DatetimeIndex([fecha_corte]))['% Avance'].iloc[-1] # Fila 'Global'
+        )
+    with crono.etapa('valor_ganado'):
+        ev = precalculado(('valor_ganado', fecha_corte), lambda: get_valor_ganado(fecha_corte))
+        resumen_ev = resumen_valor_ganado(ev).set_index('Disciplina')
+    spi = resumen_ev.loc['Global', 'SPI']
+    
+    m1, m2, m3 = st.columns(3)
+    m1.metric(f"Avance Global al {fecha_corte:%d/%m/%Y}", f"{avance_corte:.1f}%")
+    m2.metric("Plan a la fecha (PV)", f"{resumen_ev.loc['Global', 'PV']:.1f}%" if resumen_ev.loc['Global', 'PV'] > 0 else "Sin línea base")
+    m3.metric("SPI", f"{spi:.2f}" if pd.notna(spi) else "—", help="EV / PV de las partidas con línea base (<1 = atrasado)")
+    with crono.etapa('figuras'):
+        st.plotly_chart(precalculado(('figura_curva_s', fecha_corte), lambda: get_figura_curva_s(fecha_corte)), use_container_width=True)
+    with st.expander(f"Valor ganado y pronóstico por partida al {fecha_corte:%d/%m/%Y}"):
+        st.dataframe(
+            ev,
+            column_config={
+                "Fin Plan": st.column_config.DateColumn(format="DD/MM/YYYY"),
+                "Fin Proyectado": st.column_config.DateColumn(format="DD/MM/YYYY", help="Según el ritmo de los últimos 14 días"),
+            },
+            use_container_width=True, hide_index=True,
+        )
+
+@st.fragment
+@cronometrado
+def grafico_productividad():
+    # Selectores de visualización
+    col_t1, col_t2 = st.columns([1, 3])
+    
+    with col_t1:
+        agrupacion = st.selectbox("Agrupar Por:", ["Diario", "Semanal", "Mensual"])
+        disc_filter = st.selectbox("Filtrar Disciplina", ["Todas", "Mecánica", "Civil"])
+        primera, ultima = rango_productividad(precalculado('fechas_con_avance', get_fechas_con_avance))
+        rango = st.slider("Rango", min_value=primera, max_value=ultima, value=(primera, ultima), format="DD/MM/YYYY")
+    
+    with col_t2:
+        # Los rollups ya están agregados por (periodo, Disciplina, Partida): solo se filtran.
+        # Si el rango tiene demasiados periodos se agrupa más grueso (presupuesto de puntos por serie).
+        freq = frecuencia_para(FRECUENCIAS_DASHBOARD[agrupacion], *rango)
+        disciplina = None if disc_filter == "Todas" else disc_filter
+        if freq != FRECUENCIAS_DASHBOARD[agrupacion]:
+            st.caption(f"ℹ️ Rango largo: se muestra '{TITULOS_FRECUENCIA[freq]}' para no enviar demasiados puntos al navegador.")
+        
+        # Gráfico de Barras
+        with crono.etapa('figuras'):
+            figura = precalculado(('figura_esfuerzo', freq, disciplina, *rango), lambda: get_figura_esfuerzo(freq, disciplina, *rango))
+            st.plotly_chart(figura, use_container_width=True)
+        
+        st.caption("Nota: Cada partida aporta (cantidad / meta) × peso, en % del proyecto; así Ton, m³ y Und se suman sin mezclar unidades. Para detalle técnico, ver tabla abajo.")
+
+@st.fragment
+@cronometrado
+def tabla_resumen():
+    # Ventana de fechas + paginación de columnas: en pantalla nunca hay más de una página
+    fechas = precalculado('fechas_con_avance', get_fechas_con_avance)
+    col_r1, col_r2 = st.columns([2, 1])
+    with col_r1:
+        rango = st.date_input(
+            "Ventana de fechas",
+            ventana_resumen(fechas),
+            min_value=fechas[0].date(),
+            max_value=fechas[-1].date(),
+        )
+    desde, hasta = (rango[0], rango[-1]) if rango else (fechas[0].date(), fechas[-1].date())
+    fechas_ventana = [f for f in fechas if desde <= f.date() <= hasta]
+    with col_r2:
+        n_paginas = paginar(fechas_ventana, 1)[1]
+        pagina = st.number_input(f"Página de columnas (de {n_paginas})", min_value=1, max_value=n_paginas, value=n_paginas)
+    fechas_pagina, _ = paginar(fechas_ventana, pagina)
+    
+    if fechas_pagina:
+        with crono.etapa('pivot'):
+            # Degradado azul por fila (igual que background_gradient) con el CSS ya calculado
+            pivot, estilos = precalculado(('pivot', tuple(fechas_pagina)), lambda: get_tabla_pagina(tuple(fechas_pagina)))
+            st.dataframe(pivot.style.apply(lambda _: estilos, axis=None), use_container_width=True)
+    else:
+        st.info("No hay avances registrados en la ventana seleccionada.")
+
+@st.fragment
+def descargas(df_master):
+    # Exportación filtrada; el archivo se genera (por bloques) solo al hacer clic
+    fechas = precalculado('fechas_con_avance', get_fechas_con_avance)
+    col_d1, col_d2, col_d3 = st.columns([2, 1, 2])
+    with col_d1:
+        tipo = st.radio("Contenido", ['pivot', 'historial'], horizontal=True, key="exp_tipo",
+                        format_func={'pivot': "Resumen Partidas x Fechas", 'historial': "Historial de reportes"}.get)
+    with col_d2:
+        formato = st.selectbox("Formato", list(FORMATOS_EXPORTACION), key="exp_formato", format_func=str.upper)
+    with col_d3:
+        rango = st.date_input(
+            "Fechas",
+            (fechas[0].date(), fechas[-1].date()),
+            min_value=fechas[0].date(),
+            max_value=fechas[-1].date(),
+            key="exp_rango",
+        )
+    col_d4, col_d5 = st.columns(2)
+    with col_d4:
+        disciplina = st.selectbox("Disciplina", ["Todas"] + df_master['Disciplina'].unique().tolist(), key="exp_disciplina")
+    with col_d5:
+        partidas = df_master['Partida'] if disciplina == "Todas" else df_master.loc[df_master['Disciplina'] == disciplina, 'Partida']
+        partida = st.selectbox("Partida", ["Todas"] + partidas.unique().tolist(), key="exp_partida")
+
+    filtros = {
+        'disciplina': None if disciplina == "Todas" else disciplina,
+        'partida': None if partida == "Todas" else partida,
+        'desde': rango[0] if rango else None,
+        'hasta': rango[-1] if rango else None,
+    }
+    extension, mime = FORMATOS_EXPORTACION[formato]
+
+    def generar():
+        # Misma versión de datos y filtros -> mismo archivo (no se vuelve a generar)
+        with open(exportar(backend, DIR_EXPORTACIONES, tipo, formato, **filtros), 'rb') as f:
+            return f.read()
+
+    st.download_button(
+        label=f"Descargar ({formato.upper()})",
+        data=generar,
+        file_name=f"{'reporte_avance' if tipo == 'pivot' else 'historial'}_pebbles{extension}",
+        mime=mime,
+    )
 
 # Inicialización
-init_db()
-df_cat_raw, df_hist_raw = load_data()
-df_master = get_acumulados(df_cat_raw.copy(), df_hist_raw.copy()) # Master tiene Metas + Acumulados
+crono = Cronometro(metricas_global) # Tiempos por etapa de este rerun
+with crono.etapa('init_db'):
+    init_db()
+precalculo = proyecto.precalculo() # Hilo del proyecto que prepara el tablero después de cada guardado
 
 # --- INTERFAZ ---
 st.sidebar.title("🏗️ Gestión Temporal")
 menu = st.sidebar.radio("Navegación", ["Panel de Control (Dashboard)", "Reportar Avance Diario", "Configuración Metas"])
+crono.vista = menu
+datos = DatosVista(DATASETS, DATOS_POR_VISTA[menu])
+stats_cache = cache_proyecto.stats()
+st.sidebar.caption(f"Cache compartida: {stats_cache['hits']} hits · {stats_cache['misses']} misses · {stats_cache['entradas']} entradas")
+st.sidebar.caption(f"Proyectos abiertos: {', '.join(registro.activos())}")
 
 # ==============================================================================
 # 1. CONFIGURACIÓN (Metas y Fotos)
@@ -381,25 +810,114 @@ menu = st.sidebar.radio("Navegación", ["Panel de Control (Dashboard)", "Reporta
 if menu == "Configuración Metas":
     st.header("⚙️ Configuración del Expediente Técnico")
     st.info("Edita aquí las Metas Totales y enlaces a Fotos.")
+    df_cat_raw = datos['catalogo']
     
     edited_cat = st.data_editor(
         df_cat_raw,
         column_config={
             "Meta": st.column_config.NumberColumn(min_value=0.1, format="%.2f"),
-            "Img": st.column_config.LinkColumn("Foto URL"),
+            "Img": st.column_config.TextColumn("Foto", help="URL http(s) o img:<hash> de una foto subida abajo"),
             "Disciplina": st.column_config.TextColumn(disabled=True),
             "Partida": st.column_config.TextColumn(disabled=True),
-            "Unidad": st.column_config.TextColumn(disabled=True)
+            "Unidad": st.column_config.TextColumn(disabled=True),
+            "Area": st.column_config.TextColumn("Área"),
+            "Elemento": st.column_config.TextColumn("Elemento (opcional)"),
+            "Peso": st.column_config.NumberColumn("Peso", min_value=0.0, format="%.2f", help="Peso de la partida en el avance ponderado")
         },
         use_container_width=True,
         hide_index=True
     )
     
     if st.button("💾 Guardar Cambios en Catálogo"):
-        edited_cat.to_csv(FILE_CATALOGO, index=False)
+        backend.guardar_catalogo(edited_cat)
+        datos_guardados()
         st.success("Catálogo actualizado.")
         st.rerun()
 
+    st.subheader("🔗 Dependencias entre Actividades")
+    st.caption("Cada fila indica que la actividad requiere avance previo de su predecesora. Se permiten varias predecesoras por actividad.")
+    disciplinas = sorted(df_cat_raw['Disciplina'].unique())
+    partidas = sorted(df_cat_raw['Partida'].unique())
+    edited_dep = st.data_editor(
+        leer_dependencias(FILE_DEPENDENCIAS),
+        column_config={
+            "Disciplina": st.column_config.SelectboxColumn(options=disciplinas, required=True),
+            "Partida": st.column_config.SelectboxColumn(options=partidas, required=True),
+            "Disciplina Predecesora": st.column_config.SelectboxColumn(options=disciplinas, required=True),
+            "Predecesora": st.column_config.SelectboxColumn(options=partidas, required=True),
+        },
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        key="edit_dep"
+    )
+    
+    if st.button("💾 Guardar Dependencias"):
+        try:
+            GrafoDependencias.desde_dataframe(edited_dep) # Rechaza ciclos antes de guardar
+        except CicloError as e:
+            st.error(f"⛔ {e}")
+        else:
+            escribir_atomico(edited_dep.dropna(), FILE_DEPENDENCIAS)
+            datos_guardados('grafo')
+            st.success("Dependencias actualizadas.")
+            st.rerun()
+
+    st.subheader("📅 Línea Base (Plan)")
+    st.caption("Inicio y Fin planificados de cada partida; el avance planificado se reparte en forma lineal entre ambas fechas.")
+    # Partidas nuevas del catálogo aparecen sin fechas
+    linea_base = df_cat_raw[['Disciplina', 'Partida']].merge(datos['linea_base'], on=['Disciplina', 'Partida'], how='left')
+    edited_base = st.data_editor(
+        linea_base,
+        column_config={
+            "Disciplina": st.column_config.TextColumn(disabled=True),
+            "Partida": st.column_config.TextColumn(disabled=True),
+            "Inicio": st.column_config.DateColumn("Inicio Plan", format="DD/MM/YYYY"),
+            "Fin": st.column_config.DateColumn("Fin Plan", format="DD/MM/YYYY"),
+        },
+        use_container_width=True,
+        hide_index=True,
+        key="edit_base"
+    )
+    
+    if st.button("💾 Guardar Línea Base"):
+        inicio, fin = pd.to_datetime(edited_base['Inicio']), pd.to_datetime(edited_base['Fin'])
+        if (fin < inicio).any():
+            st.error("⛔ Hay partidas con Fin anterior al Inicio.")
+        else:
+            escribir_atomico(edited_base.assign(Inicio=inicio.dt.date, Fin=fin.dt.date), FILE_LINEA_BASE)
+            datos_guardados('linea_base')
+            st.success("Línea base actualizada.")
+            st.rerun()
+
+    st.subheader("🖼️ Fotos de Referencia")
+    st.caption("La foto se guarda en el servidor y el catálogo queda apuntando a ella; en el registro diario se muestra una miniatura.")
+    claves_foto = list(zip(df_cat_raw['Disciplina'], df_cat_raw['Partida']))
+    col_f1, col_f2 = st.columns([2, 1])
+    with col_f1:
+        clave_foto = st.selectbox("Partida", claves_foto, format_func=lambda c: f"{c[0]} · {c[1]}", key="foto_partida")
+        foto = st.file_uploader("Foto (JPG, PNG o WEBP)", type=['jpg', 'jpeg', 'png', 'webp'], key="foto_archivo")
+    with col_f2:
+        actual = df_cat_raw.set_index(['Disciplina', 'Partida']).at[clave_foto, 'Img'] if clave_foto else None
+        imagen = imagen_referencia(actual)
+        if imagen is not None:
+            st.image(imagen, caption="Foto actual", width=ANCHO_MINIATURA)
+    originales, miniaturas = almacen_imagenes().uso()
+    st.caption(f"Fotos: {originales / 2**20:.1f} MB · cache de miniaturas: {miniaturas / 2**20:.1f} MB")
+    if foto is not None and st.button("💾 Guardar Foto"):
+        try:
+            referencia = almacen_imagenes().guardar(foto.getvalue())
+        except ValueError as e:
+            st.error(f"⛔ {e}")
+        else:
+            df_cat_foto = backend.leer_catalogo()
+            fila = (df_cat_foto['Disciplina'] == clave_foto[0]) & (df_cat_foto['Partida'] == clave_foto[1])
+            df_cat_foto.loc[fila, 'Img'] = referencia
+            backend.guardar_catalogo(df_cat_foto)
+            datos_guardados()
+            st.success(f"Foto guardada para {clave_foto[1]}.")
+            st.rerun()
+
 # ==============================================================================
 # 2. REPORTAR AVANCE (Inputs con Fecha)
 # ==============================================================================
@@ -408,147 +926,121 @@ elif menu == "Reportar Avance Diario":
     
     col_sel1, col_sel2 = st.columns(2)
     with col_sel1:
-        disc_sel = st.selectbox("Disciplina", df_master['Disciplina'].unique())
-        # Filtrar partidas de esa disciplina
-        partidas_disp = df_master[df_master['Disciplina'] == disc_sel]['Partida'].unique()
-        partida_sel = st.selectbox("Partida / Elemento", partidas_disp)
+        # Selectores en cascada por el árbol WBS: cada uno carga solo los hijos del nivel elegido
+        wbs = datos['wbs']
+        ruta = ()
+        while not wbs.es_hoja(ruta):
+            opciones = wbs.hijos(ruta)
+            if len(ruta) == 0 and len(opciones) == 1: # Una sola área: no hace falta preguntar
+                ruta += (opciones[0],)
+                continue
+            hojas = all(wbs.es_hoja(ruta + (o,)) for o in opciones)
+            etiqueta = "Partida / Elemento" if hojas else NIVELES_WBS[len(ruta)]
+            ruta += (st.selectbox(etiqueta, opciones, key=f"wbs_{len(ruta)}"),)
+        disc_sel, partida_sel = wbs.clave(ruta)
     
-    # Obtener datos actuales del Master
-    row = df_master[df_master['Partida'] == partida_sel].iloc[0]
+    # Obtener datos actuales del Master (por clave compuesta)
+    row = get_master_por_clave().loc[(disc_sel, partida_sel)]
     pendiente = row['Meta'] - row['Ejecutado']
     
     with col_sel2:
         # Visualizar foto si existe
-        if pd.notna(row['Img']) and str(row['Img']).startswith('http'):
-            st.image(row['Img'], caption=f"Ref: {partida_sel}", width=200)
+        imagen = imagen_referencia(row['Img'])
+        if imagen is not None:
+            st.image(imagen, caption=f"Ref: {partida_sel}", width=ANCHO_MINIATURA)
     
     st.divider()
     
-    # FORMULARIO DE INGRESO
-    col_inp1, col_inp2, col_inp3 = st.columns(3)
-    
-    with col_inp1:
-        fecha_input = st.date_input("Fecha de Ejecución", datetime.date.today())
-    
-    with col_inp2:
-        qty_input = st.number_input(f"Cantidad Avanzada ({row['Unidad']})", min_value=0.0, step=1.0)
-        
-    with col_inp3:
-        nota_input = st.text_input("Nota / Comentario (Opcional)", placeholder="Ej. Turno noche, Sector B")
-
-    # VALIDACIÓN DE LÓGICA CIVIL (PREDECESORAS)
-    bloqueo_logico = False
-    
-    if disc_sel == "Civil":
-        predecesor = JERARQUIA_CIVIL.get(partida_sel)
-        if predecesor:
-            # Buscar % del predecesor
-            row_pred = df_master[df_master['Partida'] == predecesor].iloc[0]
-            pct_pred = row_pred['% Avance']
-            pct_actual = row['% Avance']
-            
-            # Calculamos cómo quedaría el avance con lo nuevo
-            pct_nuevo = ((row['Ejecutado'] + qty_input) / row['Meta']) * 100
-            
-            st.caption(f"🔗 Requiere: {predecesor} ({pct_pred:.1f}%)")
-            
-            # Regla: No puedes superar significativamente al predecesor
-            if pct_nuevo > (pct_pred + 2): # Damos 2% de tolerancia
-                st.error(f"⛔ ERROR DE SECUENCIA: No puedes avanzar '{partida_sel}' al {pct_nuevo:.1f}% porque '{predecesor}' solo va al {pct_pred:.1f}%.")
-                bloqueo_logico = True
+    # Formulario, validación y últimos movimientos: escribir una cantidad solo re-ejecuta este fragmento
+    formulario_avance(disc_sel, partida_sel)
 
-    # BOTÓN DE REGISTRO
-    btn = st.button("✅ Registrar Avance", type="primary", disabled=bloqueo_logico)
-    
-    if btn:
-        if qty_input > 0:
-            # Crear nueva fila para el historial
-            new_row = {
-                'Fecha': fecha_input,
-                'Disciplina': disc_sel,
-                'Partida': partida_sel,
-                'Cantidad': qty_input,
-                'Nota': nota_input
-            }
-            # Guardar append mode
-            df_new_entry = pd.DataFrame([new_row])
-            df_new_entry.to_csv(FILE_HISTORIAL, mode='a', header=not os.path.exists(FILE_HISTORIAL), index=False)
-            
-            st.balloons()
-            st.success(f"Guardado: {qty_input} {row['Unidad']} el día {fecha_input}.")
-        else:
-            st.warning("La cantidad debe ser mayor a 0.")
-            
-    # MOSTRAR ÚLTIMOS REGISTROS DE ESTA PARTIDA
-    st.subheader(f"Últimos movimientos: {partida_sel}")
-    if not df_hist_raw.empty:
-        filtro_hist = df_hist_raw[df_hist_raw['Partida'] == partida_sel].sort_values('Fecha', ascending=False).head(5)
-        st.dataframe(filtro_hist, use_container_width=True)
+    # IMPORTACIÓN MASIVA (CSV / Excel con columnas Fecha, Disciplina, Partida, Cantidad, Nota)
+    st.divider()
+    with st.expander("📥 Importación masiva de reportes (CSV / Excel)"):
+        archivo = st.file_uploader("Archivo de reportes", type=['csv', 'xlsx'])
+        if archivo is not None:
+            try:
+                df_lote = leer_archivo(archivo, archivo.name)
+                aceptadas, rechazadas = validar_lote(df_lote, datos['master'], datos['grafo'])
+            except ValueError as e:
+                st.error(f"⛔ {e}")
+            else:
+                c_ok, c_rech = st.columns(2)
+                c_ok.metric("Filas válidas", f"{len(aceptadas)}")
+                c_rech.metric("Filas rechazadas", f"{len(rechazadas)}")
+                if not rechazadas.empty:
+                    st.dataframe(rechazadas, use_container_width=True, hide_index=True)
+                    st.download_button(
+                        label="Descargar rechazos (CSV)",
+                        data=rechazadas.to_csv(index=False).encode('utf-8'),
+                        file_name='rechazos_importacion.csv',
+                        mime='text/csv',
+                    )
+                if st.button(f"✅ Importar {len(aceptadas)} filas", type="primary", disabled=aceptadas.empty):
+                    # Todo el lote en una sola escritura
+                    escritor().registrar(aceptadas.to_dict('records'))
+                    datos_guardados()
+                    st.success(f"Importadas {len(aceptadas)} filas.")
 
 # ==============================================================================
 # 3. DASHBOARD Y REPORTES (El corazón de tu solicitud)
 # ==============================================================================
 elif menu == "Panel de Control (Dashboard)":
     st.title("📊 Tablero de Control del Proyecto")
+    # Todo lo de la vista inicial ya viene calculado por el hilo de precálculo
+    with crono.etapa('precalculo'):
+        publicacion = precalculo.ultima()
+    artefactos = publicacion.artefactos
+    df_master = artefactos['master']
+    antiguedad = publicacion.antiguedad()
+    if precalculo.al_dia(publicacion):
+        estado = "al día"
+    else:
+        estado = "⏳ actualizando con los últimos cambios…"
+        esperar_publicacion(publicacion.version)
+    edad = f"{antiguedad:.0f} s" if antiguedad < 120 else f"{antiguedad / 60:.0f} min"
+    st.caption(
+        f"🕒 Calculado hace {edad} · {estado}",
+        help=f"El tablero se recalcula en segundo plano después de cada guardado ({publicacion.segundos:.1f} s la última vez).",
+    )
+    if precalculo.error is not None:
+        st.warning(f"⚠️ El último recálculo falló (se muestran los datos anteriores): {precalculo.error}")
     
     # 1. KPI GLOBAL
     # Nota: Como hay unidades mixtas (Ton, m3, Und), sumar todo directo es matemáticamente incorrecto para un "Total Físico".
-    # Usaremos el % Ponderado por partida (asumiendo que cada partida pesa igual, o simplemente promedio de avances)
-    avance_global = df_master['% Avance'].mean()
+    # Usaremos el % Ponderado por partida según la columna 'Peso' del catálogo (igual peso = promedio simple)
+    avance_global = artefactos['avance_global']
     
     k1, k2, k3 = st.columns(3)
-    k1.metric("Avance Físico Global (Promedio)", f"{avance_global:.1f}%")
-    k2.metric("Registros Totales", f"{len(df_hist_raw)}")
+    k1.metric("Avance Físico Global (Ponderado)", f"{avance_global:.1f}%")
+    k2.metric("Registros Totales", f"{artefactos['registros']}")
     # Filtro fecha dinámica
     k3.date_input("Fecha Hoy", datetime.date.today(), disabled=True)
     st.progress(avance_global/100)
     
+    with st.expander("Avance ponderado por nivel (WBS)"):
+        nivel_wbs = st.radio("Nivel", NIVELES_WBS[:3], horizontal=True)
+        st.dataframe(artefactos[('resumen_wbs', NIVELES_WBS.index(nivel_wbs) + 1)], use_container_width=True, hide_index=True)
+    
+    # Secuencia constructiva: actividades fuera de secuencia y ruta crítica
+    fuera_de_secuencia = artefactos['fuera_de_secuencia']
+    if fuera_de_secuencia:
+        st.warning("⚠️ Fuera de secuencia (superan a su predecesora): " + ", ".join(p for _, p in fuera_de_secuencia))
+    if artefactos['ruta_critica'] is not None:
+        ruta, duracion_ruta, con_duraciones = artefactos['ruta_critica']
+        st.caption(f"🧭 Ruta crítica ({duracion_ruta:.0f} {'días' if con_duraciones else 'actividades'}): " + " → ".join(p for _, p in ruta))
+    
     st.divider()
     
-    # 2. ANÁLISIS TEMPORAL (Día / Semana / Mes)
-    if not df_hist_raw.empty:
-        st.subheader("📈 Productividad en el Tiempo")
-        
-        # Convertir fecha para asegurar agrupación
-        df_hist_chart = df_hist_raw.copy()
-        df_hist_chart['Fecha'] = pd.to_datetime(df_hist_chart['Fecha'])
-        
-        # Selectores de visualización
-        col_t1, col_t2 = st.columns([1, 3])
+    # 2. ANÁLISIS TEMPORAL (Curva S + Día / Semana / Mes)
+    hay_historial = artefactos['registros'] > 0 and 'indice_acumulado' in artefactos
+    if hay_historial:
+        st.subheader("📈 Curva S")
+        curva_avance(artefactos['indice_acumulado'], df_master)
         
-        with col_t1:
-            agrupacion = st.selectbox("Agrupar Por:", ["Diario", "Semanal", "Mensual"])
-            disc_filter = st.selectbox("Filtrar Disciplina", ["Todas", "Mecánica", "Civil"])
+        st.subheader("📈 Productividad en el Tiempo")
         
-        with col_t2:
-            # Filtrado
-            if disc_filter != "Todas":
-                df_hist_chart = df_hist_chart[df_hist_chart['Disciplina'] == disc_filter]
-                
-            # Agrupación temporal
-            if agrupacion == "Diario":
-                grouper = df_hist_chart.groupby([pd.Grouper(key='Fecha', freq='D'), 'Disciplina'])['Cantidad'].sum().reset_index()
-                title_chart = "Producción Diaria"
-            elif agrupacion == "Semanal":
-                grouper = df_hist_chart.groupby([pd.Grouper(key='Fecha', freq='W-MON'), 'Disciplina'])['Cantidad'].sum().reset_index()
-                title_chart = "Producción Semanal (Cierre Lunes)"
-            else: # Mensual
-                grouper = df_hist_chart.groupby([pd.Grouper(key='Fecha', freq='M'), 'Disciplina'])['Cantidad'].sum().reset_index()
-                title_chart = "Producción Mensual"
-            
-            # Gráfico de Barras
-            fig = px.bar(
-                grouper, 
-                x='Fecha', 
-                y='Cantidad', 
-                color='Disciplina', 
-                title=title_chart,
-                text_auto='.1s',
-                barmode='group'
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
-            st.caption("Nota: Este gráfico suma cantidades mixtas (Ton + m3 + Und) para ver 'esfuerzo'. Para detalle técnico, ver tabla abajo.")
+        grafico_productividad()
 
     else:
         st.info("Aún no hay historial para generar gráficas de tiempo.")
@@ -558,26 +1050,17 @@ elif menu == "Panel de Control (Dashboard)":
     # 3. TABLA RESUMEN POR PERIODO (Matriz Cruzada)
     st.subheader("📋 Resumen Detallado")
     
-    if not df_hist_raw.empty:
-        # Pivot table para ver Partidas vs Fechas
-        df_hist_raw['FechaStr'] = pd.to_datetime(df_hist_raw['Fecha']).dt.strftime('%Y-%m-%d')
-        pivot = pd.pivot_table(
-            df_hist_raw, 
-            values='Cantidad', 
-            index=['Disciplina', 'Partida'], 
-            columns='FechaStr', 
-            aggfunc='sum', 
-            fill_value=0
-        )
-        # Agregar columna de Total Acumulado
-        pivot['TOTAL ACUMULADO'] = pivot.sum(axis=1)
-        
-        st.dataframe(pivot.style.background_gradient(cmap="Blues", axis=1), use_container_width=True)
-        
-        # Botón descargar Excel
-        st.download_button(
-            label="Descargar Reporte Completo (CSV)",
-            data=pivot.to_csv().encode('utf-8'),
-            file_name='reporte_avance_pebbles.csv',
-            mime='text/csv',
-        )
+    if hay_historial:
+        tabla_resumen()
+
+        st.subheader("⬇️ Descargas")
+        descargas(df_master)
+
+# ==============================================================================
+# RENDIMIENTO (tiempos por etapa, p50/p95 de los últimos reruns)
+# ==============================================================================
+crono.cerrar()
+if st.sidebar.checkbox("⏱️ Rendimiento", key="panel_rendimiento"):
+    with st.sidebar:
+        st.dataframe(metricas_global.percentiles(), use_container_width=True, hide_index=True)
+        st.caption(f"Último rerun: {crono.etapas['total rerun']:.0f} ms · log en {metricas_global.ruta_log}")
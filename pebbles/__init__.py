@@ -0,0 +1 @@
+# Paquete de soporte de Control Pebbles (almacenamiento y cálculos sin Streamlit)
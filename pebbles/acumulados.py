@@ -0,0 +1,47 @@
+import pandas as pd
+
+# --- ACUMULADO POR PARTIDA (tabla persistida) ---
+# Se actualiza en O(1) por cada fila nueva del historial (dentro de la misma
+# transacción del append) y solo se reconstruye desde el historial cuando su
+# watermark o checksum no coinciden (ver storage.SqliteBackend.sincronizar_vistas).
+
+nombre = 'acumulados'
+
+
+def crear(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS acumulados (
+            Disciplina TEXT NOT NULL,
+            Partida TEXT NOT NULL,
+            Cantidad REAL NOT NULL,
+            Registros INTEGER NOT NULL,
+            PRIMARY KEY (Disciplina, Partida)
+        )
+    """)
+
+
+def aplicar(conn, registros):
+    # registros: tuplas (Fecha, Disciplina, Partida, Cantidad, Nota) recién insertadas
+    conn.executemany("""
+        INSERT INTO acumulados (Disciplina, Partida, Cantidad, Registros) VALUES (?, ?, ?, 1)
+        ON CONFLICT (Disciplina, Partida) DO UPDATE SET
+            Cantidad = Cantidad + excluded.Cantidad,
+            Registros = Registros + 1
+    """, [(r[1], r[2], r[3]) for r in registros])
+
+
+def reconstruir(conn):
+    conn.execute("DELETE FROM acumulados")
+    conn.execute("""
+        INSERT INTO acumulados (Disciplina, Partida, Cantidad, Registros)
+        SELECT Disciplina, Partida, SUM(Cantidad), COUNT(*) FROM historial GROUP BY Disciplina, Partida
+    """)
+
+
+def checksum(conn):
+    # (n° de filas, suma de Cantidad) que debería coincidir con el historial completo
+    return conn.execute("SELECT COALESCE(SUM(Registros), 0), COALESCE(SUM(Cantidad), 0) FROM acumulados").fetchone()
+
+
+def leer(conn):
+    return pd.read_sql_query("SELECT Disciplina, Partida, Cantidad FROM acumulados", conn)
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from pebbles.storage import get_backend, SqliteBackend
+from pebbles.kpis import get_acumulados
+from pebbles.reportes import paginar, pivot_ventana, iterar_pivot_csv
+from pebbles.esquema import HistorialCompacto
+from pebbles.graficos import figura_esfuerzo
+from pebbles.curva_s import IndiceAcumulado
+from pebbles.valor_ganado import valor_ganado, serie_esfuerzo
+from pebbles.dependencias import COLUMNAS_DEPENDENCIAS
+
+# --- BENCHMARK CON DATOS SINTÉTICOS ---
+# Genera catálogos (10 a 10k partidas) e historiales (1k a 10M filas) realistas
+# y mide tiempo y pico de memoria de cada etapa del tablero, sin navegador:
+#   python -m pebbles.benchmark --partidas 10 1000 --filas 1000 100000
+# Los resultados se guardan en JSON para comparar entre versiones:
+#   python -m pebbles.benchmark ... --salida nuevo.json --comparar base.json
+
+ACTIVIDADES_CIVILES = [  # Cadena de predecesoras de cada zona (igual que JERARQUIA_CIVIL)
+    ('Excavaciones', 'm³'),
+    ('Solado', 'Und'),
+    ('Encofrado', 'Und'),
+    ('Vaciado de Concreto', 'm³'),
+    ('Desencofrado', 'Und'),
+]
+EQUIPOS_MECANICOS = ['Faja Transportadora', 'Chancadora', 'Zaranda', 'Estructuras Metálicas', 'Alimentador']
+FECHA_INICIO = datetime.date(2025, 1, 1)
+
+
+def generar_catalogo(n_partidas, seed=0):
+    # ~40% civil (zonas con la cadena completa de 5 actividades) y el resto mecánica
+    rng = np.random.default_rng(seed)
+    n_zonas = max(1, int(n_partidas * 0.4) // len(ACTIVIDADES_CIVILES))
+    filas, dependencias = [], []
+    for z in range(n_zonas):
+        zona = f'Zona {z + 1:03d}'
+        anterior = None
+        for actividad, unidad in ACTIVIDADES_CIVILES:
+            partida = f'{actividad} Z{z + 1:03d}'
+            filas.append(('Pebbles', 'Civil', zona, partida, unidad, round(rng.uniform(50, 500), 1)))
+            if anterior:
+                dependencias.append(('Civil', partida, 'Civil', anterior))
+            anterior = partida
+    for i in range(max(0, n_partidas - len(filas))):
+        equipo = EQUIPOS_MECANICOS[i % len(EQUIPOS_MECANICOS)]
+        filas.append(('Pebbles', 'Mecánica', f'Línea {i // 20 + 1:03d}', f'{equipo} {i + 1:05d}', 'Ton', round(rng.uniform(20, 300), 1)))
+
+    cat = pd.DataFrame(filas, columns=['Area', 'Disciplina', 'Elemento', 'Partida', 'Unidad', 'Meta'])
+    cat['Img'] = ''
+    cat['Peso'] = 1.0
+    return cat, pd.DataFrame(dependencias, columns=COLUMNAS_DEPENDENCIAS)
+
+
+def generar_historial(cat, n_filas, dias=730, seed=0):
+    # Cada partida mecánica (o cada zona civil) trabaja en una ventana de fechas.
+    # Dentro de una zona, la sucesora repite las fracciones de avance de su
+    # predecesora con un desfase de días, así nunca la supera (regla respetada).
+    rng = np.random.default_rng(seed)
+    civil = cat['Disciplina'].to_numpy() == 'Civil'
+    n_cadena = len(ACTIVIDADES_CIVILES)
+    unidades = [np.arange(i, i + n_cadena) for i in np.flatnonzero(civil)[::n_cadena]]
+    unidades += [np.array([i]) for i in np.flatnonzero(~civil)]
+
+    peso = rng.uniform(0.5, 1.5, len(unidades))
+    filas_unidad = np.maximum(1, np.floor(peso / peso.sum() * n_filas / np.array([len(u) for u in unidades]))).astype(int)
+
+    partes = []
+    metas = cat['Meta'].to_numpy()
+    for unidad, k in zip(unidades, filas_unidad):
+        inicio = rng.uniform(0, dias * 0.5)
+        duracion = rng.uniform(dias * 0.2, dias * 0.5)
+        base = np.sort(inicio + rng.uniform(0, duracion, k)).astype(int)
+        fraccion = rng.exponential(1.0, k)
+        fraccion = fraccion / fraccion.sum() * rng.uniform(0.6, 1.0)
+        desfase = int(rng.integers(7, 21))
+        for nivel, idx in enumerate(unidad):
+            dia = np.minimum(base + nivel * desfase, dias - 1)
+            partes.append((np.full(k, idx, dtype=np.int32), dia.astype(np.int32), fraccion * metas[idx]))
+
+    codigo = np.concatenate([p[0] for p in partes])
+    dia = np.concatenate([p[1] for p in partes])
+    cantidad = np.round(np.concatenate([p[2] for p in partes]), 3)
+    orden = np.argsort(dia, kind='stable')  # El historial se escribe en orden de llegada
+    return codigo[orden], dia[orden], cantidad[orden]
+
+
+def escribir_historial_csv(ruta, cat, historial, filas_por_bloque=500_000):
+    codigo, dia, cantidad = historial
+    disciplinas = cat['Disciplina'].to_numpy()
+    partidas = cat['Partida'].to_numpy()
+    fechas = np.array([(FECHA_INICIO + datetime.timedelta(days=int(d))).isoformat() for d in range(int(dia.max()) + 1)])
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        f.write('Fecha,Disciplina,Partida,Cantidad,Nota\n')
+        for i in range(0, len(codigo), filas_por_bloque):
+            sl = slice(i, i + filas_por_bloque)
+            pd.DataFrame({
+                'Fecha': fechas[dia[sl]],
+                'Disciplina': disciplinas[codigo[sl]],
+                'Partida': partidas[codigo[sl]],
+                'Cantidad': cantidad[sl],
+                'Nota': '',
+            }).to_csv(f, header=False, index=False)
+
+
+def medir(resultados, nombre, funcion, memoria=True):
+    # Tiempo (s) sin trazar memoria; luego, si se pide, una segunda corrida bajo
+    # tracemalloc para el pico asignado (MB), que si no inflaría los tiempos
+    t0 = time.perf_counter()
+    valor = funcion()
+    resultados[nombre] = {'segundos': round(time.perf_counter() - t0, 6)}
+    if memoria:
+        tracemalloc.start()
+        try:
+            valor = funcion()
+            resultados[nombre]['pico_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        finally:
+            tracemalloc.stop()
+    return valor
+
+
+def correr_escenario(n_partidas, n_filas, tipo_backend, directorio, seed=0):
+    os.makedirs(directorio, exist_ok=True)
+    file_cat = os.path.join(directorio, 'pebbles_catalogo.csv')
+    file_hist = os.path.join(directorio, 'pebbles_historial.csv')
+    file_db = os.path.join(directorio, 'pebbles_historial.db')
+
+    cat, dependencias = generar_catalogo(n_partidas, seed)
+    cat.to_csv(file_cat, index=False)
+    dependencias.to_csv(os.path.join(directorio, 'pebbles_dependencias.csv'), index=False)
+    escribir_historial_csv(file_hist, cat, generar_historial(cat, n_filas, seed=seed))
+
+    etapas = {}
+    backend = get_backend(tipo_backend, file_cat, file_hist, file_db)
+    if tipo_backend in ('sqlite', 'particionado'):
+        medir(etapas, 'migracion_csv', backend.init, memoria=False)  # Única vez
+
+    def arranque():
+        SqliteBackend._verificadas.discard(os.path.abspath(file_db))  # Como un proceso nuevo
+        SqliteBackend._migradas.discard(os.path.abspath(file_db))
+        backend.init()
+    medir(etapas, 'init_db (arranque)', arranque)
+    medir(etapas, 'init_db (rerun)', backend.init)
+    df_cat = medir(etapas, 'load_data (catalogo)', backend.leer_catalogo)
+    hist = medir(etapas, 'load_data (historial completo)', backend.leer_historial)
+    compacto = medir(etapas, 'historial compacto', lambda: HistorialCompacto.desde_dataframe(hist))
+    partida = cat['Partida'].iloc[0]
+    medir(etapas, 'load_data (ultimos 5 de una partida)', lambda: backend.leer_historial(disciplina=cat['Disciplina'].iloc[0], partida=partida, limite=5))
+    df_master = medir(etapas, 'get_acumulados', lambda: get_acumulados(df_cat.copy(), backend.resumen_por_partida()))
+    rollups = {}
+    for freq in ['D', 'W-MON', 'M']:
+        rollups[freq] = medir(etapas, f'rollup {freq}', lambda: backend.rollup(freq))
+    fechas = backend.fechas_con_avance()
+    fechas_pagina, _ = paginar(fechas, 10**9)
+    indice = pd.MultiIndex.from_frame(df_master[['Disciplina', 'Partida']])
+    medir(etapas, 'pivot (pagina)', lambda: pivot_ventana(backend.rollup('D', desde=fechas_pagina[0], hasta=fechas_pagina[-1]), indice, fechas_pagina))
+    medir(etapas, 'pivot (export CSV completo)', lambda: sum(len(t) for t in iterar_pivot_csv(backend)))
+    indice_acum = medir(etapas, 'indice acumulado', lambda: IndiceAcumulado(rollups['D'], zip(df_master['Disciplina'], df_master['Partida'])))
+    linea_base = df_master[['Disciplina', 'Partida']].assign(Inicio=fechas[0], Fin=fechas[-1])
+    medir(etapas, 'valor ganado', lambda: valor_ganado(indice_acum, df_master, linea_base, fechas[-1]))
+    for freq in ['D', 'M']:
+        grouper = medir(etapas, f'esfuerzo {freq}', lambda: serie_esfuerzo(rollups[freq], df_master))
+        medir(etapas, f'figura {freq}', lambda: figura_esfuerzo(grouper, 'Producción').to_json())
+
+    return {
+        'partidas': int(len(cat)),
+        'filas': int(len(hist)),
+        'backend': tipo_backend,
+        'etapas': etapas,
+        'memoria_historial_mb': {
+            'original': round(hist.memory_usage(deep=True).sum() / 2**20, 3),
+            'compacto': round(compacto.memoria() / 2**20, 3),
+        },
+    }
+
+
+def comparar(actual, base):
+    # Tabla de cocientes actual/base por escenario y etapa (>1 = más lento)
+    indice_base = {(e['partidas'], e['filas'], e['backend']): e['etapas'] for e in base['escenarios']}
+    lineas = []
+    for esc in actual['escenarios']:
+        previo = indice_base.get((esc['partidas'], esc['filas'], esc['backend']))
+        if not previo:
+            continue
+        for etapa, med in esc['etapas'].items():
+            if etapa in previo and previo[etapa]['segundos'] > 0:
+                cociente = med['segundos'] / previo[etapa]['segundos']
+                lineas.append(f"{esc['backend']:>6} {esc['partidas']:>6} part. {esc['filas']:>9} filas  {etapa:<40} x{cociente:6.2f}")
+    return '\n'.join(lineas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de Control Pebbles con datos sintéticos.")
+    parser.add_argument('--partidas', type=int, nargs='+', default=[10, 1000])
+    parser.add_argument('--filas', type=int, nargs='+', default=[1000, 100_000])
+    parser.add_argument('--backend', nargs='+', default=['sqlite'], choices=['sqlite', 'csv', 'particionado'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--salida', default=None, help="Archivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de una corrida anterior")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'escenarios': [],
+    }
+    with tempfile.TemporaryDirectory(prefix='pebbles_bench_') as tmp:
+        for tipo in args.backend:
+            for n_partidas in args.partidas:
+                for n_filas in args.filas:
+                    directorio = os.path.join(tmp, f'{tipo}_{n_partidas}_{n_filas}')
+                    esc = correr_escenario(n_partidas, n_filas, tipo, directorio, args.seed)
+                    resultado['escenarios'].append(esc)
+                    total = sum(m['segundos'] for m in esc['etapas'].values())
+                    mem = esc['memoria_historial_mb']
+                    print(f"{tipo:>6} {esc['partidas']:>6} partidas {esc['filas']:>9} filas: {total:8.3f} s"
+                          f"  historial {mem['original']:.1f} MB -> {mem['compacto']:.1f} MB", file=sys.stderr)
+                    shutil.rmtree(directorio, ignore_errors=True)
+
+    salida = args.salida or f"bench_{datetime.datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultados en {salida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            print(comparar(resultado, json.load(f)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# --- CACHE COMPARTIDA ENTRE SESIONES ---
+# Una sola copia de los datos por proceso (no una por navegador). Cada entrada
+# se guarda con la versión de los datos (mtime del archivo o contador de la
+# base); cuando alguien guarda cambia la versión y la entrada vieja se descarta.
+# Con copy-on-write (pandas 3, o activado por quien use la app) las sesiones
+# reciben vistas superficiales: si una sesión modifica su DataFrame, pandas
+# copia solo la columna tocada. Sin copy-on-write reciben una copia.
+
+_PANDAS_3 = int(pd.__version__.split('.')[0]) >= 3
+
+
+def _copy_on_write():
+    # pandas 3 siempre; en pandas 2 depende de la opción global (no se cambia aquí)
+    return _PANDAS_3 or pd.get_option('mode.copy_on_write') is True
+
+
+def version_archivos(*rutas):
+    # Huella barata de uno o más archivos: (mtime en ns, tamaño); None si no existe
+    huella = []
+    for ruta in rutas:
+        try:
+            st_ = os.stat(ruta)
+            huella.append((st_.st_mtime_ns, st_.st_size))
+        except FileNotFoundError:
+            huella.append(None)
+    return tuple(huella)
+
+
+def recortar_directorio(directorio, max_bytes):
+    # Cache en disco: borra los archivos de uso más antiguo (mtime) hasta quedar bajo el tope
+    archivos = []
+    for e in os.scandir(directorio):
+        if e.is_file() and '.tmp' not in e.name:
+            st_ = e.stat()
+            archivos.append((st_.st_mtime_ns, st_.st_size, e.path))
+    total = sum(a[1] for a in archivos)
+    for _, tamano, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:  # Otro proceso ya lo borró
+            pass
+        total -= tamano
+
+
+def _vista(valor):
+    # Entrega una vista que comparte memoria con la cache (copy-on-write) o, sin
+    # copy-on-write, una copia: una sesión nunca modifica lo que ven las demás
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy(deep=not _copy_on_write())
+    if isinstance(valor, tuple):
+        return tuple(_vista(v) for v in valor)
+    return valor
+
+
+class CacheCompartida:
+
+    def __init__(self, max_entradas=64):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()      # (nombre, version) -> valor, en orden LRU
+        self._contadores = {}            # nombre -> n° de invalidaciones explícitas
+        self._cargando = {}              # nombre -> lock (una sola carga a la vez por dato)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def obtener(self, nombre, version, cargar):
+        with self._lock:
+            clave = (nombre, version, self._contadores.get(nombre, 0))
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                return _vista(self._datos[clave])
+            lock_carga = self._cargando.setdefault(nombre, threading.Lock())
+
+        # Si 30 sesiones piden lo mismo a la vez, solo una lee el disco
+        with lock_carga:
+            with self._lock:
+                if clave in self._datos:
+                    self._datos.move_to_end(clave)
+                    self.hits += 1
+                    return _vista(self._datos[clave])
+                self.misses += 1
+            valor = cargar()
+            with self._lock:
+                self._descartar(nombre)
+                self._datos[clave] = valor
+                while len(self._datos) > self.max_entradas:
+                    self._datos.popitem(last=False)
+                    self.evictions += 1
+        return _vista(valor)
+
+    def invalidar(self, nombre=None):
+        # Llamar al guardar: las próximas lecturas vuelven a cargar
+        with self._lock:
+            nombres = [nombre] if nombre is not None else {k[0] for k in self._datos}
+            for n in nombres:
+                self._contadores[n] = self._contadores.get(n, 0) + 1
+                self._descartar(n)
+
+    def _descartar(self, nombre):
+        for clave in [k for k in self._datos if k[0] == nombre]:
+            del self._datos[clave]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entradas': len(self._datos),
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+class DatosVista:
+    # Datasets que declara una vista del menú. Cada uno se calcula solo al
+    # primer uso dentro del rerun; pedir uno no declarado es un error.
+
+    def __init__(self, proveedores, declarados):
+        self._proveedores = proveedores
+        self.declarados = tuple(declarados)
+        self._valores = {}
+
+    def __getitem__(self, nombre):
+        if nombre not in self.declarados:
+            raise KeyError(f"La vista no declaró el dataset '{nombre}'")
+        if nombre not in self._valores:
+            self._valores[nombre] = self._proveedores[nombre]()
+        return self._valores[nombre]
+
+
+# Instancia única del proceso (los módulos importados sobreviven a los reruns)
+cache_global = CacheCompartida()
@@ -0,0 +1,207 @@
+import io
+import os
+import glob
+import zlib
+import argparse
+import datetime
+import pandas as pd
+from pebbles.escritura import escribir_atomico
+from pebbles.wbs import completar_columnas_wbs
+
+# --- CHECKPOINT + COLA DEL HISTORIAL CSV ---
+# El CSV de historial es un log de solo-append. En vez de releerlo entero en
+# cada arranque, cada cierto tamaño se guarda un checkpoint con el estado
+# derivado (producción diaria por partida: de ahí salen acumulados y rollups):
+#
+#   <historial>.ckpt-<offset>-<crc>.csv
+#
+# 'offset' es el byte del log hasta donde llega el checkpoint y 'crc' el
+# CRC32 de todo el log hasta ese byte (detecta un log reescrito, editado o
+# truncado; se lee en bloques sin parsear, mucho más barato que el CSV). Al
+# arrancar se carga el último checkpoint válido y solo se lee la cola del log
+# después de 'offset'. El checkpoint se escribe atómicamente (tmp + rename).
+# Un checkpoint validado se recuerda con el inode, tamaño y mtime del log:
+# mientras el log solo crezca no se vuelve a calcular el CRC (un reemplazo
+# cambia el inode, un truncado lo acorta y una edición del mismo largo cambia
+# el mtime sin cambiar el tamaño).
+
+BYTES_CHECKPOINT = 4 * 2**20  # Cola a partir de la cual conviene un checkpoint nuevo
+COLUMNAS_ESTADO = ['Fecha', 'Disciplina', 'Partida', 'Cantidad', 'Registros']
+NOTA_SALDO_V3 = 'Saldo inicial (importado de v3)'
+DISCIPLINAS_V3 = {'Mecánica/Estructural': 'Mecánica', 'Obras Civiles': 'Civil'}
+
+_validados = {}  # (log, offset, crc) -> (inode, tamaño, mtime) del log al validar
+
+
+def _crc(ruta, offset, bloque=1 << 20):
+    crc, restante = 0, offset
+    with open(ruta, 'rb') as f:
+        while restante > 0:
+            datos = f.read(min(bloque, restante))
+            if not datos:
+                break
+            crc = zlib.crc32(datos, crc)
+            restante -= len(datos)
+    return crc
+
+
+def _checkpoints(ruta):
+    # [(offset, crc, archivo)] del más nuevo al más viejo
+    encontrados = []
+    for archivo in glob.glob(glob.escape(ruta) + '.ckpt-*.csv'):
+        try:
+            offset, crc = archivo[len(ruta) + len('.ckpt-'):-len('.csv')].split('-')
+            encontrados.append((int(offset), int(crc, 16), archivo))
+        except ValueError:
+            continue
+    return sorted(encontrados, reverse=True)
+
+
+def _vacio():
+    return pd.DataFrame({
+        'Fecha': pd.Series(dtype='datetime64[ns]'), 'Disciplina': pd.Series(dtype=object),
+        'Partida': pd.Series(dtype=object), 'Cantidad': pd.Series(dtype=float), 'Registros': pd.Series(dtype='int64'),
+    })
+
+
+def _valido(ruta, offset, crc, st_):
+    clave = (os.path.abspath(ruta), offset, crc)
+    previo = _validados.get(clave)
+    if previo is not None and previo[0] == st_.st_ino and (
+        previo[1] < st_.st_size or previo[1:] == (st_.st_size, st_.st_mtime_ns)
+    ):
+        return True  # Mismo archivo, sin tocar o solo creció desde que se validó
+    if offset > st_.st_size or _crc(ruta, offset) != crc:
+        _validados.pop(clave, None)
+        return False
+    _validados[clave] = (st_.st_ino, st_.st_size, st_.st_mtime_ns)
+    return True
+
+
+def ultimo_checkpoint(ruta):
+    # (offset, estado) del checkpoint más nuevo que sigue siendo coherente con el log
+    if not os.path.exists(ruta):
+        return 0, _vacio()
+    st_ = os.stat(ruta)
+    for offset, crc, archivo in _checkpoints(ruta):
+        if _valido(ruta, offset, crc, st_):
+            estado = pd.read_csv(archivo, parse_dates=['Fecha'])
+            return offset, estado
+    return 0, _vacio()
+
+
+def leer_cola(ruta, offset):
+    # Filas completas del log desde 'offset' -> (DataFrame, offset final)
+    if not os.path.exists(ruta):
+        return pd.DataFrame(columns=['Fecha', 'Disciplina', 'Partida', 'Cantidad']), 0
+    with open(ruta, 'rb') as f:
+        cabecera = f.readline()
+        f.seek(max(offset, len(cabecera)))
+        cola = f.read()
+    fin = cola.rfind(b'\n') + 1  # Una línea a medio escribir queda para la próxima lectura
+    datos = pd.read_csv(io.BytesIO(cabecera + cola[:fin]), usecols=['Fecha', 'Disciplina', 'Partida', 'Cantidad'])
+    return datos, max(offset, len(cabecera)) + fin
+
+
+def agregar_diario(df):
+    # Filas del log -> producción diaria por partida
+    if df.empty:
+        return _vacio()
+    df = df.assign(Fecha=pd.to_datetime(df['Fecha']).dt.normalize(), Registros=1)
+    return df.groupby(['Fecha', 'Disciplina', 'Partida'], as_index=False)[['Cantidad', 'Registros']].sum()
+
+
+def estado(ruta):
+    # Producción diaria por partida de todo el log = último checkpoint + cola -> (estado, offset leído)
+    offset, base = ultimo_checkpoint(ruta)
+    cola, fin = leer_cola(ruta, offset)
+    if cola.empty:
+        return base, fin
+    diario = pd.concat([base, agregar_diario(cola)], ignore_index=True)
+    return diario.groupby(['Fecha', 'Disciplina', 'Partida'], as_index=False)[['Cantidad', 'Registros']].sum(), fin
+
+
+def escribir_checkpoint(ruta, conservar=2):
+    # Guarda el estado actual como checkpoint nuevo y borra los más viejos
+    diario, offset = estado(ruta)
+    crc = _crc(ruta, offset)
+    archivo = f"{ruta}.ckpt-{offset}-{crc:08x}.csv"
+    st_ = os.stat(ruta)
+    _validados[(os.path.abspath(ruta), offset, crc)] = (st_.st_ino, st_.st_size, st_.st_mtime_ns)
+    escribir_atomico(diario.assign(Fecha=diario['Fecha'].dt.strftime('%Y-%m-%d'))[COLUMNAS_ESTADO], archivo)
+    for _, _, viejo in _checkpoints(ruta)[conservar:]:
+        os.remove(viejo)
+    return archivo
+
+
+def necesita_checkpoint(ruta, bytes_cola=BYTES_CHECKPOINT):
+    tamano = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+    previos = _checkpoints(ruta)
+    return tamano - (previos[0][0] if previos else 0) > bytes_cola
+
+
+# --- IMPORTACIÓN DE UN SNAPSHOT v3 ---
+# avance_pebbles_v3.csv solo guarda el 'Ejecutado' acumulado de cada partida.
+# Se convierte en un saldo inicial: una fila de historial por partida con
+# avance (fechada el día de la importación), las partidas que falten se
+# agregan al catálogo con su meta y unidad, y se escribe un checkpoint.
+
+def importar_v3(file_v3, backend, registrar, fecha=None):
+    # registrar: función que graba filas de historial (p. ej. EscritorAgrupado.registrar)
+    v3 = pd.read_csv(file_v3).fillna({'Imagen URL': '', 'Unidad': ''})
+    v3['Disciplina'] = v3['Disciplina'].replace(DISCIPLINAS_V3)
+
+    previos = backend.leer_historial()
+    if (previos['Nota'] == NOTA_SALDO_V3).any():
+        raise ValueError(f"El historial ya tiene un saldo inicial importado de v3 ({file_v3}).")
+
+    cat = backend.leer_catalogo()
+    claves = set(zip(cat['Disciplina'], cat['Partida']))
+    nuevas = v3[[(d, p) not in claves for d, p in zip(v3['Disciplina'], v3['Partida'])]]
+    if not nuevas.empty:
+        agregadas = pd.DataFrame({
+            'Disciplina': nuevas['Disciplina'], 'Partida': nuevas['Partida'], 'Unidad': nuevas['Unidad'],
+            'Meta': nuevas['Total'], 'Img': nuevas['Imagen URL'],
+        })
+        backend.guardar_catalogo(completar_columnas_wbs(pd.concat([cat, agregadas], ignore_index=True)))
+
+    fecha = fecha or datetime.date.today()
+    saldos = v3[pd.to_numeric(v3['Ejecutado'], errors='coerce').fillna(0) > 0]
+    filas = [
+        {'Fecha': fecha, 'Disciplina': d, 'Partida': p, 'Cantidad': float(q), 'Nota': NOTA_SALDO_V3}
+        for d, p, q in zip(saldos['Disciplina'], saldos['Partida'], saldos['Ejecutado'])
+    ]
+    if filas:
+        registrar(filas)
+    if backend.nombre == 'csv':
+        escribir_checkpoint(backend.file_historial)
+    return len(nuevas), len(filas)
+
+
+if __name__ == '__main__':
+    from pebbles.storage import get_backend
+    from pebbles.escritura import get_escritor
+
+    parser = argparse.ArgumentParser(description="Checkpoint del historial CSV e importación de snapshots v3.")
+    parser.add_argument('--catalogo', default='pebbles_catalogo.csv')
+    parser.add_argument('--historial', default='pebbles_historial.csv')
+    parser.add_argument('--db', default='pebbles_historial.db')
+    parser.add_argument('--backend', default=os.environ.get('PEBBLES_BACKEND', 'sqlite'), choices=['sqlite', 'csv', 'particionado'])
+    parser.add_argument('--diario', default='pebbles_historial.journal')
+    parser.add_argument('--importar-v3', default=None, help="Snapshot v3 (avance_pebbles_v3.csv) a importar como saldo inicial")
+    parser.add_argument('--fecha', default=None, help="Fecha del saldo inicial (AAAA-MM-DD); por defecto hoy")
+    args = parser.parse_args()
+
+    backend = get_backend(args.backend, args.catalogo, args.historial, args.db)
+    backend.init()
+    if args.importar_v3:
+        fecha = datetime.date.fromisoformat(args.fecha) if args.fecha else None
+        try:
+            n_cat, n_hist = importar_v3(args.importar_v3, backend, get_escritor(args.diario, backend).registrar, fecha)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        print(f"Partidas agregadas al catálogo: {n_cat}; filas de saldo inicial: {n_hist}")
+    elif args.backend == 'csv':
+        print(f"Checkpoint escrito: {escribir_checkpoint(args.historial)}")
+    else:
+        print(f"El backend {args.backend} no necesita checkpoint (sqlite: acumulados en la base; particionado: un CSV por mes).")
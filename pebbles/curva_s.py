@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# --- ÍNDICE DE ACUMULADOS POR FECHA (CURVA S) ---
+# Por cada partida se guardan sus días con avance, ordenados, y la suma
+# acumulada hasta cada uno. "¿Cuánto llevaba al día X?" es una búsqueda
+# binaria, sin volver a agregar el historial. Todas las partidas comparten un
+# solo arreglo ordenado por (partida, día): un searchsorted responde todas a la
+# vez, y una grilla de fechas (curva S) es un solo searchsorted más.
+
+MAX_PUNTOS_CURVA = 2000  # ~5 años diarios; el gráfico se reduce después (LTTB)
+PARTIDAS_POR_BLOQUE = 2000  # Acota la matriz (partidas x fechas) que se arma a la vez
+_EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def _dias(fechas):
+    # Fechas -> n° de día (int64)
+    return (pd.to_datetime(pd.Series(fechas)).to_numpy().astype('datetime64[D]') - _EPOCA).astype(np.int64)
+
+
+class IndiceAcumulado:
+
+    def __init__(self, rollup_diario, claves):
+        # rollup_diario: (Fecha, Disciplina, Partida, Cantidad) con un registro por día y partida
+        # claves: (Disciplina, Partida) en el orden en que se devuelven los resultados
+        self.claves = pd.MultiIndex.from_tuples(list(claves), names=['Disciplina', 'Partida'])
+        codigo = self.claves.get_indexer(pd.MultiIndex.from_frame(rollup_diario[['Disciplina', 'Partida']]))
+        validos = codigo >= 0  # Partidas que ya no están en el catálogo no suman
+        codigo = codigo[validos]
+        dia = _dias(rollup_diario['Fecha'])[validos]
+        cantidad = rollup_diario['Cantidad'].to_numpy(dtype=float)[validos]
+
+        orden = np.lexsort((dia, codigo))
+        codigo, dia, cantidad = codigo[orden], dia[orden], cantidad[orden]
+        self._codigo = codigo
+        self._acum = pd.Series(cantidad).groupby(codigo).cumsum().to_numpy()
+
+        # Llave única (partida, día) ordenada: código * tramo + día relativo
+        self._dia0 = int(dia.min()) if len(dia) else 0
+        self._tramo = (int(dia.max()) - self._dia0 + 2) if len(dia) else 2
+        self._llave = codigo * self._tramo + (dia - self._dia0)
+        self.primer_dia = pd.Timestamp(_EPOCA + self._dia0) if len(dia) else None
+        self.ultimo_dia = pd.Timestamp(_EPOCA + int(dia.max())) if len(dia) else None
+
+    def _buscar(self, dias, codigos=None):
+        # dias: arreglo de días -> matriz (partidas x días) con lo acumulado a esa fecha
+        rel = np.clip(np.asarray(dias, dtype=np.int64) - self._dia0, -1, self._tramo - 1)
+        codigos = np.arange(len(self.claves)) if codigos is None else codigos
+        if not len(self._llave):
+            return np.zeros((len(codigos), len(rel)))
+        # Último registro con llave <= (partida, día); si cae en otra partida, aún no había avance
+        pos = np.searchsorted(self._llave, codigos[:, None] * self._tramo + rel[None, :], side='right') - 1
+        pos_ok = np.maximum(pos, 0)
+        propio = (pos >= 0) & (self._codigo[pos_ok] == codigos[:, None])
+        return np.where(propio, self._acum[pos_ok], 0.0)
+
+    def al(self, fecha):
+        # Acumulado de cada partida al cierre de 'fecha'
+        return pd.Series(self._buscar(_dias([fecha]))[:, 0], index=self.claves, name='Cantidad')
+
+    def matriz(self, fechas, codigos=None):
+        # Acumulado de cada partida (o de las posiciones 'codigos') en cada fecha (columnas)
+        indice = self.claves if codigos is None else self.claves[codigos]
+        return pd.DataFrame(self._buscar(_dias(fechas), codigos), index=indice, columns=pd.DatetimeIndex(fechas))
+
+
+def fechas_curva(desde, hasta, max_puntos=MAX_PUNTOS_CURVA):
+    # Grilla diaria; si el rango es largo (varios años) se espacia para no pasar de max_puntos
+    fechas = pd.date_range(desde, hasta, freq='D')
+    if len(fechas) > max_puntos:
+        paso = -(-len(fechas) // max_puntos)
+        fechas = fechas[::paso].append(fechas[-1:]).unique()
+    return fechas
+
+
+def avance_al(indice, df_master, fecha):
+    # % Avance por partida a una fecha (mismo tope de 100% que get_acumulados)
+    metas = df_master.set_index(['Disciplina', 'Partida'])['Meta'].reindex(indice.claves).to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.clip(indice.al(fecha).to_numpy() / metas * 100, None, 100.0)
+    return pd.Series(np.nan_to_num(pct), index=indice.claves, name='% Avance')
+
+
+def curva_s(indice, df_master, fechas):
+    # % acumulado por disciplina (ponderado por Peso, como el avance global) en cada fecha
+    master = df_master.set_index(['Disciplina', 'Partida']).reindex(indice.claves)
+    metas = master['Meta'].to_numpy(dtype=float)
+    pesos = (master['Peso'] if 'Peso' in master.columns else pd.Series(1.0, index=master.index)).fillna(1.0).to_numpy(dtype=float)
+    disc_codigo, disciplinas = pd.factorize(indice.claves.get_level_values('Disciplina'))
+
+    # Suma de peso * % por disciplina, por bloques de partidas (memoria acotada)
+    suma = np.zeros((len(disciplinas), len(fechas)))
+    for ini in range(0, len(indice.claves), PARTIDAS_POR_BLOQUE):
+        bloque = np.arange(ini, min(ini + PARTIDAS_POR_BLOQUE, len(indice.claves)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = np.nan_to_num(np.clip(indice.matriz(fechas, bloque).to_numpy() / metas[bloque, None] * 100, None, 100.0))
+        np.add.at(suma, disc_codigo[bloque], pesos[bloque, None] * pct)
+
+    peso_disc = np.bincount(disc_codigo, weights=pesos, minlength=len(disciplinas))
+    series = []
+    for nombre, valores, peso in zip(list(disciplinas) + ['Global'], list(suma) + [suma.sum(axis=0)], list(peso_disc) + [pesos.sum()]):
+        series.append(pd.DataFrame({'Fecha': fechas, 'Disciplina': nombre, '% Avance': valores / peso if peso > 0 else np.zeros(len(fechas))}))
+    return pd.concat(series, ignore_index=True)
@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import deque
+import pandas as pd
+
+# --- GRAFO DE DEPENDENCIAS (predecesoras) ---
+# Nodos = (Disciplina, Partida). Cada actividad puede tener varias
+# predecesoras, de cualquier disciplina. El orden topológico se calcula una
+# vez al construir el grafo (y detecta ciclos); la regla de secuencia es:
+#   % actividad <= min(% predecesoras) + tolerancia
+
+COLUMNAS_DEPENDENCIAS = ['Disciplina', 'Partida', 'Disciplina Predecesora', 'Predecesora']
+TOLERANCIA_PCT = 2.0
+
+
+class CicloError(ValueError):
+    pass
+
+
+class GrafoDependencias:
+
+    def __init__(self, aristas=()):
+        # aristas: [(nodo, predecesora)], cada una (Disciplina, Partida)
+        self.predecesoras = {}
+        self.sucesoras = {}
+        for nodo, pred in aristas:
+            self.predecesoras.setdefault(nodo, [])
+            self.sucesoras.setdefault(nodo, [])
+            self.predecesoras.setdefault(pred, [])
+            self.sucesoras.setdefault(pred, [])
+            if pred not in self.predecesoras[nodo]:
+                self.predecesoras[nodo].append(pred)
+                self.sucesoras[pred].append(nodo)
+        self.orden = self._ordenar()
+
+    @classmethod
+    def desde_jerarquia(cls, jerarquia, disciplina):
+        # Compatibilidad con JERARQUIA_CIVIL ({'Actividad': 'Predecesora'})
+        return cls([((disciplina, p), (disciplina, pred)) for p, pred in jerarquia.items() if pred])
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        df = df.dropna(subset=COLUMNAS_DEPENDENCIAS)
+        return cls([
+            ((d, p), (dp, pp))
+            for d, p, dp, pp in df[COLUMNAS_DEPENDENCIAS].itertuples(index=False, name=None)
+        ])
+
+    def a_dataframe(self):
+        filas = [(n[0], n[1], p[0], p[1]) for n in self.orden for p in self.predecesoras[n]]
+        return pd.DataFrame(filas, columns=COLUMNAS_DEPENDENCIAS)
+
+    def _ordenar(self):
+        # Kahn: orden topológico
+        pendientes = {n: len(p) for n, p in self.predecesoras.items()}
+        cola = deque(n for n, k in pendientes.items() if k == 0)
+        orden = []
+        while cola:
+            n = cola.popleft()
+            orden.append(n)
+            for s in self.sucesoras[n]:
+                pendientes[s] -= 1
+                if pendientes[s] == 0:
+                    cola.append(s)
+        if len(orden) < len(self.predecesoras):
+            ciclo = sorted(n for n, k in pendientes.items() if k > 0)
+            raise CicloError("Dependencias circulares entre: " + ", ".join(p for _, p in ciclo))
+        return orden
+
+    def limite_pct(self, nodo, avances):
+        # % máximo permitido por las predecesoras (None = sin restricción)
+        preds = self.predecesoras.get(nodo)
+        if not preds:
+            return None
+        return min(avances.get(p, 0.0) for p in preds)
+
+    def cumple(self, nodo, avances, tolerancia=TOLERANCIA_PCT):
+        limite = self.limite_pct(nodo, avances)
+        return limite is None or avances.get(nodo, 0.0) <= limite + tolerancia
+
+    def ruta_critica(self, duraciones):
+        # CPM: pasada hacia adelante/atrás; críticas = holgura 0. Devuelve (cadena, duración)
+        dur = {n: float(duraciones.get(n, 1.0)) for n in self.orden}
+        inicio_temprano, fin_temprano = {}, {}
+        for n in self.orden:
+            inicio_temprano[n] = max((fin_temprano[p] for p in self.predecesoras[n]), default=0.0)
+            fin_temprano[n] = inicio_temprano[n] + dur[n]
+        total = max(fin_temprano.values(), default=0.0)
+        fin_tardio = {}
+        for n in reversed(self.orden):
+            fin_tardio[n] = min((fin_tardio[s] - dur[s] for s in self.sucesoras[n]), default=total)
+        criticas = [n for n in self.orden if abs(fin_tardio[n] - fin_temprano[n]) < 1e-9]
+        # Una cadena concreta: desde el final hacia atrás por predecesoras críticas
+        cadena = []
+        actual = next((n for n in reversed(criticas) if abs(fin_temprano[n] - total) < 1e-9), None)
+        while actual is not None:
+            cadena.append(actual)
+            actual = next(
+                (p for p in self.predecesoras[actual]
+                 if p in criticas and abs(fin_temprano[p] - inicio_temprano[actual]) < 1e-9),
+                None,
+            )
+        return list(reversed(cadena)), total
+
+
+class ValidadorSecuencia:
+    # Guarda el último % conocido y las actividades fuera de secuencia. Al
+    # cambiar el avance de una actividad solo se re-evalúan ella y sus
+    # sucesoras directas (las únicas cuya regla la involucra).
+
+    def __init__(self, grafo, tolerancia=TOLERANCIA_PCT):
+        self.grafo = grafo
+        self.tolerancia = tolerancia
+        self.avances = {}
+        self.fuera_de_secuencia = set()
+        self.evaluaciones = 0
+        self._lock = threading.Lock()  # Compartido entre sesiones
+
+    def actualizar(self, nodo, pct):
+        self.avances[nodo] = pct
+        for n in [nodo] + self.grafo.sucesoras.get(nodo, []):
+            self.evaluaciones += 1
+            if self.grafo.cumple(n, self.avances, self.tolerancia):
+                self.fuera_de_secuencia.discard(n)
+            else:
+                self.fuera_de_secuencia.add(n)
+
+    def sincronizar(self, avances):
+        # Aplica solo las diferencias con el último estado conocido
+        with self._lock:
+            for nodo, pct in avances.items():
+                if self.avances.get(nodo) != pct:
+                    self.actualizar(nodo, pct)
+            return [n for n in self.grafo.orden if n in self.fuera_de_secuencia]
+
+
+def leer_dependencias(ruta, jerarquia_inicial=None, disciplina_inicial='Civil'):
+    # Crea el archivo a partir de la jerarquía civil la primera vez
+    if not os.path.exists(ruta):
+        grafo = GrafoDependencias.desde_jerarquia(jerarquia_inicial or {}, disciplina_inicial)
+        grafo.a_dataframe().to_csv(ruta, index=False)
+    return pd.read_csv(ruta)
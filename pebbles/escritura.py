@@ -0,0 +1,173 @@
+import os
+import json
+import threading
+import pandas as pd
+from pebbles.cache import version_archivos
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- ESCRITURA CONCURRENTE (bloqueo + diario + group commit) ---
+# Todas las escrituras de un archivo pasan por un único hilo por proceso:
+#   1. los reportes que llegan mientras se graba el lote anterior se juntan
+#   2. se toma el bloqueo de archivo (excluye a otros procesos)
+#   3. el lote se escribe en el diario (write-ahead) con fsync
+#   4. se aplica al destino en una sola escritura y se borra el diario
+#   5. se despierta a todas las sesiones que esperaban ese lote
+# Si el proceso muere entre 3 y 4, el próximo que tome el bloqueo repite el lote.
+
+
+class BloqueoArchivo:
+    # Bloqueo exclusivo entre procesos sobre '<ruta>.lock'
+
+    def __init__(self, ruta):
+        self.ruta = ruta + '.lock'
+        self._archivo = None
+
+    def __enter__(self):
+        self._archivo = open(self.ruta, 'a+')
+        if fcntl:
+            fcntl.flock(self._archivo.fileno(), fcntl.LOCK_EX)
+        else:
+            self._archivo.seek(0)
+            msvcrt.locking(self._archivo.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+        else:
+            self._archivo.seek(0)
+            msvcrt.locking(self._archivo.fileno(), msvcrt.LK_UNLCK, 1)
+        self._archivo.close()
+
+
+def escribir_atomico(df, ruta):
+    # Reemplazo atómico: los lectores ven el archivo viejo o el nuevo, nunca uno a medias
+    tmp = f"{ruta}.tmp{os.getpid()}"
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        df.to_csv(f, index=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ruta)
+
+
+class EscritorAgrupado:
+    # destino: objeto con marca_escritura(), preparar_reintento(marca) -> bool y aplicar(items)
+
+    def __init__(self, ruta_diario, destino):
+        self.ruta_diario = ruta_diario
+        self.destino = destino
+        self._pendientes = []            # [(items, evento, resultado)]
+        self._cond = threading.Condition()
+        self.lotes = 0
+        self.items = 0
+        with BloqueoArchivo(self.ruta_diario):
+            self._recuperar()
+        threading.Thread(target=self._bucle, name=f"escritor:{ruta_diario}", daemon=True).start()
+
+    def registrar(self, items, timeout=30):
+        # Bloquea hasta que el lote que contiene estos items sea durable
+        espera = (list(items), threading.Event(), {})
+        with self._cond:
+            self._pendientes.append(espera)
+            self._cond.notify()
+        if not espera[1].wait(timeout):
+            raise TimeoutError("La escritura no se confirmó a tiempo")
+        if 'error' in espera[2]:
+            raise espera[2]['error']
+        return len(espera[0])
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                while not self._pendientes:
+                    self._cond.wait()
+                lote, self._pendientes = self._pendientes, []
+            items = [it for espera in lote for it in espera[0]]
+            try:
+                self._grabar(items)
+            except Exception as e:  # Se informa a cada sesión en lugar de matar el hilo
+                for espera in lote:
+                    espera[2]['error'] = e
+            for espera in lote:
+                espera[1].set()
+
+    def _grabar(self, items):
+        with BloqueoArchivo(self.ruta_diario):
+            self._recuperar()  # Por si otro proceso murió a mitad de un lote
+            entrada = {'marca': self.destino.marca_escritura(), 'items': items}
+            with open(self.ruta_diario, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.destino.aplicar(items)
+            os.remove(self.ruta_diario)
+        self.lotes += 1
+        self.items += len(items)
+
+    def _recuperar(self):
+        if not os.path.exists(self.ruta_diario):
+            return
+        with open(self.ruta_diario, encoding='utf-8') as f:
+            contenido = f.read().strip()
+        if contenido:
+            try:
+                entrada = json.loads(contenido)
+            except ValueError:
+                entrada = None  # Diario a medio escribir: el lote nunca llegó a aplicarse
+            marca = entrada and entrada['marca']
+            if entrada and self.destino.preparar_reintento(tuple(marca) if isinstance(marca, list) else marca):
+                self.destino.aplicar(entrada['items'])
+        os.remove(self.ruta_diario)
+
+
+class DestinoSnapshot:
+    # CSV tipo "foto" (v3): cada item suma 'Cantidad' a la columna acumulada de su fila
+
+    def __init__(self, ruta, claves, columna):
+        self.ruta = ruta
+        self.claves = claves
+        self.columna = columna
+
+    def marca_escritura(self):
+        return version_archivos(self.ruta)[0]
+
+    def preparar_reintento(self, marca):
+        # El reemplazo es atómico: si el archivo no cambió, el lote no se aplicó
+        actual = version_archivos(self.ruta)[0]
+        return list(actual or []) == list(marca or [])
+
+    def aplicar(self, items):
+        # Mismo bloqueo que actualizar_columnas: ambos leen, modifican y reescriben el CSV
+        with BloqueoArchivo(self.ruta):
+            df = pd.read_csv(self.ruta).fillna('')
+            deltas = pd.DataFrame(items).groupby(self.claves)['Cantidad'].sum()
+            df = df.set_index(self.claves)
+            df[self.columna] = df[self.columna].add(deltas.reindex(df.index).fillna(0.0))
+            escribir_atomico(df.reset_index(), self.ruta)
+
+    def actualizar_columnas(self, df_editado, columnas):
+        # Guarda solo las columnas editadas (p. ej. metas) sin pisar lo acumulado por otros
+        with BloqueoArchivo(self.ruta):
+            df = pd.read_csv(self.ruta).fillna('').set_index(self.claves)
+            cambios = df_editado.set_index(self.claves)[columnas]
+            for col in columnas:
+                df.loc[cambios.index, col] = cambios[col]
+            escribir_atomico(df.reset_index(), self.ruta)
+
+
+_escritores = {}
+_escritores_lock = threading.Lock()
+
+
+def get_escritor(ruta_diario, destino):
+    # Un escritor (un hilo) por archivo de diario y proceso
+    with _escritores_lock:
+        clave = os.path.abspath(ruta_diario)
+        if clave not in _escritores:
+            _escritores[clave] = EscritorAgrupado(ruta_diario, destino)
+        return _escritores[clave]
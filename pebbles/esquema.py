@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# --- ESQUEMA COMPACTO DEL HISTORIAL EN MEMORIA ---
+# El historial leído con tipos por defecto ocupa varias veces más que sus datos:
+# un objeto str por celda en Disciplina/Partida/Nota, float64 y un objeto date
+# por fila. En la cache se guarda así:
+# - Disciplina y Partida: category (un código por fila + tabla de etiquetas)
+# - Dia: int32 (n° de día desde 1970-01-01), Cantidad: float32
+# - Nota fuera de línea: solo las filas que tienen nota, por posición
+# Para mostrar pocas filas se arma la vista original con a_dataframe().
+
+_EPOCA = pd.Timestamp('1970-01-01')
+
+
+class HistorialCompacto:
+
+    def __init__(self, datos, notas):
+        self.datos = datos  # Dia, Disciplina, Partida, Cantidad
+        self.notas = notas  # posición de fila -> nota (solo las no vacías)
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        fechas = pd.to_datetime(df['Fecha'])
+        datos = pd.DataFrame({
+            'Dia': (fechas - _EPOCA).dt.days.astype('int32'),
+            'Disciplina': df['Disciplina'].astype('category'),
+            'Partida': df['Partida'].astype('category'),
+            'Cantidad': pd.to_numeric(df['Cantidad']).astype('float32'),
+        })
+        nota = df['Nota'].fillna('').astype(str).to_numpy()
+        con_nota = nota != ''
+        notas = pd.Series(nota[con_nota], index=np.flatnonzero(con_nota).astype('int32'), dtype=object)
+        return cls(datos, notas)
+
+    def __len__(self):
+        return len(self.datos)
+
+    @property
+    def empty(self):
+        return self.datos.empty
+
+    def fechas(self):
+        return _EPOCA + pd.to_timedelta(self.datos['Dia'], unit='D')
+
+    def a_dataframe(self):
+        # Columnas y tipos originales (Fecha como date, Nota en línea); pensado para pocas filas
+        return pd.DataFrame({
+            'Fecha': self.fechas().dt.date,
+            'Disciplina': self.datos['Disciplina'].astype(str),
+            'Partida': self.datos['Partida'].astype(str),
+            'Cantidad': self.datos['Cantidad'].astype(float).round(4),  # Sin el ruido de float32
+            'Nota': self.notas.reindex(range(len(self.datos)), fill_value=''),
+        }).reset_index(drop=True)
+
+    def memoria(self):
+        # Bytes ocupados (datos + notas)
+        return int(self.datos.memory_usage(deep=True).sum() + self.notas.memory_usage(deep=True))
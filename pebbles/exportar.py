@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import threading
+
+from pebbles.cache import recortar_directorio
+from pebbles.reportes import iterar_pivot
+
+# --- EXPORTACIONES (historial o Partidas x Fechas, CSV / Parquet / XLSX) ---
+# El archivo se arma recién cuando alguien lo descarga y se escribe por
+# bloques (el historial y el pivot nunca están enteros en memoria). Queda en
+# <directorio>/<hash>.<ext>, con el hash de (tipo, formato, filtros, versión de
+# los datos): repetir la misma descarga sin cambios en los datos reutiliza el
+# archivo; cualquier avance nuevo cambia la versión y genera uno nuevo. Los
+# archivos forman una cache en disco acotada en bytes (se borran los de uso
+# más antiguo, por mtime).
+
+TIPOS = ('historial', 'pivot')
+FORMATOS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+MAX_BYTES_EXPORTACIONES = 256 * 2**20
+FILAS_HOJA_XLSX = 1_048_575  # Límite de Excel por hoja (sin contar el encabezado)
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _lock(ruta):
+    # Dos sesiones pidiendo el mismo archivo: la segunda espera y lo reutiliza
+    with _locks_lock:
+        return _locks.setdefault(ruta, threading.Lock())
+
+
+def nombre_archivo(tipo, formato, filtros, version):
+    clave = json.dumps([tipo, formato, sorted((k, str(v)) for k, v in filtros.items() if v is not None), repr(version)])
+    return hashlib.sha256(clave.encode('utf-8')).hexdigest()[:20] + FORMATOS[formato][0]
+
+
+def bloques(backend, tipo, disciplina=None, partida=None, desde=None, hasta=None):
+    # DataFrames del reporte pedido, en bloques, con los filtros aplicados
+    if tipo == 'historial':
+        for df in backend.iterar_historial(disciplina, partida, desde, hasta):
+            yield df.assign(Nota=df['Nota'].fillna('').astype(str))  # Tipo estable entre bloques (Parquet)
+    elif tipo == 'pivot':
+        for pivot in iterar_pivot(backend, disciplina=disciplina, partida=partida, desde=desde, hasta=hasta):
+            yield pivot.reset_index()
+    else:
+        raise ValueError(f"Tipo de exportación desconocido: '{tipo}' (historial o pivot)")
+
+
+def exportar(backend, directorio, tipo, formato, disciplina=None, partida=None, desde=None, hasta=None):
+    # Ruta del archivo exportado (se genera solo si no está en la cache)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: '{formato}' ({', '.join(FORMATOS)})")
+    filtros = {'disciplina': disciplina, 'partida': partida, 'desde': desde, 'hasta': hasta}
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, nombre_archivo(tipo, formato, filtros, backend.version()))
+    with _lock(ruta):
+        if os.path.exists(ruta):
+            os.utime(ruta)  # Uso reciente: el último en salir de la cache
+            return ruta
+        tmp = f"{ruta}.tmp{os.getpid()}"
+        try:
+            ESCRITORES[formato](bloques(backend, tipo, **filtros), tmp)
+            os.replace(tmp, ruta)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    recortar_directorio(directorio, MAX_BYTES_EXPORTACIONES)
+    return ruta
+
+
+def _escribir_csv(bloques, ruta):
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        vacio = True
+        for df in bloques:
+            df.to_csv(f, header=vacio, index=False)
+            vacio = False
+        if vacio:
+            f.write('\n')
+
+
+def _escribir_parquet(bloques, ruta):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("La exportación a Parquet necesita pyarrow (pip install pyarrow)")
+    escritor = None
+    try:
+        for df in bloques:
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            if escritor is None:  # El esquema lo fija el primer bloque
+                escritor = pq.ParquetWriter(ruta, tabla.schema)
+            escritor.write_table(tabla.cast(escritor.schema))
+        if escritor is None:
+            pq.write_table(pa.table({}), ruta)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def _escribir_xlsx(bloques, ruta):
+    from openpyxl import Workbook
+    libro = Workbook(write_only=True)  # Modo streaming: las filas no quedan en memoria
+    hoja, filas, columnas = None, 0, None
+    for df in bloques:
+        if columnas is None:
+            columnas = [str(c) for c in df.columns]
+        for fila in df.itertuples(index=False, name=None):
+            if hoja is None or filas >= FILAS_HOJA_XLSX:
+                hoja = libro.create_sheet(f'Datos {len(libro.worksheets) + 1}')
+                hoja.append(columnas)
+                filas = 0
+            hoja.append(fila)
+            filas += 1
+    if hoja is None:
+        libro.create_sheet('Datos 1')
+    libro.save(ruta)
+
+
+ESCRITORES = {'csv': _escribir_csv, 'parquet': _escribir_parquet, 'xlsx': _escribir_xlsx}
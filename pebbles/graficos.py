@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# --- FIGURAS DEL TABLERO (sin Streamlit) ---
+# El navegador se traba con decenas de miles de puntos. Antes de armar una
+# figura los datos se reducen a un presupuesto de puntos por serie:
+# - Barras (sumas por periodo): se engruesa la frecuencia (Diario -> Semanal
+#   -> Mensual) según el rango elegido; así las barras siguen sumando bien.
+# - Líneas (Curva S): LTTB, que conserva la forma de la curva.
+# Por encima de UMBRAL_WEBGL puntos en total las líneas se dibujan con WebGL y
+# las barras (siempre barras) sin la etiqueta de valor de cada una.
+
+PRESUPUESTO_PUNTOS = 400   # Por serie
+UMBRAL_WEBGL = 1000        # Puntos en toda la figura
+FRECUENCIAS_GRUESAS = [('D', 1), ('W-MON', 7), ('M', 30.44)]  # (frecuencia, días por periodo)
+TITULOS_FRECUENCIA = {
+    'D': "Producción Diaria",
+    'W-MON': "Producción Semanal (Cierre Lunes)",
+    'M': "Producción Mensual",
+}
+
+
+def frecuencia_para(freq, desde, hasta, presupuesto=PRESUPUESTO_PUNTOS):
+    # La frecuencia pedida o la primera más gruesa que entra en el presupuesto para ese rango
+    dias = (pd.Timestamp(hasta) - pd.Timestamp(desde)).days + 1
+    posibles = [f for f, _ in FRECUENCIAS_GRUESAS]
+    for f, largo in FRECUENCIAS_GRUESAS[posibles.index(freq):]:
+        if dias / largo <= presupuesto:
+            return f
+    return FRECUENCIAS_GRUESAS[-1][0]
+
+
+def lttb(x, y, n_puntos):
+    # Largest-Triangle-Three-Buckets: índices de n_puntos que conservan la forma de (x, y)
+    total = len(x)
+    if n_puntos >= total or n_puntos < 3:
+        return np.arange(total)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    bordes = np.linspace(1, total - 1, n_puntos - 1).astype(int)  # n_puntos-2 baldes interiores
+    elegidos = [0]
+    for i in range(n_puntos - 2):
+        ini, fin = bordes[i], bordes[i + 1]
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else total
+        ax, ay = x[elegidos[-1]], y[elegidos[-1]]
+        cx, cy = x[fin:sig_fin].mean(), y[fin:sig_fin].mean()  # Promedio del balde siguiente
+        area = np.abs((ax - cx) * (y[ini:fin] - ay) - (ax - x[ini:fin]) * (cy - ay))
+        elegidos.append(ini + int(area.argmax()))
+    elegidos.append(total - 1)
+    return np.array(elegidos)
+
+
+def reducir_series(df, x, y, serie, presupuesto=PRESUPUESTO_PUNTOS):
+    # LTTB por serie (columna 'serie'); las series cortas quedan intactas
+    partes = []
+    for _, grupo in df.groupby(serie, sort=False):
+        grupo = grupo.sort_values(x)
+        eje_x = grupo[x].to_numpy()
+        if np.issubdtype(eje_x.dtype, np.datetime64):
+            eje_x = eje_x.astype('datetime64[ns]').astype(np.int64)
+        partes.append(grupo.iloc[lttb(eje_x, grupo[y].to_numpy(), presupuesto)])
+    return pd.concat(partes, ignore_index=True) if partes else df
+
+
+def figura_esfuerzo(grouper, title_chart):
+    # Barras de esfuerzo por periodo y disciplina, en % ponderado del proyecto (sin mezclar unidades)
+    return px.bar(
+        grouper, 
+        x='Fecha', 
+        y='Esfuerzo', 
+        color='Disciplina', 
+        title=title_chart,
+        labels={'Esfuerzo': '% del proyecto'},
+        text_auto='.2f' if len(grouper) <= UMBRAL_WEBGL else False,  # Miles de etiquetas traban el SVG
+        barmode='group'
+    )
+
+
+def figura_curva_s(curva, fecha_corte, presupuesto=PRESUPUESTO_PUNTOS):
+    # % acumulado por disciplina (Curva S) con la fecha de corte marcada
+    curva = reducir_series(curva, 'Fecha', '% Avance', 'Disciplina', presupuesto)
+    fig = px.line(
+        curva,
+        x='Fecha',
+        y='% Avance',
+        color='Disciplina',
+        range_y=[0, 100],
+        title="Curva S: Avance Acumulado Ponderado",
+        render_mode='webgl' if len(curva) > UMBRAL_WEBGL else 'auto'
+    )
+    fig.add_vline(x=pd.Timestamp(fecha_corte).timestamp() * 1000, line_dash='dash', line_color='gray')
+    return fig
+
+
+def figura_flujo_civil(df_civ_ordenado):
+    # % Avance de cada actividad en orden de secuencia (escalera descendente = consistente)
+    fig = px.bar(
+        df_civ_ordenado, 
+        x='Partida', 
+        y='% Avance',
+        color='% Avance',
+        color_continuous_scale='RdYlGn',
+        range_y=[0, 100],
+        text_auto='.1f',
+        title="Secuencia Constructiva (Validación de Predecesoras)"
+    )
+    # Agregamos flechas o líneas para denotar dependencia visualmente
+    fig.update_traces(marker_line_color='black', marker_line_width=1.5)
+    return fig
@@ -0,0 +1,133 @@
+import io
+import os
+import re
+import hashlib
+import threading
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from pebbles.cache import CacheCompartida, recortar_directorio
+
+# --- FOTOS DE REFERENCIA (almacén local + miniaturas) ---
+# Las fotos subidas en "Configuración Metas" se guardan en disco con su hash
+# de contenido como nombre (subir dos veces la misma foto no duplica nada) y
+# el catálogo guarda solo la referencia 'img:<hash>' en la columna Img:
+#   <directorio>/originales/<hash>.<ext>
+#   <directorio>/miniaturas/<hash>_<ancho>.jpg
+# La miniatura se genera una sola vez; las miniaturas forman una cache en
+# disco acotada en bytes (se borran las de uso más antiguo, por mtime) y las
+# más usadas quedan además en memoria. Las URL http(s) del catálogo se siguen
+# mostrando tal cual.
+
+PREFIJO_REFERENCIA = 'img:'
+ANCHO_MINIATURA = 200                 # px, el ancho con que se muestra en "Reportar Avance Diario"
+MAX_BYTES_MINIATURAS = 64 * 2**20     # Tope de la cache de miniaturas en disco
+MAX_BYTES_ORIGINAL = 20 * 2**20       # Tope por foto subida
+LARGO_HASH = 16                       # Caracteres hex del sha256 en la referencia
+_CLAVE_VALIDA = re.compile(f'[0-9a-f]{{{LARGO_HASH}}}')
+EXTENSIONES = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif', 'BMP': '.bmp'}
+_EXTENSIONES_ORIGINAL = list(EXTENSIONES.values()) + ['.img']  # '.img': formato fuera de EXTENSIONES
+
+
+def es_referencia(valor):
+    return isinstance(valor, str) and valor.startswith(PREFIJO_REFERENCIA)
+
+
+class AlmacenImagenes:
+
+    def __init__(self, directorio, max_bytes_miniaturas=MAX_BYTES_MINIATURAS):
+        self.dir_originales = os.path.join(directorio, 'originales')
+        self.dir_miniaturas = os.path.join(directorio, 'miniaturas')
+        self.max_bytes_miniaturas = max_bytes_miniaturas
+        self.memoria = CacheCompartida(max_entradas=128)  # (referencia, ancho) -> bytes JPEG
+        self._lock = threading.Lock()
+        os.makedirs(self.dir_originales, exist_ok=True)
+        os.makedirs(self.dir_miniaturas, exist_ok=True)
+
+    def guardar(self, datos):
+        # Bytes de una imagen -> referencia 'img:<hash>' para la columna Img
+        if len(datos) > MAX_BYTES_ORIGINAL:
+            raise ValueError(f"La foto supera el máximo de {MAX_BYTES_ORIGINAL // 2**20} MB")
+        try:
+            with Image.open(io.BytesIO(datos)) as img:
+                formato = img.format
+                img.verify()
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+            raise ValueError("El archivo no es una imagen válida")
+        clave = hashlib.sha256(datos).hexdigest()[:LARGO_HASH]
+        if self._original(clave) is None:
+            _escribir_bytes(datos, os.path.join(self.dir_originales, clave + EXTENSIONES.get(formato, '.img')))
+        return PREFIJO_REFERENCIA + clave
+
+    def _original(self, clave):
+        for extension in _EXTENSIONES_ORIGINAL:
+            ruta = os.path.join(self.dir_originales, clave + extension)
+            if os.path.exists(ruta):
+                return ruta
+        return None
+
+    def miniatura(self, referencia, ancho=ANCHO_MINIATURA):
+        # Bytes JPEG de la miniatura (memoria -> disco -> se genera desde el original); None si no existe
+        clave = referencia[len(PREFIJO_REFERENCIA):]
+        if not _CLAVE_VALIDA.fullmatch(clave):
+            return None  # La columna Img es editable: nada que no sea un hash llega a una ruta
+        try:
+            return self.memoria.obtener((clave, ancho), clave, lambda: self._miniatura_disco(clave, ancho))
+        except FileNotFoundError:
+            return None  # Sin original: no se guarda en memoria, por si se vuelve a subir
+
+    def _miniatura_disco(self, clave, ancho):
+        ruta = os.path.join(self.dir_miniaturas, f'{clave}_{ancho}.jpg')
+        try:
+            with open(ruta, 'rb') as f:
+                datos = f.read()
+            os.utime(ruta)  # Uso reciente: la última en salir de la cache
+            return datos
+        except FileNotFoundError:
+            pass
+        original = self._original(clave)
+        if original is None:
+            raise FileNotFoundError(clave)
+        with Image.open(original) as img:
+            img = ImageOps.exif_transpose(img)  # Fotos de celular: respetar la orientación
+            img.thumbnail((ancho, ancho * 4))
+            if img.mode != 'RGB':
+                fondo = Image.new('RGB', img.size, 'white')
+                fondo.paste(img, mask=img.convert('RGBA').getchannel('A'))
+                img = fondo
+            salida = io.BytesIO()
+            img.save(salida, 'JPEG', quality=80, optimize=True)
+        datos = salida.getvalue()
+        _escribir_bytes(datos, ruta)
+        self._recortar()
+        return datos
+
+    def _recortar(self):
+        with self._lock:
+            recortar_directorio(self.dir_miniaturas, self.max_bytes_miniaturas)
+
+    def uso(self):
+        # Bytes en disco: (originales, miniaturas)
+        return tuple(
+            sum(e.stat().st_size for e in os.scandir(d) if e.is_file())
+            for d in (self.dir_originales, self.dir_miniaturas)
+        )
+
+
+_almacenes = {}
+_almacenes_lock = threading.Lock()
+
+
+def get_almacen(directorio):
+    # Un almacén por directorio y proceso: su cache en memoria se comparte entre sesiones
+    with _almacenes_lock:
+        clave = os.path.abspath(directorio)
+        if clave not in _almacenes:
+            _almacenes[clave] = AlmacenImagenes(directorio)
+        return _almacenes[clave]
+
+
+def _escribir_bytes(datos, ruta):
+    tmp = f"{ruta}.tmp{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(datos)
+    os.replace(tmp, ruta)
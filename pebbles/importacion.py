@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from pebbles.dependencias import TOLERANCIA_PCT
+
+# --- IMPORTACIÓN MASIVA DE REPORTES ---
+# Valida un lote completo (miles de filas) con operaciones vectorizadas.
+# Las filas se aplican en orden de Fecha (y de archivo dentro de la misma
+# fecha), así el % de las predecesoras "evoluciona" igual que si cada fila se
+# hubiese registrado a mano en el formulario, con la misma regla:
+#   pct_nuevo > min(pct_predecesoras) + tolerancia  ->  fila rechazada
+
+COLUMNAS_REQUERIDAS = ['Fecha', 'Disciplina', 'Partida', 'Cantidad']
+
+
+def leer_archivo(archivo, nombre):
+    # Acepta CSV o Excel .xlsx (openpyxl); el .xls antiguo necesitaría xlrd
+    if nombre.lower().endswith('.xls'):
+        raise ValueError("Formato .xls no soportado: guarde el archivo como .xlsx o .csv")
+    if nombre.lower().endswith('.xlsx'):
+        return pd.read_excel(archivo, engine='openpyxl')
+    return pd.read_csv(archivo)
+
+
+def validar_lote(df_lote, df_master, grafo, tolerancia=TOLERANCIA_PCT):
+    # Devuelve (aceptadas, rechazadas); 'rechazadas' trae la fila original y el 'Motivo'
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in df_lote.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+
+    lote = df_lote.copy()
+    if 'Nota' not in lote.columns:
+        lote['Nota'] = ''
+    lote['Fila'] = np.arange(len(lote)) + 2  # Número de fila en el archivo (encabezado = 1)
+    lote['Disciplina'] = lote['Disciplina'].astype(str)
+    lote['Partida'] = lote['Partida'].astype(str)
+    lote['Nota'] = lote['Nota'].fillna('').astype(str)
+    lote['Motivo'] = ''
+
+    # 1. Chequeos por fila (vectorizados)
+    fechas = pd.to_datetime(lote['Fecha'], errors='coerce')
+    cantidades = pd.to_numeric(lote['Cantidad'], errors='coerce')
+    claves_catalogo = pd.MultiIndex.from_frame(df_master[['Disciplina', 'Partida']])
+    en_catalogo = pd.MultiIndex.from_frame(lote[['Disciplina', 'Partida']]).isin(claves_catalogo)
+
+    lote.loc[fechas.isna(), 'Motivo'] = 'Fecha inválida'
+    lote.loc[(lote['Motivo'] == '') & ~(cantidades > 0), 'Motivo'] = 'La cantidad debe ser mayor a 0'
+    lote.loc[(lote['Motivo'] == '') & ~en_catalogo, 'Motivo'] = 'Partida no existe en el catálogo'
+
+    lote['Fecha'] = fechas.dt.normalize()
+    lote['Cantidad'] = cantidades
+
+    # 2. Orden de aplicación: por fecha; dentro del día, las predecesoras antes que
+    #    sus sucesoras (orden topológico) y luego por orden de archivo
+    rango = {nodo: i for i, nodo in enumerate(grafo.orden)}
+    lote['Rango'] = [rango.get(nodo, -1) for nodo in zip(lote['Disciplina'], lote['Partida'])]
+    lote = lote.sort_values(['Fecha', 'Rango', 'Fila'], kind='stable').reset_index(drop=True)
+    orden = np.arange(len(lote))
+    cantidad = lote['Cantidad'].to_numpy()
+    aceptada = (lote['Motivo'] == '').to_numpy(copy=True)
+
+    claves_master = list(zip(df_master['Disciplina'], df_master['Partida']))
+    meta_de = dict(zip(claves_master, df_master['Meta']))
+    ejecutado_de = dict(zip(claves_master, df_master['Ejecutado']))
+    filas_de = lote.groupby(['Disciplina', 'Partida']).indices  # nodo -> posiciones (ya en orden)
+
+    def pct_inicial(nodo):
+        return min(ejecutado_de[nodo] / meta_de[nodo] * 100, 100.0)
+
+    # 3. Regla de predecesoras en orden topológico: cuando se valida una
+    #    actividad, las filas aceptadas de todas sus predecesoras ya están resueltas.
+    #    Solo se recorren las actividades con filas en el lote; el resto queda en su % inicial.
+    serie_pct = {}  # nodo -> (orden de sus filas aceptadas, % acumulado tras cada una)
+    for nodo in grafo.orden:
+        if nodo not in filas_de or nodo not in meta_de:
+            continue
+        meta = meta_de[nodo]
+        ejecutado = ejecutado_de[nodo]
+        filas = filas_de[nodo]
+        idx = filas[aceptada[filas]]
+
+        preds = [p for p in grafo.predecesoras[nodo] if p in meta_de]
+        if preds and len(idx):
+            # % de cada predecesora "a la fecha" de cada fila: búsqueda binaria en su serie
+            pct_pred = np.full(len(idx), np.inf)
+            for p in preds:
+                if p not in serie_pct or not len(serie_pct[p][0]):  # Sin filas aceptadas en el lote
+                    pct_pred = np.minimum(pct_pred, pct_inicial(p))
+                    continue
+                orden_p, pct_p = serie_pct[p]
+                pos = np.searchsorted(orden_p, orden[idx], side='right') - 1
+                pct_pred = np.minimum(pct_pred, np.where(pos >= 0, pct_p[np.maximum(pos, 0)], pct_inicial(p)))
+
+            # Rechazo voraz: se descarta la primera fila que rompe la regla y se recalcula
+            qty = cantidad[idx]
+            vigente = np.ones(len(idx), dtype=bool)
+            while True:
+                pct_nuevo = (ejecutado + np.cumsum(qty * vigente)) / meta * 100
+                viola = vigente & (pct_nuevo > pct_pred + tolerancia)
+                if not viola.any():
+                    break
+                vigente[np.argmax(viola)] = False
+
+            rechazadas_nodo = idx[~vigente]
+            aceptada[rechazadas_nodo] = False
+            nombres = ', '.join(p[1] for p in preds)
+            lote.loc[rechazadas_nodo, 'Motivo'] = f"Secuencia: supera a '{nombres}' en más de {tolerancia:g}%"
+            idx = idx[vigente]
+
+        pct_acum = np.minimum((ejecutado + np.cumsum(cantidad[idx])) / meta * 100, 100.0)
+        serie_pct[nodo] = (orden[idx], pct_acum)
+
+    columnas = ['Fecha', 'Disciplina', 'Partida', 'Cantidad', 'Nota']
+    aceptadas = lote.loc[aceptada, columnas].copy()
+    aceptadas['Fecha'] = aceptadas['Fecha'].dt.date
+    rechazadas = lote.loc[~aceptada, ['Fila'] + columnas + ['Motivo']].sort_values('Fila')
+    return aceptadas, rechazadas
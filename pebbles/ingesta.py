@@ -0,0 +1,218 @@
+import os
+import json
+import queue
+import argparse
+import datetime
+import threading
+import urllib.request
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+
+from pebbles.cache import version_archivos
+from pebbles.kpis import get_acumulados
+from pebbles.dependencias import GrafoDependencias, leer_dependencias
+from pebbles.importacion import validar_lote
+
+# --- INGESTA HTTP PARA TABLETS DE CAMPO ---
+# Servicio local junto a la app de Streamlit, con el mismo almacenamiento y la
+# misma regla de predecesoras que "Reportar Avance Diario":
+#   POST /reportes  {"reportes": [{"Fecha", "Disciplina", "Partida", "Cantidad", "Nota"}, ...]}
+#   GET  /salud     estado de la cola y contadores
+# Cada envío entra a una cola acotada (llena -> 503 + Retry-After). Un único
+# hilo validador junta todos los envíos en cola, los valida como un solo lote
+# (validar_lote, en orden de llegada) y graba las filas aceptadas con el
+# EscritorAgrupado (un commit por lote). La respuesta llega cuando el lote es
+# durable e indica, por envío, qué filas se rechazaron y por qué.
+
+CAPACIDAD_COLA = 256          # Envíos en espera antes de responder 503
+MAX_REPORTES_POR_ENVIO = 5000
+MAX_REPORTES_POR_LOTE = 20_000
+TIMEOUT_RESPUESTA = 30        # s
+
+
+class ServicioIngesta:
+
+    def __init__(self, backend, escritor, ruta_dependencias, capacidad=CAPACIDAD_COLA):
+        self.backend = backend
+        self.escritor = escritor
+        self.ruta_dependencias = ruta_dependencias
+        self.cola = queue.Queue(maxsize=capacidad)
+        self._master = (None, None)   # (versión de los datos, df_master)
+        self._grafo = (None, None)
+        self.envios = 0
+        self.aceptadas = 0
+        self.rechazadas = 0
+        self.lotes = 0
+        threading.Thread(target=self._bucle, name="ingesta:validador", daemon=True).start()
+
+    def recibir(self, reportes, timeout=TIMEOUT_RESPUESTA):
+        # Encola un envío y espera su resultado; queue.Full si la cola está llena
+        espera = (reportes, threading.Event(), {})
+        self.cola.put_nowait(espera)
+        if not espera[1].wait(timeout):
+            raise TimeoutError("El lote no se grabó a tiempo")
+        if 'error' in espera[2]:
+            raise espera[2]['error']
+        return espera[2]['resultado']
+
+    def _datos(self):
+        # Acumulados y grafo vigentes; solo se recalculan si cambió la versión
+        version = self.backend.version()
+        if self._master[0] != version:
+            self._master = (version, get_acumulados(self.backend.leer_catalogo(), self.backend.resumen_por_partida()))
+        version_dep = version_archivos(self.ruta_dependencias)
+        if self._grafo[0] != version_dep:
+            self._grafo = (version_dep, GrafoDependencias.desde_dataframe(leer_dependencias(self.ruta_dependencias)))
+        return self._master[1], self._grafo[1]
+
+    def _bucle(self):
+        while True:
+            lote = [self.cola.get()]
+            n = len(lote[0][0])
+            while n < MAX_REPORTES_POR_LOTE:
+                try:
+                    lote.append(self.cola.get_nowait())
+                except queue.Empty:
+                    break
+                n += len(lote[-1][0])
+            try:
+                self._procesar(lote)
+            except Exception as e:  # Se informa a cada envío en lugar de matar el hilo
+                for espera in lote:
+                    espera[2]['error'] = e
+            for espera in lote:
+                espera[1].set()
+
+    def _procesar(self, lote):
+        filas = [r for espera in lote for r in espera[0]]
+        df_lote = pd.DataFrame(filas, columns=['Fecha', 'Disciplina', 'Partida', 'Cantidad', 'Nota'])
+        df_lote['Fecha'] = df_lote['Fecha'].fillna(datetime.date.today().isoformat())
+        df_master, grafo = self._datos()
+        aceptadas, rechazadas = validar_lote(df_lote, df_master, grafo)
+        if not aceptadas.empty:
+            self.escritor.registrar(aceptadas.to_dict('records'))
+
+        # 'Fila' de validar_lote = posición en el lote + 2 -> (envío, índice dentro del envío)
+        motivos = dict(zip(rechazadas['Fila'] - 2, rechazadas['Motivo']))
+        inicio = 0
+        for reportes, _, resultado in lote:
+            propios = [{'indice': i, 'motivo': motivos[inicio + i]} for i in range(len(reportes)) if inicio + i in motivos]
+            resultado['resultado'] = {'aceptadas': len(reportes) - len(propios), 'rechazadas': propios}
+            inicio += len(reportes)
+        self.envios += len(lote)
+        self.lotes += 1
+        self.aceptadas += len(aceptadas)
+        self.rechazadas += len(rechazadas)
+
+    def salud(self):
+        return {
+            'en_cola': self.cola.qsize(),
+            'capacidad': self.cola.maxsize,
+            'envios': self.envios,
+            'lotes': self.lotes,
+            'aceptadas': self.aceptadas,
+            'rechazadas': self.rechazadas,
+        }
+
+
+class ManejadorIngesta(BaseHTTPRequestHandler):
+    servicio = None  # Lo fija crear_servidor
+
+    def _responder(self, codigo, cuerpo, cabeceras=()):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/salud':
+            self._responder(200, self.servicio.salud())
+        else:
+            self._responder(404, {'error': 'Ruta desconocida'})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/reportes':
+            self._responder(404, {'error': 'Ruta desconocida'})
+            return
+        try:
+            cuerpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        except ValueError:
+            self._responder(400, {'error': 'JSON inválido'})
+            return
+        reportes = cuerpo.get('reportes') if isinstance(cuerpo, dict) else cuerpo
+        if not isinstance(reportes, list) or not all(isinstance(r, dict) for r in reportes):
+            self._responder(400, {'error': "Se espera {'reportes': [ {...}, ... ]}"})
+            return
+        if len(reportes) > MAX_REPORTES_POR_ENVIO:
+            self._responder(413, {'error': f"Máximo {MAX_REPORTES_POR_ENVIO} reportes por envío"})
+            return
+        if not reportes:
+            self._responder(200, {'aceptadas': 0, 'rechazadas': []})
+            return
+        try:
+            self._responder(200, self.servicio.recibir(reportes))
+        except queue.Full:
+            self._responder(503, {'error': 'Cola llena, reintentar'}, [('Retry-After', '1')])
+        except TimeoutError as e:
+            self._responder(504, {'error': str(e)})
+        except ValueError as e:  # Columnas faltantes (validar_lote)
+            self._responder(400, {'error': str(e)})
+        except Exception as e:
+            self._responder(500, {'error': str(e)})
+
+    def log_message(self, formato, *args):
+        pass  # Sin una línea por request en la consola; /salud tiene los contadores
+
+
+class ServidorIngesta(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Conexiones en espera (muchas tablets a la vez); el default es 5
+
+
+def crear_servidor(servicio, host='127.0.0.1', puerto=8502):
+    # puerto=0 elige uno libre (útil para pruebas locales): servidor.server_address
+    manejador = type('Manejador', (ManejadorIngesta,), {'servicio': servicio})
+    return ServidorIngesta((host, puerto), manejador)
+
+
+def enviar_reportes(url, reportes, timeout=TIMEOUT_RESPUESTA):
+    # Cliente mínimo (tablet o script de prueba) -> (código HTTP, respuesta JSON)
+    datos = json.dumps({'reportes': reportes}, default=str).encode('utf-8')
+    pedido = urllib.request.Request(url.rstrip('/') + '/reportes', data=datos, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(pedido, timeout=timeout) as r:
+            return r.status, json.load(r)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+if __name__ == '__main__':
+    from pebbles.storage import get_backend
+    from pebbles.escritura import get_escritor
+
+    parser = argparse.ArgumentParser(description="Servicio HTTP de ingesta de reportes de avance.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8502)
+    parser.add_argument('--catalogo', default='pebbles_catalogo.csv')
+    parser.add_argument('--historial', default='pebbles_historial.csv')
+    parser.add_argument('--db', default='pebbles_historial.db')
+    parser.add_argument('--backend', default=os.environ.get('PEBBLES_BACKEND', 'sqlite'), choices=['sqlite', 'csv', 'particionado'])
+    parser.add_argument('--diario', default='pebbles_historial.journal')
+    parser.add_argument('--dependencias', default='pebbles_dependencias.csv')
+    parser.add_argument('--capacidad', type=int, default=CAPACIDAD_COLA, help="Envíos en cola antes de responder 503")
+    args = parser.parse_args()
+
+    backend = get_backend(args.backend, args.catalogo, args.historial, args.db)
+    backend.init()
+    servicio = ServicioIngesta(backend, get_escritor(args.diario, backend), args.dependencias, args.capacidad)
+    servidor = crear_servidor(servicio, args.host, args.puerto)
+    print(f"Ingesta escuchando en http://{args.host}:{servidor.server_address[1]}/reportes")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
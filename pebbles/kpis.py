@@ -0,0 +1,46 @@
+import pandas as pd
+
+# --- KPIs (sin Streamlit) ---
+# Cálculos del tablero que también usan el benchmark y los reportes por lote
+# (python -m pebbles.lote).
+
+
+def get_acumulados(df_cat, resumen):
+    # Cruza el catálogo con lo acumulado por partida (la suma la resuelve el backend)
+    if resumen.empty:
+        df_cat['Ejecutado'] = 0.0
+    else:
+        df_cat = pd.merge(df_cat, resumen, on=['Disciplina', 'Partida'], how='left')
+        df_cat['Cantidad'] = df_cat['Cantidad'].fillna(0)
+        df_cat.rename(columns={'Cantidad': 'Ejecutado'}, inplace=True)
+    
+    # Calcular %
+    df_cat['% Avance'] = (df_cat['Ejecutado'] / df_cat['Meta']) * 100
+    df_cat['% Avance'] = df_cat['% Avance'].clip(upper=100) # Tope visual 100%
+    return df_cat
+
+
+def _pesos(df_master):
+    if 'Peso' in df_master.columns:
+        return df_master['Peso'].fillna(1.0).astype(float)
+    return pd.Series(1.0, index=df_master.index)
+
+
+def avance_global(df_master):
+    # % físico ponderado por 'Peso' (igual peso = promedio simple); mismo valor que CatalogoWBS.avance()
+    peso = _pesos(df_master)
+    return float((peso * df_master['% Avance'].fillna(0)).sum() / peso.sum()) if peso.sum() > 0 else 0.0
+
+
+def avance_por_disciplina(df_master):
+    # Peso y % ponderado de cada disciplina
+    df = df_master[['Disciplina']].assign(Peso=_pesos(df_master))
+    df['_wp'] = df['Peso'] * df_master['% Avance'].fillna(0)
+    res = df.groupby('Disciplina', as_index=False)[['Peso', '_wp']].sum()
+    res['% Avance'] = (res['_wp'] / res['Peso']).where(res['Peso'] > 0, 0.0)
+    return res.drop(columns='_wp')
+
+
+def flujo_civil(df_disciplina, orden):
+    # Actividades de la secuencia constructiva en su orden (barras del "Estado del Flujo Civil")
+    return df_disciplina.set_index('Partida').reindex(orden).reset_index()
@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+from pebbles.storage import get_backend
+from pebbles.cache import version_archivos
+from pebbles.escritura import escribir_atomico
+from pebbles.kpis import get_acumulados, avance_global, avance_por_disciplina, flujo_civil
+from pebbles.dependencias import GrafoDependencias, leer_dependencias
+from pebbles.curva_s import IndiceAcumulado, fechas_curva, curva_s
+from pebbles.valor_ganado import leer_linea_base, valor_ganado, resumen_valor_ganado, curva_plan, serie_esfuerzo
+from pebbles.reportes import iterar_pivot_csv
+from pebbles.graficos import figura_esfuerzo, figura_flujo_civil, figura_curva_s
+
+# --- REPORTES POR LOTE (sin Streamlit) ---
+# Genera los reportes del tablero para muchos proyectos a la vez, uno por
+# proceso (cada directorio de proyecto con sus pebbles_*.csv / .db):
+#   python -m pebbles.lote proyectos/* --formato csv html --procesos 4
+# Cada proyecto deja en <salida>/ sus tablas (kpis, acumulados, flujo civil,
+# producción por periodo, valor ganado, curva S, pivot) y un reporte HTML con
+# los gráficos. La huella de los datos queda en <salida>/.huella.json: si no
+# cambió desde la corrida anterior el proyecto se salta (--forzar lo rehace).
+# Sin --fecha el corte es hoy y no entra en la huella: una corrida nocturna
+# solo rehace los proyectos con datos nuevos.
+
+FILE_CATALOGO = 'pebbles_catalogo.csv'
+FILE_HISTORIAL = 'pebbles_historial.csv'
+FILE_HISTORIAL_DB = 'pebbles_historial.db'
+FILE_DEPENDENCIAS = 'pebbles_dependencias.csv'
+FILE_LINEA_BASE = 'pebbles_linea_base.csv'
+FILE_HUELLA = '.huella.json'
+
+FORMATOS = ['csv', 'parquet', 'html']
+FRECUENCIAS = {'D': 'diaria', 'W-MON': 'semanal', 'M': 'mensual'}
+
+
+def _ruta(directorio, nombre):
+    return os.path.join(directorio, nombre)
+
+
+def abrir_backend(directorio):
+    # SQLite si el proyecto ya tiene la base, particionado si tiene el directorio
+    # de meses; si no, el CSV (no se crea nada en el proyecto)
+    if os.path.exists(_ruta(directorio, FILE_HISTORIAL_DB)):
+        tipo = 'sqlite'
+    elif os.path.isdir(os.path.splitext(_ruta(directorio, FILE_HISTORIAL))[0]):
+        tipo = 'particionado'
+    else:
+        tipo = 'csv'
+    backend = get_backend(tipo, _ruta(directorio, FILE_CATALOGO), _ruta(directorio, FILE_HISTORIAL), _ruta(directorio, FILE_HISTORIAL_DB))
+    if tipo == 'sqlite':
+        backend.init()
+    return backend
+
+
+def huella(directorio, backend, formatos, fecha_corte=None):
+    # fecha_corte solo cuenta si se pidió una explícita (None = hoy)
+    datos = (backend.version(), version_archivos(_ruta(directorio, FILE_DEPENDENCIAS), _ruta(directorio, FILE_LINEA_BASE)))
+    return {'datos': repr(datos), 'formatos': sorted(formatos), 'fecha_corte': None if fecha_corte is None else str(fecha_corte)}
+
+
+def _leer_huella(salida):
+    try:
+        with open(_ruta(salida, FILE_HUELLA), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _escribir_texto(texto, ruta):
+    # Mismo reemplazo atómico que escribir_atomico, para texto ya armado
+    tmp = f"{ruta}.tmp{os.getpid()}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(texto)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ruta)
+
+
+def tablas_proyecto(directorio, backend, fecha_corte):
+    # Las mismas tablas que muestra el tablero, calculadas con pebbles.* (sin Streamlit)
+    df_cat = backend.leer_catalogo()
+    df_master = get_acumulados(df_cat, backend.resumen_por_partida())
+    claves = list(zip(df_master['Disciplina'], df_master['Partida']))
+
+    tablas = {'acumulados': df_master}
+    if os.path.exists(_ruta(directorio, FILE_DEPENDENCIAS)):
+        grafo = GrafoDependencias.desde_dataframe(leer_dependencias(_ruta(directorio, FILE_DEPENDENCIAS)))
+        orden_civil = [p for d, p in grafo.orden if d == 'Civil']
+    else:
+        orden_civil = df_master.loc[df_master['Disciplina'] == 'Civil', 'Partida'].tolist()
+    df_civ = df_master[df_master['Disciplina'] == 'Civil'][['Partida', '% Avance']]
+    tablas['flujo_civil'] = flujo_civil(df_civ, orden_civil)
+
+    rollups = {freq: backend.rollup(freq) for freq in FRECUENCIAS}
+    for freq, nombre in FRECUENCIAS.items():
+        tablas[f'produccion_{nombre}'] = rollups[freq]
+        tablas[f'esfuerzo_{nombre}'] = serie_esfuerzo(rollups[freq], df_master)
+
+    indice = IndiceAcumulado(rollups['D'], claves)
+    linea_base = leer_linea_base(_ruta(directorio, FILE_LINEA_BASE)) if os.path.exists(_ruta(directorio, FILE_LINEA_BASE)) else None
+    if indice.primer_dia is not None:
+        fechas = fechas_curva(indice.primer_dia, max(indice.ultimo_dia, fecha_corte))
+        curvas = [curva_s(indice, df_master, fechas)]
+        if linea_base is not None:
+            curvas.append(curva_plan(linea_base, df_master, fechas))
+        tablas['curva_s'] = pd.concat(curvas, ignore_index=True)
+    if linea_base is not None:
+        ev = valor_ganado(indice, df_master, linea_base, fecha_corte)
+        tablas['valor_ganado'] = ev
+        tablas['valor_ganado_resumen'] = resumen_valor_ganado(ev)
+
+    kpis = avance_por_disciplina(df_master)
+    tablas['kpis'] = pd.concat([
+        kpis, pd.DataFrame({'Disciplina': ['Global'], 'Peso': [kpis['Peso'].sum()], '% Avance': [avance_global(df_master)]}),
+    ], ignore_index=True)
+    return tablas
+
+
+def reporte_html(nombre, tablas, fecha_corte):
+    # Un solo archivo: KPIs + gráficos (plotly.js desde CDN una vez)
+    figuras = [figura_flujo_civil(tablas['flujo_civil'])]
+    if not tablas['esfuerzo_mensual'].empty:
+        figuras.append(figura_esfuerzo(tablas['esfuerzo_mensual'], 'Producción mensual (% ponderado del proyecto)'))
+    if 'curva_s' in tablas:
+        figuras.append(figura_curva_s(tablas['curva_s'], fecha_corte))
+    partes = [
+        f"<html><head><meta charset='utf-8'><title>Control Pebbles - {nombre}</title></head><body>",
+        f"<h1>Control Pebbles - {nombre}</h1><p>Corte: {fecha_corte:%Y-%m-%d}</p>",
+        tablas['kpis'].to_html(index=False, float_format='{:.1f}'.format),
+    ]
+    if 'valor_ganado_resumen' in tablas:
+        partes.append(tablas['valor_ganado_resumen'].to_html(index=False, float_format='{:.2f}'.format))
+    for i, fig in enumerate(figuras):
+        partes.append(fig.to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False))
+    partes.append("</body></html>")
+    return '\n'.join(partes)
+
+
+def procesar_proyecto(directorio, salida, formatos, fecha_corte=None, forzar=False):
+    # Corre en un proceso del pool -> dict con el resultado (se imprime en el proceso principal)
+    # fecha_corte None = hoy
+    t0 = time.perf_counter()
+    nombre = os.path.basename(os.path.normpath(directorio))
+    if not os.path.exists(_ruta(directorio, FILE_CATALOGO)):
+        return {'proyecto': nombre, 'estado': 'sin catálogo', 'segundos': 0.0}
+    backend = abrir_backend(directorio)
+    nueva = huella(directorio, backend, formatos, fecha_corte)
+    if not forzar and _leer_huella(salida) == nueva:
+        return {'proyecto': nombre, 'estado': 'sin cambios', 'segundos': round(time.perf_counter() - t0, 3)}
+
+    if fecha_corte is None:
+        fecha_corte = pd.Timestamp(datetime.date.today())
+    os.makedirs(salida, exist_ok=True)
+    tablas = tablas_proyecto(directorio, backend, fecha_corte)
+    for tabla, df in tablas.items():
+        if 'csv' in formatos:
+            escribir_atomico(df, _ruta(salida, f'{tabla}.csv'))
+        if 'parquet' in formatos:
+            tmp = _ruta(salida, f'{tabla}.parquet.tmp{os.getpid()}')
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, _ruta(salida, f'{tabla}.parquet'))
+    if 'csv' in formatos:  # La matriz Partidas x Fechas se escribe por trozos, nunca entera en memoria
+        tmp = _ruta(salida, f'pivot.csv.tmp{os.getpid()}')
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            for trozo in iterar_pivot_csv(backend):
+                f.write(trozo)
+        os.replace(tmp, _ruta(salida, 'pivot.csv'))
+    if 'html' in formatos:
+        _escribir_texto(reporte_html(nombre, tablas, fecha_corte), _ruta(salida, 'reporte.html'))
+
+    # La huella va al final: si algo falla antes, la próxima corrida rehace el proyecto
+    _escribir_texto(json.dumps(nueva, indent=2), _ruta(salida, FILE_HUELLA))
+    return {'proyecto': nombre, 'estado': 'generado', 'segundos': round(time.perf_counter() - t0, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes del tablero para varios proyectos en paralelo.")
+    parser.add_argument('proyectos', nargs='+', help="Directorios de proyecto (con pebbles_catalogo.csv)")
+    parser.add_argument('--formato', nargs='+', default=['csv', 'html'], choices=FORMATOS)
+    parser.add_argument('--salida', default=None, help="Directorio base de salida; por defecto <proyecto>/reportes")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count(), help="Procesos en paralelo")
+    parser.add_argument('--fecha', default=None, help="Fecha de corte (AAAA-MM-DD); por defecto hoy (sin rehacer proyectos sin cambios)")
+    parser.add_argument('--forzar', action='store_true', help="Regenerar aunque los datos no hayan cambiado")
+    args = parser.parse_args(argv)
+
+    if 'parquet' in args.formato and not (importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet')):
+        parser.exit(1, "El formato parquet necesita pyarrow (pip install pyarrow).\n")
+    fecha_corte = pd.Timestamp(args.fecha) if args.fecha else None
+
+    trabajos = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(args.procesos or 1, len(args.proyectos)))) as pool:
+        for directorio in args.proyectos:
+            nombre = os.path.basename(os.path.normpath(directorio))
+            salida = os.path.join(args.salida, nombre) if args.salida else _ruta(directorio, 'reportes')
+            trabajos[pool.submit(procesar_proyecto, directorio, salida, args.formato, fecha_corte, args.forzar)] = nombre
+        errores = 0
+        for futuro in as_completed(trabajos):
+            try:
+                res = futuro.result()
+            except Exception as e:  # Un proyecto con datos rotos no detiene a los demás
+                errores += 1
+                print(f"{trabajos[futuro]:<30} error: {e}", file=sys.stderr)
+                continue
+            print(f"{res['proyecto']:<30} {res['estado']:<12} {res['segundos']:8.3f} s", file=sys.stderr)
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import os
+import json
+import time
+import threading
+import contextlib
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# --- INSTRUMENTACIÓN POR RERUN ---
+# Cada rerun mide sus etapas con un Cronometro (solo perf_counter, sin
+# dependencias). Al cerrar el rerun las muestras pasan a una ventana móvil por
+# (vista, etapa) para p50/p95 y se agrega una línea JSON al log local.
+
+VENTANA_MUESTRAS = 500
+MAX_BYTES_LOG = 10 * 2**20  # Al superarlo el log pasa a '<ruta>.1'
+
+
+class Metricas:
+
+    def __init__(self, ruta_log=None, ventana=VENTANA_MUESTRAS):
+        self.ruta_log = ruta_log
+        self.ventana = ventana
+        self._muestras = {}  # (vista, etapa) -> deque de milisegundos
+        self._lock = threading.Lock()
+
+    def registrar(self, vista, etapas):
+        # etapas: {nombre: ms} de un rerun completo
+        with self._lock:
+            for nombre, ms in etapas.items():
+                self._muestras.setdefault((vista, nombre), deque(maxlen=self.ventana)).append(ms)
+            if self.ruta_log:
+                self._escribir_log({'ts': time.time(), 'vista': vista, 'etapas': etapas})
+
+    def _escribir_log(self, registro):
+        if os.path.exists(self.ruta_log) and os.path.getsize(self.ruta_log) > MAX_BYTES_LOG:
+            os.replace(self.ruta_log, self.ruta_log + '.1')
+        with open(self.ruta_log, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+    def percentiles(self):
+        with self._lock:
+            filas = [
+                (vista, etapa, len(m), float(np.percentile(m, 50)), float(np.percentile(m, 95)))
+                for (vista, etapa), m in self._muestras.items()
+            ]
+        return pd.DataFrame(filas, columns=['Vista', 'Etapa', 'Reruns', 'p50 (ms)', 'p95 (ms)'])
+
+
+class Cronometro:
+    # Un cronómetro por rerun: with crono.etapa('load_data'): ...
+
+    def __init__(self, metricas, vista='(inicio)'):
+        self.metricas = metricas
+        self.vista = vista
+        self.etapas = {}
+        self._t0 = time.perf_counter()
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            self.etapas[nombre] = self.etapas.get(nombre, 0.0) + ms
+
+    def cerrar(self):
+        self.etapas['total rerun'] = (time.perf_counter() - self._t0) * 1000
+        self.metricas.registrar(self.vista, {k: round(v, 3) for k, v in self.etapas.items()})
+
+
+metricas_global = Metricas(ruta_log='pebbles_rendimiento.jsonl')
@@ -0,0 +1,195 @@
+import time
+import datetime
+import threading
+import pandas as pd
+
+from pebbles.cache import version_archivos
+from pebbles.kpis import get_acumulados
+from pebbles.wbs import CatalogoWBS
+from pebbles.dependencias import GrafoDependencias, ValidadorSecuencia, leer_dependencias
+from pebbles.curva_s import IndiceAcumulado, curva_s, fechas_curva
+from pebbles.valor_ganado import leer_linea_base, valor_ganado, curva_plan, serie_esfuerzo
+from pebbles.reportes import paginar, tabla_pagina
+from pebbles.graficos import figura_esfuerzo, figura_curva_s, frecuencia_para, TITULOS_FRECUENCIA
+
+# --- PRECÁLCULO DEL TABLERO EN SEGUNDO PLANO ---
+# Un hilo por proyecto abierto arma lo que muestra "Panel de Control" al
+# abrirse (acumulados, KPIs, WBS, agrupaciones D/W/M con sus figuras, curva S,
+# valor ganado y la última página del resumen con su degradado) fuera del
+# request. Se despierta cuando la app guarda (avisar) y además revisa la
+# versión de los datos cada INTERVALO_REVISION segundos, para ver lo grabado
+# por otros procesos (ingesta, otro servidor). El resultado se publica entero
+# de una vez (un solo cambio de referencia) con su versión y hora: el tablero
+# muestra la última publicación lista y cuánto tiene de antigüedad, aunque ya
+# se esté calculando la siguiente.
+
+INTERVALO_REVISION = 5     # s entre revisiones de la versión sin avisos
+TIMEOUT_PRIMERA = 120      # s que espera el tablero la primera publicación
+ESPERA_AL_DIA = 1.5        # s que espera el tablero un recálculo en curso antes de mostrar lo anterior
+DIAS_VENTANA_RESUMEN = 30  # Ventana inicial del resumen Partidas x Fechas
+
+
+# Valores iniciales de los controles del tablero (los mismos en la app y aquí)
+
+def corte_defecto(indice, hoy):
+    return max(indice.ultimo_dia.date(), hoy)
+
+
+def rango_productividad(fechas):
+    primera = fechas[0].date()
+    return primera, max(fechas[-1].date(), primera + datetime.timedelta(days=1))  # El slider necesita min < max
+
+
+def ventana_resumen(fechas):
+    return max(fechas[0], fechas[-1] - pd.Timedelta(days=DIAS_VENTANA_RESUMEN - 1)).date(), fechas[-1].date()
+
+
+def calcular_artefactos(backend, ruta_dependencias, ruta_linea_base, hoy, validador=None):
+    # Todo lo que muestra el tablero con sus controles en el valor inicial.
+    # Las claves con parámetros son las mismas que usa la app en su cache.
+    # validador: ValidadorSecuencia que se conserva entre cálculos (solo re-evalúa lo que cambió)
+    catalogo = backend.leer_catalogo()
+    master = get_acumulados(catalogo.copy(deep=False), backend.resumen_por_partida())
+    claves = list(zip(master['Disciplina'], master['Partida']))
+    avances = dict(zip(claves, master['% Avance']))
+    wbs = CatalogoWBS(catalogo).sincronizar(avances)
+    if validador is None:
+        validador = ValidadorSecuencia(GrafoDependencias.desde_dataframe(leer_dependencias(ruta_dependencias)))
+    grafo = validador.grafo
+    duraciones = {}
+    if 'Duracion' in master.columns:  # Duración estimada en días (opcional en el catálogo)
+        duraciones = dict(zip(claves, master['Duracion'].fillna(1.0)))
+
+    art = {
+        'master': master,
+        'registros': backend.contar(),
+        'avance_global': wbs.avance(),
+        'fuera_de_secuencia': validador.sincronizar(avances),
+        'ruta_critica': grafo.ruta_critica(duraciones) + (bool(duraciones),) if grafo.orden else None,
+    }
+    for profundidad in (1, 2, 3):
+        art[('resumen_wbs', profundidad)] = wbs.resumen(profundidad)
+
+    fechas = backend.fechas_con_avance()
+    art['fechas_con_avance'] = fechas
+    if not len(fechas):
+        return art
+
+    # Curva S y valor ganado al corte inicial
+    indice = IndiceAcumulado(backend.rollup('D'), claves)
+    art['indice_acumulado'] = indice
+    corte = corte_defecto(indice, hoy)
+    linea_base = leer_linea_base(ruta_linea_base)
+    art[('avance_corte', corte)] = curva_s(indice, master, pd.DatetimeIndex([corte]))['% Avance'].iloc[-1]
+    art[('valor_ganado', corte)] = valor_ganado(indice, master, linea_base, corte)
+    fechas_grafico = fechas_curva(indice.primer_dia, max(indice.ultimo_dia, pd.Timestamp(corte)))
+    curva = pd.concat([curva_s(indice, master, fechas_grafico), curva_plan(linea_base, master, fechas_grafico)], ignore_index=True)
+    art[('figura_curva_s', corte)] = figura_curva_s(curva, corte)
+
+    # Producción D/W/M en todo el rango, total y por disciplina
+    desde, hasta = rango_productividad(fechas)
+    for freq in dict.fromkeys(frecuencia_para(f, desde, hasta) for f in TITULOS_FRECUENCIA):
+        rollup = backend.rollup(freq)
+        for disciplina in [None] + master['Disciplina'].unique().tolist():
+            parte = rollup if disciplina is None else rollup[rollup['Disciplina'] == disciplina]
+            grouper = serie_esfuerzo(parte, master)
+            grouper = grouper[(grouper['Fecha'] >= pd.Timestamp(desde)) & (grouper['Fecha'] <= pd.Timestamp(hasta))]
+            art[('figura_esfuerzo', freq, disciplina, desde, hasta)] = figura_esfuerzo(grouper, TITULOS_FRECUENCIA[freq])
+
+    # Última página de la ventana inicial del resumen
+    inicio, fin = ventana_resumen(fechas)
+    fechas_ventana = [f for f in fechas if inicio <= f.date() <= fin]
+    fechas_pagina = tuple(paginar(fechas_ventana, paginar(fechas_ventana, 1)[1])[0])
+    if fechas_pagina:
+        art[('pivot', fechas_pagina)] = tabla_pagina(backend, fechas_pagina, master)
+    return art
+
+
+class Publicacion:
+
+    def __init__(self, version, artefactos, segundos):
+        self.version = version
+        self.artefactos = artefactos
+        self.segundos = segundos        # Lo que tardó el cálculo
+        self.lista = time.time()        # Cuándo quedó publicada
+
+    def antiguedad(self):
+        return time.time() - self.lista
+
+
+class Precalculo:
+
+    def __init__(self, backend, ruta_dependencias, ruta_linea_base, intervalo=INTERVALO_REVISION):
+        self.backend = backend
+        self.ruta_dependencias = ruta_dependencias
+        self.ruta_linea_base = ruta_linea_base
+        self.intervalo = intervalo
+        self.publicada = None
+        self.error = None
+        self.calculos = 0
+        self._aviso = threading.Event()
+        self._publicacion = threading.Condition()
+        self._detenido = False
+        self._validador = None          # (versión de las dependencias, ValidadorSecuencia)
+        threading.Thread(target=self._bucle, name=f"precalculo:{ruta_dependencias}", daemon=True).start()
+
+    def version(self):
+        # Cambia con el historial, el catálogo, las dependencias, la línea base y el día (valores iniciales)
+        return self.backend.version(), version_archivos(self.ruta_dependencias, self.ruta_linea_base), datetime.date.today()
+
+    def validador(self):
+        # Uno por proyecto; se reconstruye solo si cambia el archivo de dependencias
+        version = version_archivos(self.ruta_dependencias)
+        if self._validador is None or self._validador[0] != version:
+            grafo = GrafoDependencias.desde_dataframe(leer_dependencias(self.ruta_dependencias))
+            self._validador = (version, ValidadorSecuencia(grafo))
+        return self._validador[1]
+
+    def avisar(self):
+        # Llamar después de guardar: el hilo recalcula sin esperar la próxima revisión
+        self._aviso.set()
+
+    def detener(self):
+        self._detenido = True
+        self._aviso.set()
+
+    def _bucle(self):
+        while not self._detenido:
+            self._aviso.clear()  # Antes de leer la versión: un aviso durante el cálculo no se pierde
+            version = self.version()
+            if self.publicada is not None and self.publicada.version == version:
+                self._aviso.wait(self.intervalo)
+                continue
+            t0 = time.perf_counter()
+            try:
+                artefactos = calcular_artefactos(
+                    self.backend, self.ruta_dependencias, self.ruta_linea_base, version[-1], self.validador()
+                )
+            except Exception as e:  # Se conserva la última publicación; se reintenta en la próxima revisión
+                with self._publicacion:
+                    self.error = e
+                    self._publicacion.notify_all()
+                self._aviso.wait(self.intervalo)
+                continue
+            with self._publicacion:
+                self.publicada = Publicacion(version, artefactos, time.perf_counter() - t0)
+                self.error = None
+                self.calculos += 1
+                self._publicacion.notify_all()
+
+    def ultima(self, espera=ESPERA_AL_DIA, timeout=TIMEOUT_PRIMERA):
+        # Última publicación lista. La primera vez espera el cálculo inicial; si
+        # hay uno en curso por un guardado reciente, lo espera a lo sumo 'espera' s.
+        with self._publicacion:
+            if self.publicada is None:
+                self._publicacion.wait_for(lambda: self.publicada is not None or self.error is not None, timeout)
+            elif espera and not self.al_dia(self.publicada):
+                anterior = self.publicada
+                self._publicacion.wait_for(lambda: self.publicada is not anterior or self.error is not None, espera)
+            publicada = self.publicada
+        if publicada is None:
+            raise self.error or TimeoutError("El tablero todavía se está calculando")
+        return publicada
+
+    def al_dia(self, publicada):
+        return publicada.version == self.version()
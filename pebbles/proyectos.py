@@ -0,0 +1,129 @@
+import os
+import re
+import time
+import threading
+
+from pebbles.cache import CacheCompartida
+from pebbles.storage import get_backend
+from pebbles.precalculo import Precalculo
+
+# --- VARIOS PROYECTOS EN UN SERVIDOR ---
+# Cada obra tiene su directorio con los mismos archivos que una instalación de
+# un solo proyecto:
+#   proyectos/<nombre>/pebbles_catalogo.csv, pebbles_historial.db (o
+#   pebbles_historial/AAAA-MM.csv con el backend 'particionado'), ...
+# El directorio actual sigue siendo el proyecto 'Principal' si ya tiene datos.
+# Un proyecto se abre recién cuando una sesión lo elige; su backend y su cache
+# de datos viven en memoria mientras se use. Los que quedan inactivos
+# (o exceden el máximo de proyectos abiertos, el menos usado primero) se
+# cierran y liberan su memoria (y detienen su precálculo del tablero); la
+# próxima sesión que los elija los reabre.
+
+NOMBRE_PRINCIPAL = 'Principal'
+FILE_CATALOGO = 'pebbles_catalogo.csv'
+MAX_PROYECTOS_ACTIVOS = 8
+INACTIVIDAD_MAX = 30 * 60  # s sin sesiones antes de cerrar un proyecto
+PATRON_NOMBRE = re.compile(r'^[\w][\w .\-]*$')
+
+
+class Proyecto:
+
+    def __init__(self, nombre, directorio, tipo_backend):
+        self.nombre = nombre
+        self.directorio = directorio
+        self.backend = get_backend(
+            tipo_backend, self.ruta('pebbles_catalogo.csv'), self.ruta('pebbles_historial.csv'), self.ruta('pebbles_historial.db')
+        )
+        self.cache = CacheCompartida()
+        self.ultimo_uso = time.monotonic()
+        self._precalculo = None
+        self._lock = threading.Lock()
+
+    def ruta(self, archivo):
+        return os.path.join(self.directorio, archivo)
+
+    def precalculo(self):
+        # Se arranca recién cuando la app ya inicializó los archivos del proyecto
+        with self._lock:
+            if self._precalculo is None:
+                self._precalculo = Precalculo(self.backend, self.ruta('pebbles_dependencias.csv'), self.ruta('pebbles_linea_base.csv'))
+            return self._precalculo
+
+    def cerrar(self):
+        # Libera lo cacheado (datos del proyecto, estado del historial del backend y lo precalculado)
+        self.cache.invalidar()
+        self.backend.liberar()
+        with self._lock:
+            if self._precalculo is not None:
+                self._precalculo.detener()
+                self._precalculo = None
+
+
+class RegistroProyectos:
+
+    def __init__(self, dir_proyectos, tipo_backend, max_activos=MAX_PROYECTOS_ACTIVOS, inactividad=INACTIVIDAD_MAX):
+        self.dir_proyectos = dir_proyectos
+        self.tipo_backend = tipo_backend
+        self.max_activos = max_activos
+        self.inactividad = inactividad
+        self._activos = {}  # nombre -> Proyecto
+        self._lock = threading.Lock()
+        self.cerrados = 0
+
+    def listar(self):
+        nombres = []
+        if os.path.isdir(self.dir_proyectos):
+            nombres = sorted(n for n in os.listdir(self.dir_proyectos) if os.path.isdir(os.path.join(self.dir_proyectos, n)))
+        if os.path.exists(FILE_CATALOGO) or not nombres:
+            nombres.insert(0, NOMBRE_PRINCIPAL)
+        return nombres
+
+    def directorio(self, nombre):
+        return '.' if nombre == NOMBRE_PRINCIPAL else os.path.join(self.dir_proyectos, nombre)
+
+    def obtener(self, nombre):
+        with self._lock:
+            proyecto = self._activos.get(nombre)
+            if proyecto is None:
+                proyecto = Proyecto(nombre, self.directorio(nombre), self.tipo_backend)
+                self._activos[nombre] = proyecto
+            proyecto.ultimo_uso = time.monotonic()
+            self._expulsar()
+            return proyecto
+
+    def _expulsar(self):
+        ahora = time.monotonic()
+        por_uso = sorted(self._activos.values(), key=lambda p: p.ultimo_uso)
+        for i, proyecto in enumerate(por_uso):
+            sobran = len(por_uso) - i > self.max_activos
+            if sobran or ahora - proyecto.ultimo_uso > self.inactividad:
+                del self._activos[proyecto.nombre]
+                proyecto.cerrar()
+                self.cerrados += 1
+
+    def crear(self, nombre):
+        nombre = nombre.strip()
+        if not PATRON_NOMBRE.match(nombre) or nombre == NOMBRE_PRINCIPAL:
+            raise ValueError(f"Nombre de proyecto inválido: '{nombre}' (letras, números, espacio, punto o guion)")
+        directorio = self.directorio(nombre)
+        if os.path.exists(directorio):
+            raise ValueError(f"El proyecto '{nombre}' ya existe")
+        os.makedirs(directorio)
+        return nombre
+
+    def activos(self):
+        with self._lock:
+            return sorted(self._activos)
+
+
+_registros = {}
+_registros_lock = threading.Lock()
+
+
+def get_registro(dir_proyectos, tipo_backend):
+    # Un registro por directorio de proyectos y proceso (compartido entre sesiones)
+    with _registros_lock:
+        clave = (os.path.abspath(dir_proyectos), tipo_backend)
+        if clave not in _registros:
+            _registros[clave] = RegistroProyectos(dir_proyectos, tipo_backend)
+        return _registros[clave]
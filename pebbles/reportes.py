@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from matplotlib import colormaps
+
+# --- RESUMEN DETALLADO (Partidas x Fechas) ---
+# En pantalla solo se arma la ventana de fechas visible (una página de columnas),
+# con el CSS del degradado ya calculado. La página es densa: a lo sumo
+# partidas x COLUMNAS_POR_PAGINA celdas, y el Styler y el degradado necesitan
+# la matriz completa, así que un formato disperso no ahorraría memoria.
+# La descarga (pebbles.exportar) recorre el rollup diario por bloques de
+# partidas, de modo que la matriz completa nunca existe en memoria.
+
+COLUMNAS_POR_PAGINA = 31
+INDICE_PIVOT = ['Disciplina', 'Partida']
+
+
+def paginar(fechas, pagina, columnas_por_pagina=COLUMNAS_POR_PAGINA):
+    # Devuelve las fechas de la página (1..n) y el número total de páginas
+    n_paginas = max(1, -(-len(fechas) // columnas_por_pagina))
+    pagina = min(max(1, pagina), n_paginas)
+    inicio = (pagina - 1) * columnas_por_pagina
+    return fechas[inicio:inicio + columnas_por_pagina], n_paginas
+
+
+def pivot_ventana(rollup_diario, indice, fechas):
+    # rollup_diario: filas (Fecha, Disciplina, Partida, Cantidad) de la ventana
+    # indice: MultiIndex (Disciplina, Partida) de todas las filas del reporte
+    columnas = [pd.Timestamp(f).strftime('%Y-%m-%d') for f in fechas]
+    df = rollup_diario.assign(FechaStr=rollup_diario['Fecha'].dt.strftime('%Y-%m-%d'))
+    pivot = pd.pivot_table(df, values='Cantidad', index=INDICE_PIVOT, columns='FechaStr', aggfunc='sum')
+    pivot = pivot.reindex(index=indice, columns=columnas).fillna(0.0)
+    pivot.columns.name = 'FechaStr'
+    return pivot
+
+
+def estilos_gradiente(df, cmap='Blues'):
+    # CSS de cada celda igual a df.style.background_gradient(cmap, axis=1), ya
+    # calculado: el Styler solo lo aplica (Streamlit vuelve a correr el Styler en cada rerun)
+    valores = df.to_numpy(dtype=float)
+    minimo = np.nanmin(valores, axis=1, keepdims=True) if valores.size else valores
+    rango = np.nanmax(valores, axis=1, keepdims=True) - minimo if valores.size else valores
+    norma = np.divide(valores - minimo, rango, out=np.zeros_like(valores), where=rango > 0)
+    rgb = colormaps[cmap](norma)[..., :3]
+    lineal = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    oscuro = lineal @ np.array([0.2126, 0.7152, 0.0722]) < 0.408  # Luminancia relativa: texto claro
+    rgb8 = np.round(rgb * 255).astype(int)
+    css = [
+        f"background-color: #{r:02x}{g:02x}{b:02x};color: {'#f1f1f1' if o else '#000000'};"
+        for (r, g, b), o in zip(rgb8.reshape(-1, 3), oscuro.ravel())
+    ]
+    return pd.DataFrame(np.array(css, dtype=object).reshape(valores.shape), index=df.index, columns=df.columns)
+
+
+def tabla_pagina(backend, fechas, df_master):
+    # Una página del resumen lista para mostrar: pivot de las fechas + TOTAL
+    # ACUMULADO (todo el historial, no solo la ventana) y el CSS del degradado
+    resumen = backend.resumen_por_partida().sort_values(INDICE_PIVOT)
+    indice = pd.MultiIndex.from_frame(resumen[INDICE_PIVOT])
+    pivot = pivot_ventana(backend.rollup('D', desde=fechas[0], hasta=fechas[-1]), indice, fechas)
+    pivot['TOTAL ACUMULADO'] = df_master.set_index(INDICE_PIVOT)['Ejecutado'].reindex(pivot.index).values
+    return pivot, estilos_gradiente(pivot)
+
+
+def _bloque_pivot(rollup, columnas):
+    df = rollup.assign(FechaStr=pd.to_datetime(rollup['Fecha']).dt.strftime('%Y-%m-%d'))
+    pivot = pd.pivot_table(df, values='Cantidad', index=INDICE_PIVOT, columns='FechaStr', aggfunc='sum')
+    pivot = pivot.reindex(columns=columnas).fillna(0.0)
+    pivot['TOTAL ACUMULADO'] = pivot.sum(axis=1)
+    return pivot
+
+
+def iterar_pivot(backend, disciplina=None, partida=None, desde=None, hasta=None):
+    # Reporte Partidas x Fechas en bloques de partidas (mismas columnas en todos);
+    # con rango de fechas, TOTAL ACUMULADO es el total dentro del rango
+    desde = pd.Timestamp(desde) if desde is not None else None
+    hasta = pd.Timestamp(hasta) if hasta is not None else None
+    fechas = [
+        f for f in backend.fechas_con_avance()
+        if (desde is None or f >= desde) and (hasta is None or f <= hasta)
+    ]
+    columnas = [f.strftime('%Y-%m-%d') for f in fechas]
+    for bloque in backend.iterar_rollup('D'):
+        if disciplina is not None:
+            bloque = bloque[bloque['Disciplina'] == disciplina]
+        if partida is not None:
+            bloque = bloque[bloque['Partida'] == partida]
+        if desde is not None or hasta is not None:
+            fecha = pd.to_datetime(bloque['Fecha'])
+            bloque = bloque[((desde is None) | (fecha >= desde)) & ((hasta is None) | (fecha <= hasta))]
+        if bloque.empty:
+            continue
+        yield _bloque_pivot(bloque, columnas)
+
+
+def iterar_pivot_csv(backend, **filtros):
+    # Genera el reporte completo en trozos de texto CSV (mismas columnas que el pivot original)
+    primero = True
+    for pivot in iterar_pivot(backend, **filtros):
+        yield pivot.to_csv(header=primero)
+        primero = False
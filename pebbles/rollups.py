@@ -0,0 +1,128 @@
+import pandas as pd
+
+# --- ROLLUPS POR PERIODO (Diario / Semanal / Mensual) ---
+# Tabla materializada por (Frecuencia, Periodo, Disciplina, Partida). Cada fila
+# nueva del historial suma en sus tres periodos; el dashboard solo filtra.
+# Las etiquetas coinciden con pd.Grouper: 'W-MON' = lunes de cierre de la
+# semana, 'M' = último día del mes.
+
+nombre = 'rollups'
+
+FRECUENCIAS = {
+    'D': "{f}",
+    'W-MON': "date({f}, 'weekday 1')",
+    'M': "date({f}, 'start of month', '+1 month', '-1 day')",
+}
+
+
+def crear(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rollups (
+            Frecuencia TEXT NOT NULL,
+            Periodo TEXT NOT NULL,
+            Disciplina TEXT NOT NULL,
+            Partida TEXT NOT NULL,
+            Cantidad REAL NOT NULL,
+            Registros INTEGER NOT NULL,
+            PRIMARY KEY (Frecuencia, Disciplina, Periodo, Partida)
+        )
+    """)
+    # Recorrido ordenado por partida (exportación en streaming)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rollups_partida ON rollups (Frecuencia, Disciplina, Partida, Periodo)")
+
+
+def aplicar(conn, registros):
+    for freq, expr in FRECUENCIAS.items():
+        conn.executemany(f"""
+            INSERT INTO rollups (Frecuencia, Periodo, Disciplina, Partida, Cantidad, Registros)
+            VALUES ('{freq}', {expr.format(f='?')}, ?, ?, ?, 1)
+            ON CONFLICT (Frecuencia, Disciplina, Periodo, Partida) DO UPDATE SET
+                Cantidad = Cantidad + excluded.Cantidad,
+                Registros = Registros + 1
+        """, [(r[0], r[1], r[2], r[3]) for r in registros])
+
+
+def reconstruir(conn):
+    conn.execute("DELETE FROM rollups")
+    for freq, expr in FRECUENCIAS.items():
+        conn.execute(f"""
+            INSERT INTO rollups (Frecuencia, Periodo, Disciplina, Partida, Cantidad, Registros)
+            SELECT '{freq}', {expr.format(f='Fecha')} AS Periodo, Disciplina, Partida, SUM(Cantidad), COUNT(*)
+            FROM historial GROUP BY Periodo, Disciplina, Partida
+        """)
+
+
+def checksum(conn):
+    # Las tres frecuencias deben sumar lo mismo; si no, se fuerza la reconstrucción
+    totales = conn.execute(
+        "SELECT SUM(Registros), SUM(Cantidad) FROM rollups GROUP BY Frecuencia"
+    ).fetchall()
+    if not totales:
+        return 0, 0.0
+    if len(totales) != len(FRECUENCIAS) or len({t[0] for t in totales}) > 1:
+        return -1, 0.0
+    return totales[0]
+
+
+def leer(conn, frecuencia, disciplina=None, desde=None, hasta=None):
+    sql = "SELECT Periodo AS Fecha, Disciplina, Partida, Cantidad FROM rollups WHERE Frecuencia = ?"
+    params = [frecuencia]
+    if disciplina is not None:
+        sql += " AND Disciplina = ?"
+        params.append(disciplina)
+    if desde is not None:
+        sql += " AND Periodo >= ?"
+        params.append(pd.Timestamp(desde).strftime('%Y-%m-%d'))
+    if hasta is not None:
+        sql += " AND Periodo <= ?"
+        params.append(pd.Timestamp(hasta).strftime('%Y-%m-%d'))
+    df = pd.read_sql_query(sql + " ORDER BY Periodo", conn, params=params)
+    df['Fecha'] = pd.to_datetime(df['Fecha'], format='%Y-%m-%d')
+    return df
+
+
+def iterar_por_partida(conn, frecuencia, filas_por_bloque=50_000):
+    # Bloques de filas ordenadas por (Disciplina, Partida, Periodo); una partida
+    # nunca queda partida entre dos bloques
+    cursor = conn.execute(
+        "SELECT Periodo AS Fecha, Disciplina, Partida, Cantidad FROM rollups WHERE Frecuencia = ? "
+        "ORDER BY Disciplina, Partida, Periodo",
+        (frecuencia,),
+    )
+    columnas = [c[0] for c in cursor.description]
+    pendiente = []
+    while True:
+        filas = cursor.fetchmany(filas_por_bloque)
+        if not filas:
+            break
+        filas = pendiente + filas
+        ultima = filas[-1][1:3]
+        corte = len(filas)
+        while corte > 0 and filas[corte - 1][1:3] == ultima:
+            corte -= 1
+        if corte == 0:
+            pendiente = filas  # Una sola partida ocupa todo el bloque; seguir leyendo
+            continue
+        pendiente = filas[corte:]
+        yield pd.DataFrame(filas[:corte], columns=columnas)
+    if pendiente:
+        yield pd.DataFrame(pendiente, columns=columnas)
+
+
+def calcular(df_hist, frecuencia, disciplina=None, desde=None, hasta=None):
+    # Mismo resultado que la tabla, calculado en memoria (backend CSV)
+    if disciplina is not None:
+        df_hist = df_hist[df_hist['Disciplina'] == disciplina]
+    df = df_hist[['Fecha', 'Disciplina', 'Partida', 'Cantidad']].copy()
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    freq = 'ME' if frecuencia == 'M' else frecuencia
+    df = (
+        df.groupby([pd.Grouper(key='Fecha', freq=freq), 'Disciplina', 'Partida'])['Cantidad']
+        .sum()
+        .reset_index()
+    )
+    if desde is not None:
+        df = df[df['Fecha'] >= pd.Timestamp(desde)]
+    if hasta is not None:
+        df = df[df['Fecha'] <= pd.Timestamp(hasta)]
+    return df
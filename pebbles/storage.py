@@ -0,0 +1,521 @@
+import os
+import sqlite3
+import argparse
+import contextlib
+import pandas as pd
+from pebbles import acumulados, rollups, checkpoint
+from pebbles.cache import cache_global, version_archivos, CacheCompartida
+from pebbles.escritura import BloqueoArchivo, escribir_atomico
+
+# --- BACKENDS DE ALMACENAMIENTO ---
+# El catálogo (Metas, Unidades, Fotos) es pequeño y sigue en CSV.
+# El historial crece con cada reporte, por eso va en un backend intercambiable:
+#   - 'csv'         : comportamiento original (un CSV con append)
+#   - 'sqlite'      : base embebida indexada por (Disciplina, Partida, Fecha)
+#   - 'particionado': un CSV por mes (pebbles_historial/AAAA-MM.csv); solo se
+#                     leen los meses pedidos y los meses cerrados no se releen
+
+COLUMNAS_HISTORIAL = ['Fecha', 'Disciplina', 'Partida', 'Cantidad', 'Nota']
+COLUMNAS_TEXTO_CATALOGO = ['Img', 'Area', 'Elemento']  # Columnas opcionales que suelen venir vacías
+MAX_PARTICIONES_EN_MEMORIA = 120  # Meses con su producción diaria en memoria (por backend)
+FILAS_POR_BLOQUE = 50_000
+SUFIJO_MIGRADO = '.migrado'  # El CSV histórico ya importado a SQLite queda como '<csv>.migrado'
+
+# Tablas derivadas del historial que se mantienen al día en cada append.
+# Cada módulo expone: nombre, crear(conn), aplicar(conn, registros),
+# reconstruir(conn) y checksum(conn) -> (filas, suma de Cantidad).
+VISTAS_MATERIALIZADAS = [acumulados, rollups]
+
+
+def _fecha_iso(fecha):
+    # Acepta date/datetime/str y devuelve 'AAAA-MM-DD' (ordenable como texto)
+    return pd.Timestamp(fecha).strftime('%Y-%m-%d')
+
+
+def _normalizar_historial(df):
+    # Deja el historial con las columnas y tipos que espera la app
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS_HISTORIAL)
+    df['Fecha'] = pd.to_datetime(df['Fecha'], format='%Y-%m-%d').dt.date
+    df['Cantidad'] = df['Cantidad'].astype(float)
+    return df[COLUMNAS_HISTORIAL]
+
+
+def _filtrar_historial(hist, disciplina=None, partida=None, desde=None, hasta=None):
+    hist['Fecha'] = pd.to_datetime(hist['Fecha']).dt.strftime('%Y-%m-%d')
+    if disciplina is not None:
+        hist = hist[hist['Disciplina'] == disciplina]
+    if partida is not None:
+        hist = hist[hist['Partida'] == partida]
+    if desde is not None:
+        hist = hist[hist['Fecha'] >= _fecha_iso(desde)]
+    if hasta is not None:
+        hist = hist[hist['Fecha'] <= _fecha_iso(hasta)]
+    return hist
+
+
+class CsvBackend:
+    nombre = 'csv'
+
+    def __init__(self, file_catalogo, file_historial):
+        self.file_catalogo = file_catalogo
+        self.file_historial = file_historial
+
+    def init(self):
+        if not os.path.exists(self.file_historial):
+            pd.DataFrame(columns=COLUMNAS_HISTORIAL).to_csv(self.file_historial, index=False)
+        elif checkpoint.necesita_checkpoint(self.file_historial):
+            checkpoint.escribir_checkpoint(self.file_historial)  # Historial grande sin checkpoint reciente
+
+    def leer_catalogo(self):
+        cat = pd.read_csv(self.file_catalogo, dtype={c: str for c in COLUMNAS_TEXTO_CATALOGO})
+        for col in COLUMNAS_TEXTO_CATALOGO:
+            if col in cat.columns:
+                cat[col] = cat[col].fillna('')  # Vacías como texto (el editor no acepta float NaN)
+        return cat
+
+    def guardar_catalogo(self, df_cat):
+        with BloqueoArchivo(self.file_catalogo):
+            escribir_atomico(df_cat, self.file_catalogo)
+
+    def leer_historial(self, disciplina=None, partida=None, desde=None, hasta=None, limite=None):
+        # Sin índice: siempre lee el archivo completo y filtra en memoria
+        hist = pd.read_csv(self.file_historial)
+        if hist.empty:
+            return _normalizar_historial(hist)
+        hist = _filtrar_historial(hist, disciplina, partida, desde, hasta)
+        if limite is not None:
+            hist = hist.sort_values('Fecha', ascending=False, kind='stable').head(limite)
+        return _normalizar_historial(hist)
+
+    def iterar_historial(self, disciplina=None, partida=None, desde=None, hasta=None, filas_por_bloque=FILAS_POR_BLOQUE):
+        # Historial filtrado en bloques (exportaciones): nunca entero en memoria
+        if not os.path.exists(self.file_historial):
+            return
+        for chunk in pd.read_csv(self.file_historial, chunksize=filas_por_bloque):
+            chunk = _filtrar_historial(chunk, disciplina, partida, desde, hasta)
+            if not chunk.empty:
+                yield _normalizar_historial(chunk)
+
+    def estado_diario(self):
+        # Producción diaria por partida: último checkpoint + cola del log (una vez por versión del archivo)
+        return cache_global.obtener(
+            ('estado_csv', os.path.abspath(self.file_historial)), version_archivos(self.file_historial),
+            lambda: checkpoint.estado(self.file_historial)[0],
+        )
+
+    def resumen_por_partida(self):
+        return self.estado_diario().groupby(['Disciplina', 'Partida'], as_index=False)['Cantidad'].sum()
+
+    def contar(self):
+        return int(self.estado_diario()['Registros'].sum())
+
+    def rollup(self, frecuencia, disciplina=None, desde=None, hasta=None):
+        # Semanas y meses se agrupan desde la producción diaria (suma de sumas)
+        return rollups.calcular(self.estado_diario(), frecuencia, disciplina, desde, hasta)
+
+    def fechas_con_avance(self):
+        return sorted(self.estado_diario()['Fecha'].unique())
+
+    def iterar_rollup(self, frecuencia):
+        rollup = self.rollup(frecuencia).sort_values(['Disciplina', 'Partida', 'Fecha'])
+        yield rollup
+
+    def version(self):
+        # Cambia cada vez que alguien guarda catálogo o historial
+        return version_archivos(self.file_catalogo, self.file_historial)
+
+    def liberar(self):
+        # Suelta el estado del historial que quedó en memoria (proyecto inactivo)
+        if self.file_historial:
+            cache_global.invalidar(('estado_csv', os.path.abspath(self.file_historial)))
+
+    def agregar(self, filas):
+        df_new = pd.DataFrame(filas, columns=COLUMNAS_HISTORIAL)
+        df_new['Fecha'] = df_new['Fecha'].map(_fecha_iso)
+        header = not os.path.exists(self.file_historial)
+        with open(self.file_historial, 'a', newline='', encoding='utf-8') as f:
+            df_new.to_csv(f, header=header, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        if checkpoint.necesita_checkpoint(self.file_historial):
+            checkpoint.escribir_checkpoint(self.file_historial)
+
+    # --- Protocolo del escritor agrupado (pebbles.escritura) ---
+
+    def aplicar(self, filas):
+        self.agregar(filas)
+
+    def marca_escritura(self):
+        return os.path.getsize(self.file_historial) if os.path.exists(self.file_historial) else 0
+
+    def preparar_reintento(self, marca):
+        # Descarta un append a medias (lo que haya después de la marca) y repite el lote
+        if os.path.exists(self.file_historial):
+            with open(self.file_historial, 'r+b') as f:
+                f.truncate(marca)
+        return True
+
+
+class SqliteBackend(CsvBackend):
+    nombre = 'sqlite'
+    _verificadas = set()  # Bases cuyo checksum ya se verificó en este proceso
+    _migradas = set()     # Bases cuya migración del CSV ya se comprobó en este proceso
+
+    def __init__(self, file_catalogo, file_db, file_historial_csv=None):
+        super().__init__(file_catalogo, file_historial_csv)
+        self.file_db = file_db
+
+    @contextlib.contextmanager
+    def conectar(self):
+        # Conexión corta por operación (Streamlit ejecuta cada sesión en su propio hilo)
+        conn = sqlite3.connect(self.file_db, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")      # Lectores no bloquean al escritor
+            conn.execute("PRAGMA synchronous=FULL")      # Cada commit (un lote) es durable
+            with conn:                                   # Commit al salir, rollback si hay error
+                yield conn
+        finally:
+            conn.close()
+
+    def init(self):
+        with self.conectar() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS historial (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    Fecha TEXT NOT NULL,
+                    Disciplina TEXT NOT NULL,
+                    Partida TEXT NOT NULL,
+                    Cantidad REAL NOT NULL,
+                    Nota TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_historial_dpf ON historial (Disciplina, Partida, Fecha);
+                CREATE INDEX IF NOT EXISTS idx_historial_fecha ON historial (Fecha);
+                CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+            """)
+            for vista in VISTAS_MATERIALIZADAS:
+                vista.crear(conn)
+        # Migración automática (una sola vez) del CSV histórico si existe; se comprueba una vez por proceso
+        ruta = os.path.abspath(self.file_db)
+        if ruta not in SqliteBackend._migradas:
+            if self.file_historial and os.path.exists(self.file_historial):
+                migrar_csv(self.file_historial, self)
+            SqliteBackend._migradas.add(ruta)
+
+        # Checksum completo una vez por proceso; en cada rerun basta el watermark
+        with self.conectar() as conn:
+            self.sincronizar_vistas(conn, completo=ruta not in SqliteBackend._verificadas)
+        SqliteBackend._verificadas.add(ruta)
+
+    def sincronizar_vistas(self, conn, completo=False):
+        # Watermark = último id del historial aplicado a cada vista (MAX(id) es O(1))
+        ultimo_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM historial").fetchone()[0]
+        esperado = None
+        if completo:
+            esperado = conn.execute("SELECT COUNT(*), COALESCE(SUM(Cantidad), 0) FROM historial").fetchone()
+
+        for vista in VISTAS_MATERIALIZADAS:
+            ok = _leer_meta(conn, f"{vista.nombre}:watermark") == str(ultimo_id)
+            if ok and esperado is not None:
+                filas, suma = vista.checksum(conn)
+                ok = filas == esperado[0] and abs(suma - esperado[1]) < 1e-6 * max(1.0, abs(esperado[1]))
+            if not ok:
+                vista.reconstruir(conn)
+                _escribir_meta(conn, f"{vista.nombre}:watermark", ultimo_id)
+
+    def _consulta_historial(self, disciplina=None, partida=None, desde=None, hasta=None):
+        condiciones, params = [], []
+        if disciplina is not None:
+            condiciones.append("Disciplina = ?")
+            params.append(disciplina)
+        if partida is not None:
+            condiciones.append("Partida = ?")
+            params.append(partida)
+        if desde is not None:
+            condiciones.append("Fecha >= ?")
+            params.append(_fecha_iso(desde))
+        if hasta is not None:
+            condiciones.append("Fecha <= ?")
+            params.append(_fecha_iso(hasta))
+
+        sql = "SELECT Fecha, Disciplina, Partida, Cantidad, Nota FROM historial"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        return sql, params
+
+    def leer_historial(self, disciplina=None, partida=None, desde=None, hasta=None, limite=None):
+        sql, params = self._consulta_historial(disciplina, partida, desde, hasta)
+        if limite is not None:
+            sql += " ORDER BY Fecha DESC, id DESC LIMIT ?"
+            params.append(int(limite))
+        else:
+            sql += " ORDER BY id"
+
+        with self.conectar() as conn:
+            hist = pd.read_sql_query(sql, conn, params=params)
+        return _normalizar_historial(hist)
+
+    def iterar_historial(self, disciplina=None, partida=None, desde=None, hasta=None, filas_por_bloque=FILAS_POR_BLOQUE):
+        sql, params = self._consulta_historial(disciplina, partida, desde, hasta)
+        with self.conectar() as conn:
+            cursor = conn.execute(sql + " ORDER BY id", params)
+            while True:
+                filas = cursor.fetchmany(filas_por_bloque)
+                if not filas:
+                    break
+                yield _normalizar_historial(pd.DataFrame(filas, columns=COLUMNAS_HISTORIAL))
+
+    def resumen_por_partida(self):
+        # Lee la tabla de acumulados (una fila por partida), no el historial
+        with self.conectar() as conn:
+            self.sincronizar_vistas(conn)
+            return acumulados.leer(conn)
+
+    def contar(self):
+        with self.conectar() as conn:
+            return conn.execute("SELECT COUNT(*) FROM historial").fetchone()[0]
+
+    def rollup(self, frecuencia, disciplina=None, desde=None, hasta=None):
+        # Producción por (periodo, Disciplina, Partida) ya agregada
+        with self.conectar() as conn:
+            self.sincronizar_vistas(conn)
+            return rollups.leer(conn, frecuencia, disciplina, desde, hasta)
+
+    def fechas_con_avance(self):
+        with self.conectar() as conn:
+            self.sincronizar_vistas(conn)
+            fechas = conn.execute("SELECT DISTINCT Periodo FROM rollups WHERE Frecuencia = 'D' ORDER BY Periodo").fetchall()
+        return [pd.Timestamp(f[0]) for f in fechas]
+
+    def iterar_rollup(self, frecuencia, filas_por_bloque=50_000):
+        with self.conectar() as conn:
+            self.sincronizar_vistas(conn)
+            yield from rollups.iterar_por_partida(conn, frecuencia, filas_por_bloque)
+
+    def version(self):
+        # El .db no cambia de mtime con WAL; el último id sí cambia en cada append
+        with self.conectar() as conn:
+            ultimo_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM historial").fetchone()[0]
+        return version_archivos(self.file_catalogo), ultimo_id
+
+    def agregar(self, filas):
+        registros = [
+            (_fecha_iso(f['Fecha']), f['Disciplina'], f['Partida'], float(f['Cantidad']), f.get('Nota') or '')
+            for f in filas
+        ]
+        with self.conectar() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # Serializa escritores entre procesos
+            previo = conn.execute("SELECT COALESCE(MAX(id), 0) FROM historial").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO historial (Fecha, Disciplina, Partida, Cantidad, Nota) VALUES (?, ?, ?, ?, ?)",
+                registros,
+            )
+            ultimo_id = conn.execute("SELECT MAX(id) FROM historial").fetchone()[0]
+            # Actualización incremental de las vistas que estaban al día
+            for vista in VISTAS_MATERIALIZADAS:
+                clave = f"{vista.nombre}:watermark"
+                if _leer_meta(conn, clave) == str(previo):
+                    vista.aplicar(conn, registros)
+                else:
+                    vista.reconstruir(conn)
+                _escribir_meta(conn, clave, ultimo_id)
+
+
+    def marca_escritura(self):
+        with self.conectar() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM historial").fetchone()[0]
+
+    def preparar_reintento(self, marca):
+        # El INSERT del lote es una sola transacción: o entró completo o no entró
+        return self.marca_escritura() <= marca
+
+
+class ParticionadoBackend(CsvBackend):
+    # Historial en un CSV por mes: <dir_historial>/AAAA-MM.csv (solo append).
+    # La producción diaria de cada mes se calcula una vez por versión de su
+    # archivo; tras un reporte solo se recalcula el mes tocado.
+    nombre = 'particionado'
+
+    def __init__(self, file_catalogo, dir_historial, file_historial_csv=None):
+        super().__init__(file_catalogo, file_historial_csv)
+        self.dir_historial = dir_historial
+        self.cache = CacheCompartida(max_entradas=MAX_PARTICIONES_EN_MEMORIA)  # Se libera junto con el backend
+
+    def _ruta(self, mes):
+        return os.path.join(self.dir_historial, f'{mes}.csv')
+
+    def particiones(self, desde=None, hasta=None):
+        # [(mes 'AAAA-MM', ruta)] en orden, solo los meses que tocan [desde, hasta]
+        if not os.path.isdir(self.dir_historial):
+            return []
+        meses = sorted(n[:-4] for n in os.listdir(self.dir_historial) if len(n) == 11 and n.endswith('.csv'))
+        if desde is not None:
+            meses = [m for m in meses if m >= _fecha_iso(desde)[:7]]
+        if hasta is not None:
+            meses = [m for m in meses if m <= _fecha_iso(hasta)[:7]]
+        return [(m, self._ruta(m)) for m in meses]
+
+    def init(self):
+        # La primera vez reparte el CSV único (si existe) en meses; se arma en un
+        # directorio temporal y se renombra, así un corte a medias no deja meses incompletos
+        if os.path.isdir(self.dir_historial):
+            return
+        tmp = f"{self.dir_historial}.tmp{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        if self.file_historial and os.path.exists(self.file_historial):
+            for chunk in pd.read_csv(self.file_historial, chunksize=50_000):
+                _agregar_por_mes(chunk, lambda mes: os.path.join(tmp, f'{mes}.csv'))
+        os.replace(tmp, self.dir_historial)
+
+    def _estado_mes(self, ruta):
+        return self.cache.obtener(
+            ('estado', ruta), version_archivos(ruta),
+            lambda: checkpoint.agregar_diario(pd.read_csv(ruta, usecols=['Fecha', 'Disciplina', 'Partida', 'Cantidad'])),
+        )
+
+    def estado_diario(self, desde=None, hasta=None):
+        partes = [self._estado_mes(ruta) for _, ruta in self.particiones(desde, hasta)]
+        partes = [p for p in partes if not p.empty]
+        return pd.concat(partes, ignore_index=True) if partes else checkpoint.agregar_diario(pd.DataFrame())
+
+    def rollup(self, frecuencia, disciplina=None, desde=None, hasta=None):
+        # Un periodo semanal/mensual rotulado >= desde puede empezar hasta un mes antes
+        previo = pd.Timestamp(desde) - pd.Timedelta(days=31) if desde is not None else None
+        return rollups.calcular(self.estado_diario(previo, hasta), frecuencia, disciplina, desde, hasta)
+
+    def leer_historial(self, disciplina=None, partida=None, desde=None, hasta=None, limite=None):
+        # Solo los meses del rango; con 'limite' se leen del más nuevo hacia atrás hasta juntar las filas
+        partes, n = [], 0
+        for _, ruta in reversed(self.particiones(desde, hasta)):
+            parte = _filtrar_historial(pd.read_csv(ruta), disciplina, partida, desde, hasta)
+            partes.append(parte)
+            n += len(parte)
+            if limite is not None and n >= limite:
+                break
+        partes = [p for p in partes if not p.empty]
+        if not partes:
+            return _normalizar_historial(pd.DataFrame(columns=COLUMNAS_HISTORIAL))
+        hist = pd.concat(partes[::-1], ignore_index=True)
+        if limite is not None:
+            hist = hist.sort_values('Fecha', ascending=False, kind='stable').head(limite)
+        return _normalizar_historial(hist)
+
+    def iterar_historial(self, disciplina=None, partida=None, desde=None, hasta=None, filas_por_bloque=FILAS_POR_BLOQUE):
+        for _, ruta in self.particiones(desde, hasta):
+            for chunk in pd.read_csv(ruta, chunksize=filas_por_bloque):
+                chunk = _filtrar_historial(chunk, disciplina, partida, desde, hasta)
+                if not chunk.empty:
+                    yield _normalizar_historial(chunk)
+
+    def version(self):
+        return version_archivos(self.file_catalogo), tuple((m, version_archivos(r)) for m, r in self.particiones())
+
+    def liberar(self):
+        self.cache.invalidar()
+
+    def agregar(self, filas):
+        _agregar_por_mes(pd.DataFrame(filas, columns=COLUMNAS_HISTORIAL), self._ruta, durable=True)
+
+    def marca_escritura(self):
+        return {m: os.path.getsize(r) for m, r in self.particiones()}
+
+    def preparar_reintento(self, marca):
+        # Deja cada mes como estaba antes del lote (los meses nuevos se borran) y lo repite
+        for mes, ruta in self.particiones():
+            if mes not in marca:
+                os.remove(ruta)
+            else:
+                with open(ruta, 'r+b') as f:
+                    f.truncate(marca[mes])
+        return True
+
+
+def _agregar_por_mes(df, ruta_mes, durable=False):
+    # Append de las filas al CSV de su mes (con encabezado si el mes es nuevo)
+    df = df.assign(Fecha=df['Fecha'].map(_fecha_iso))
+    for mes, filas in df.groupby(df['Fecha'].str[:7], sort=True):
+        ruta = ruta_mes(mes)
+        header = not os.path.exists(ruta)
+        with open(ruta, 'a', newline='', encoding='utf-8') as f:
+            filas[COLUMNAS_HISTORIAL].to_csv(f, header=header, index=False)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _leer_meta(conn, clave):
+    fila = conn.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+    return fila[0] if fila else None
+
+
+def _escribir_meta(conn, clave, valor):
+    conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (clave, str(valor)))
+
+
+def get_backend(tipo, file_catalogo, file_historial, file_db):
+    if tipo == 'csv':
+        return CsvBackend(file_catalogo, file_historial)
+    if tipo == 'sqlite':
+        return SqliteBackend(file_catalogo, file_db, file_historial)
+    if tipo == 'particionado':
+        return ParticionadoBackend(file_catalogo, os.path.splitext(file_historial)[0], file_historial)
+    raise ValueError(f"Backend de almacenamiento desconocido: {tipo}")
+
+
+# --- MIGRACIÓN CSV -> SQLITE ---
+
+def _ya_migrado(conn, file_csv):
+    # Marca 'migrado:<ruta absoluta>'; una marca con el mismo nombre de archivo en
+    # otra ruta (directorio copiado o movido, o marcas de versiones anteriores
+    # 'migrado:<nombre>:<tamaño>:<crc>') también cuenta
+    nombre = os.path.basename(file_csv)
+    for (clave,) in conn.execute("SELECT clave FROM meta WHERE clave LIKE 'migrado:%'"):
+        marca = clave[len('migrado:'):]
+        if marca == os.path.abspath(file_csv) or os.path.basename(marca) == nombre or marca.split(':')[0] == nombre:
+            return True
+    return False
+
+
+def _retirar_csv(file_csv):
+    # El CSV ya migrado se renombra: nadie más lo lee ni le agrega filas
+    try:
+        os.replace(file_csv, file_csv + SUFIJO_MIGRADO)
+    except FileNotFoundError:
+        pass  # Otro proceso ya lo retiró
+
+
+def migrar_csv(file_csv, backend, chunksize=50_000):
+    # Migración única: comprobación, inserts y marca en una sola transacción
+    # BEGIN IMMEDIATE (dos procesos que arrancan juntos no importan dos veces)
+    total = 0
+    with backend.conectar() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if _ya_migrado(conn, file_csv):
+            total = None
+        else:
+            for chunk in pd.read_csv(file_csv, chunksize=chunksize):
+                if chunk.empty:
+                    continue
+                chunk['Fecha'] = pd.to_datetime(chunk['Fecha']).dt.strftime('%Y-%m-%d')
+                chunk['Nota'] = chunk['Nota'].fillna('').astype(str)
+                conn.executemany(
+                    "INSERT INTO historial (Fecha, Disciplina, Partida, Cantidad, Nota) VALUES (?, ?, ?, ?, ?)",
+                    chunk[COLUMNAS_HISTORIAL].itertuples(index=False, name=None),
+                )
+                total += len(chunk)
+            _escribir_meta(conn, f"migrado:{os.path.abspath(file_csv)}", total)
+    _retirar_csv(file_csv)
+    return total or 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Migra el historial CSV de Control Pebbles a SQLite.")
+    parser.add_argument('--catalogo', default='pebbles_catalogo.csv')
+    parser.add_argument('--historial', default='pebbles_historial.csv')
+    parser.add_argument('--db', default='pebbles_historial.db')
+    args = parser.parse_args()
+
+    backend = SqliteBackend(args.catalogo, args.db)
+    backend.init()
+    filas = migrar_csv(args.historial, backend)
+    print(f"Filas migradas: {filas}")
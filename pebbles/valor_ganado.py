@@ -0,0 +1,119 @@
+import os
+import numpy as np
+import pandas as pd
+
+# --- VALOR GANADO Y PRONÓSTICO (sin Streamlit) ---
+# Línea base por partida (Inicio/Fin planificados, avance lineal entre ambas)
+# guardada junto al catálogo. Todo se calcula para todas las partidas a la vez
+# con arreglos; el valor de cada partida es su 'Peso' del catálogo, así
+# Ton, m³ y Und se comparan en una misma escala (% ponderado del proyecto).
+# - EV / PV: peso * % real / % plan a la fecha de corte
+# - SPI = EV / PV
+# - Ritmo: unidades/día de la partida en los últimos 'ventana' días
+# - Fin proyectado: fecha de corte + pendiente / ritmo (vacío si pasa del horizonte)
+
+COLUMNAS_LINEA_BASE = ['Disciplina', 'Partida', 'Inicio', 'Fin']
+VENTANA_RITMO = 14  # días
+HORIZONTE_DIAS = 100 * 365  # Proyecciones más lejanas se dejan vacías (NaT)
+
+
+def leer_linea_base(ruta, df_cat=None):
+    # La primera vez se crea con todas las partidas del catálogo y fechas vacías (a completar)
+    if not os.path.exists(ruta):
+        base = pd.DataFrame(columns=COLUMNAS_LINEA_BASE)
+        if df_cat is not None:
+            base = df_cat[['Disciplina', 'Partida']].assign(Inicio=None, Fin=None)
+        base.to_csv(ruta, index=False)
+    base = pd.read_csv(ruta)
+    base['Inicio'] = pd.to_datetime(base['Inicio'], errors='coerce')
+    base['Fin'] = pd.to_datetime(base['Fin'], errors='coerce')
+    return base
+
+
+def _pesos(master):
+    if 'Peso' in master.columns:
+        return master['Peso'].fillna(1.0).to_numpy(dtype=float)
+    return np.ones(len(master))
+
+
+def _dias(fechas):
+    # Fechas -> n° de día en float (NaN si no hay fecha)
+    return ((pd.to_datetime(pd.Series(fechas)) - pd.Timestamp(0)).dt.days).to_numpy(dtype=float)
+
+
+def pct_plan(inicio, fin, fechas):
+    # % planificado (lineal) de cada partida en cada fecha -> matriz (partidas x fechas)
+    ini = _dias(inicio)[:, None]
+    dur = (_dias(fin)[:, None] - ini) + 1  # Fin inclusive
+    t = _dias(fechas)[None, :]
+    with np.errstate(invalid='ignore'):
+        return np.clip((t - ini + 1) / dur, 0.0, 1.0) * 100  # NaN si no tiene plan
+
+
+def valor_ganado(indice, df_master, linea_base, fecha_corte, ventana=VENTANA_RITMO):
+    # indice: IndiceAcumulado (pebbles.curva_s); una fila por partida del catálogo
+    corte = pd.Timestamp(fecha_corte)
+    master = df_master.set_index(['Disciplina', 'Partida']).reindex(indice.claves)
+    plan = linea_base.drop_duplicates(['Disciplina', 'Partida']).set_index(['Disciplina', 'Partida']).reindex(indice.claves)
+    meta = master['Meta'].to_numpy(dtype=float)
+    peso = _pesos(master)
+    total_peso = peso.sum()
+
+    ejecutado = indice.al(corte).to_numpy()
+    previo = indice.al(corte - pd.Timedelta(days=ventana)).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_real = np.nan_to_num(np.clip(ejecutado / meta * 100, None, 100.0))
+        pct_pv = pct_plan(plan['Inicio'], plan['Fin'], [corte])[:, 0]
+        ev = peso * pct_real / 100
+        pv = peso * pct_pv / 100
+        spi = np.where(pv > 0, ev / pv, np.nan)
+        ritmo = (ejecutado - previo) / ventana
+        pendiente = np.maximum(meta - ejecutado, 0.0)
+        dias_restantes = np.where((ritmo > 0) & (pendiente > 0), np.ceil(pendiente / ritmo), np.nan)
+        dias_restantes[dias_restantes > HORIZONTE_DIAS] = np.nan  # Ritmo ínfimo: fuera del rango de fechas
+
+    fin_proyectado = corte + pd.to_timedelta(dias_restantes, unit='D')
+    fin_proyectado = fin_proyectado.where(pendiente > 0, corte)  # Terminada: ya llegó a la meta
+    res = pd.DataFrame({
+        'Unidad': master['Unidad'].to_numpy() if 'Unidad' in master.columns else '',
+        'Peso': peso,
+        '% Avance': pct_real,
+        '% Plan': pct_pv,
+        'EV': ev / total_peso * 100 if total_peso > 0 else ev,  # En % del proyecto
+        'PV': pv / total_peso * 100 if total_peso > 0 else pv,
+        'SPI': spi,
+        'Ritmo (unid/día)': ritmo,
+        'Fin Plan': plan['Fin'].to_numpy(),
+        'Fin Proyectado': fin_proyectado,
+    }, index=indice.claves)
+    res['Atraso (días)'] = (res['Fin Proyectado'] - res['Fin Plan']).dt.days
+    return res.reset_index()
+
+
+def resumen_valor_ganado(ev):
+    # EV, PV y SPI por disciplina y del proyecto (solo partidas con plan cuentan en PV)
+    ev = ev.assign(EV=ev['EV'].where(ev['PV'].notna()))
+    por_disc = ev.groupby('Disciplina', as_index=False)[['EV', 'PV']].sum()
+    total = pd.DataFrame({'Disciplina': ['Global'], 'EV': [ev['EV'].sum()], 'PV': [ev['PV'].sum()]})
+    res = pd.concat([por_disc, total], ignore_index=True)
+    res['SPI'] = (res['EV'] / res['PV']).where(res['PV'] > 0)
+    return res
+
+
+def curva_plan(linea_base, df_master, fechas):
+    # % planificado global (ponderado por Peso) en cada fecha; para superponer a la Curva S
+    master = df_master.merge(linea_base.drop_duplicates(['Disciplina', 'Partida']), on=['Disciplina', 'Partida'], how='left')
+    peso = _pesos(master)
+    pct = pct_plan(master['Inicio'], master['Fin'], fechas)
+    con_plan = ~np.isnan(pct[:, 0])
+    valores = (peso[con_plan] @ pct[con_plan]) / peso.sum() if con_plan.any() else np.full(len(fechas), np.nan)
+    return pd.DataFrame({'Fecha': fechas, 'Disciplina': 'Plan', '% Avance': valores})
+
+
+def serie_esfuerzo(rollup, df_master):
+    # Producción por periodo en % ponderado del proyecto: cantidad / meta * peso (sin mezclar unidades)
+    pesos = df_master[['Disciplina', 'Partida', 'Meta']].assign(Peso=_pesos(df_master))
+    total_peso = pesos['Peso'].sum()
+    df = rollup.merge(pesos, on=['Disciplina', 'Partida'], how='inner')
+    df['Esfuerzo'] = (df['Cantidad'] / df['Meta'] * df['Peso'] / total_peso * 100).where(df['Meta'] > 0, 0.0)
+    return df.groupby(['Fecha', 'Disciplina'], as_index=False)['Esfuerzo'].sum()
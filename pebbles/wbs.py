@@ -0,0 +1,111 @@
+import threading
+from bisect import bisect_left
+import pandas as pd
+
+# --- CATÁLOGO JERÁRQUICO (WBS) ---
+# Árbol Área -> Disciplina -> Elemento -> Partida (actividad). 'Elemento' es
+# opcional: si está vacío la partida cuelga directamente de la disciplina.
+# - Búsqueda por clave compuesta (Disciplina, Partida) en O(1)
+# - Hijos de un nodo calculados recién cuando se piden (selectores en cascada)
+# - % ponderado por 'Peso' de abajo hacia arriba; al cambiar una partida solo
+#   se actualizan sus ancestros
+
+NIVELES_WBS = ['Área', 'Disciplina', 'Elemento', 'Partida']
+AREA_DEFECTO = 'Pebbles'
+_FIN = '\U0010ffff'  # Mayor que cualquier etiqueta: cierra el rango de un prefijo
+
+
+def completar_columnas_wbs(df_cat):
+    # Catálogos anteriores no tienen Area/Elemento/Peso: se completan con valores neutros
+    df_cat = df_cat.copy()
+    if 'Area' not in df_cat.columns:
+        df_cat['Area'] = AREA_DEFECTO
+    if 'Elemento' not in df_cat.columns:
+        df_cat['Elemento'] = ''
+    if 'Peso' not in df_cat.columns:
+        df_cat['Peso'] = 1.0
+    df_cat['Area'] = df_cat['Area'].fillna(AREA_DEFECTO).astype(str)
+    df_cat['Elemento'] = df_cat['Elemento'].fillna('').astype(str)
+    df_cat['Peso'] = pd.to_numeric(df_cat['Peso'], errors='coerce').fillna(1.0)
+    return df_cat
+
+
+class CatalogoWBS:
+
+    def __init__(self, df_cat):
+        cat = completar_columnas_wbs(df_cat)
+        self.ruta_de = {}   # (Disciplina, Partida) -> ruta de la hoja
+        self.clave_de = {}  # ruta de la hoja -> (Disciplina, Partida)
+        self.peso = {}      # ruta de la hoja -> peso
+        self.avances = {}   # ruta de la hoja -> %
+        self._suma_wp = {}  # ruta interna -> suma(peso * %) de sus hojas
+        self._suma_w = {}   # ruta interna -> suma(peso) de sus hojas
+        self._orden = {}    # ruta de la hoja -> posición en el catálogo
+        self._hijos = {}    # ruta interna -> hijos (se llena a pedido)
+        self._lock = threading.Lock()
+
+        for area, disc, elem, partida, peso in cat[['Area', 'Disciplina', 'Elemento', 'Partida', 'Peso']].itertuples(index=False, name=None):
+            ruta = (area, disc, elem, partida) if elem else (area, disc, partida)
+            self.ruta_de[(disc, partida)] = ruta
+            self.clave_de[ruta] = (disc, partida)
+            self._orden.setdefault(ruta, len(self._orden))
+            self.peso[ruta] = float(peso)
+            self.avances[ruta] = 0.0
+            for k in range(len(ruta)):
+                self._suma_w[ruta[:k]] = self._suma_w.get(ruta[:k], 0.0) + float(peso)
+                self._suma_wp.setdefault(ruta[:k], 0.0)
+        self._hojas = sorted(self.clave_de)  # Solo para ubicar el rango de un prefijo con bisect
+
+    def es_hoja(self, ruta):
+        return ruta in self.clave_de
+
+    def clave(self, ruta):
+        return self.clave_de[ruta]
+
+    def hijos(self, ruta=()):
+        # Etiquetas del siguiente nivel bajo 'ruta' (rango de hojas con ese prefijo),
+        # en el orden en que aparecen en el catálogo (secuencia constructiva)
+        if ruta not in self._hijos:
+            ini = bisect_left(self._hojas, ruta)
+            fin = bisect_left(self._hojas, ruta + (_FIN,))
+            primero = {}
+            for hoja in self._hojas[ini:fin]:
+                if len(hoja) > len(ruta):
+                    etiqueta = hoja[len(ruta)]
+                    primero[etiqueta] = min(primero.get(etiqueta, self._orden[hoja]), self._orden[hoja])
+            self._hijos[ruta] = sorted(primero, key=primero.get)
+        return self._hijos[ruta]
+
+    def avance(self, ruta=()):
+        # % de una hoja, o ponderado por Peso para un nodo interno (raíz = proyecto)
+        if ruta in self.avances:
+            return self.avances[ruta]
+        peso = self._suma_w.get(ruta, 0.0)
+        return self._suma_wp.get(ruta, 0.0) / peso if peso > 0 else 0.0
+
+    def actualizar(self, clave, pct):
+        # O(profundidad): solo los ancestros de la partida
+        ruta = self.ruta_de.get(clave)
+        if ruta is None:
+            return
+        delta = self.peso[ruta] * (pct - self.avances[ruta])
+        self.avances[ruta] = pct
+        for k in range(len(ruta)):
+            self._suma_wp[ruta[:k]] += delta
+
+    def sincronizar(self, avances):
+        # Aplica solo las partidas cuyo % cambió desde la última vez
+        with self._lock:
+            for clave, pct in avances.items():
+                ruta = self.ruta_de.get(clave)
+                if ruta is not None and self.avances[ruta] != pct:
+                    self.actualizar(clave, pct)
+        return self
+
+    def resumen(self, profundidad):
+        # Nodos internos de un nivel con su peso y % ponderado
+        filas = [
+            (' / '.join(ruta), self._suma_w[ruta], self.avance(ruta))
+            for ruta in self._suma_w if len(ruta) == profundidad
+        ]
+        return pd.DataFrame(filas, columns=[NIVELES_WBS[profundidad - 1], 'Peso', '% Avance']).sort_values(NIVELES_WBS[profundidad - 1])
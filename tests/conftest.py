@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+from pebbles.dependencias import GrafoDependencias, leer_dependencias
+from pebbles.kpis import get_acumulados
+from pebbles.wbs import completar_columnas_wbs
+
+JERARQUIA = {'Excavaciones': None, 'Solado': 'Excavaciones', 'Encofrado': 'Solado'}
+
+
+@pytest.fixture
+def proyecto(tmp_path):
+    # Catálogo civil de tres partidas encadenadas (meta 100) y su archivo de dependencias
+    cat = completar_columnas_wbs(pd.DataFrame({
+        'Disciplina': 'Civil', 'Partida': list(JERARQUIA), 'Unidad': 'Und', 'Meta': 100.0, 'Img': '',
+    }))
+    cat.to_csv(tmp_path / 'pebbles_catalogo.csv', index=False)
+    leer_dependencias(str(tmp_path / 'pebbles_dependencias.csv'), JERARQUIA, 'Civil')
+    return tmp_path
+
+
+@pytest.fixture
+def master_y_grafo(proyecto):
+    cat = pd.read_csv(proyecto / 'pebbles_catalogo.csv')
+    grafo = GrafoDependencias.desde_dataframe(leer_dependencias(str(proyecto / 'pebbles_dependencias.csv')))
+    return get_acumulados(cat, pd.DataFrame()), grafo
@@ -0,0 +1,20 @@
+import pandas as pd
+from pebbles import cache
+from pebbles.cache import CacheCompartida
+
+
+def test_sin_copy_on_write_cada_sesion_recibe_una_copia(monkeypatch):
+    monkeypatch.setattr(cache, '_copy_on_write', lambda: False)
+    c = CacheCompartida()
+    cargar = lambda: pd.DataFrame({'Ejecutado': [1.0, 2.0]})
+    sesion = c.obtener('df', 1, cargar)
+    sesion.loc[0, 'Ejecutado'] = 99.0
+    assert c.obtener('df', 1, cargar)['Ejecutado'].tolist() == [1.0, 2.0]
+    assert c.stats()['hits'] == 1
+
+
+def test_con_copy_on_write_la_vista_no_filtra_cambios():
+    c = CacheCompartida()
+    sesion = c.obtener('df', 1, lambda: pd.DataFrame({'Ejecutado': [1.0, 2.0]}))
+    sesion.loc[0, 'Ejecutado'] = 99.0
+    assert c.obtener('df', 1, lambda: None)['Ejecutado'].tolist() == [1.0, 2.0]
@@ -0,0 +1,41 @@
+import pandas as pd
+from pebbles import checkpoint
+
+
+def test_checkpoint_invalido_si_se_reescribe_el_inicio(tmp_path):
+    ruta = str(tmp_path / 'pebbles_historial.csv')
+    pd.DataFrame({
+        'Fecha': pd.date_range('2024-01-01', periods=2000).strftime('%Y-%m-%d'),
+        'Disciplina': 'Civil', 'Partida': 'Solado', 'Cantidad': 1.0, 'Nota': '',
+    }).to_csv(ruta, index=False)
+    checkpoint.escribir_checkpoint(ruta)
+    assert checkpoint.ultimo_checkpoint(ruta)[0] > 0
+
+    # Misma longitud, primera fila editada: el checkpoint ya no corresponde
+    with open(ruta, 'r+b') as f:
+        f.readline()
+        posicion = f.tell()
+        linea = f.readline()
+        f.seek(posicion)
+        f.write(linea.replace(b'Solado', b'Solad0'))
+    offset, estado = checkpoint.ultimo_checkpoint(ruta)
+    assert offset == 0 and estado.empty
+    assert 'Solad0' in set(checkpoint.estado(ruta)[0]['Partida'])
+
+
+def test_tras_un_append_no_se_relee_el_prefijo(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'pebbles_historial.csv')
+    pd.DataFrame({
+        'Fecha': pd.date_range('2024-01-01', periods=2000).strftime('%Y-%m-%d'),
+        'Disciplina': 'Civil', 'Partida': 'Solado', 'Cantidad': 1.0, 'Nota': '',
+    }).to_csv(ruta, index=False)
+    checkpoint.escribir_checkpoint(ruta)
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write('2030-01-01,Civil,Solado,5.0,\n')
+
+    leidos = []
+    crc = checkpoint._crc
+    monkeypatch.setattr(checkpoint, '_crc', lambda r, o: leidos.append(o) or crc(r, o))
+    diario, _ = checkpoint.estado(ruta)
+    assert leidos == []
+    assert diario['Cantidad'].sum() == 2005.0
@@ -0,0 +1,39 @@
+import pytest
+from pebbles.dependencias import GrafoDependencias, ValidadorSecuencia, CicloError
+
+A, B, C, D = (('Civil', p) for p in ('Excavaciones', 'Solado', 'Encofrado', 'Vaciado de Concreto'))
+
+
+def _diamante():
+    # A -> B -> D y A -> C -> D
+    return GrafoDependencias([(B, A), (C, A), (D, B), (D, C)])
+
+
+def test_ciclo():
+    with pytest.raises(CicloError, match='Encofrado'):
+        GrafoDependencias([(B, A), (C, B), (B, C)])
+
+
+def test_diamante_orden_y_ruta_critica():
+    grafo = _diamante()
+    orden = grafo.orden
+    assert orden[0] == A and orden[-1] == D
+    assert grafo.predecesoras[D] == [B, C]
+    assert grafo.limite_pct(D, {B: 80.0, C: 30.0}) == 30.0
+
+    ruta, total = grafo.ruta_critica({A: 2, B: 1, C: 5, D: 3})
+    assert ruta == [A, C, D]
+    assert total == 10.0
+
+
+def test_sincronizar_solo_reevalua_lo_que_cambio():
+    validador = ValidadorSecuencia(_diamante())
+    assert validador.sincronizar({A: 50.0, B: 40.0, C: 40.0, D: 0.0}) == []
+
+    antes = validador.evaluaciones
+    assert validador.sincronizar({A: 50.0, B: 40.0, C: 60.0, D: 0.0}) == [C]
+    assert validador.evaluaciones - antes == 2  # C y su sucesora D
+
+    antes = validador.evaluaciones
+    assert validador.sincronizar({A: 50.0, B: 40.0, C: 60.0, D: 0.0}) == [C]
+    assert validador.evaluaciones == antes
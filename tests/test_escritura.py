@@ -0,0 +1,42 @@
+import threading
+import time
+import pandas as pd
+from pebbles import escritura
+from pebbles.escritura import DestinoSnapshot, EscritorAgrupado
+
+
+def test_metas_y_avances_no_se_pisan(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'avance.csv')
+    pd.DataFrame({
+        'Disciplina': ['Civil', 'Civil'],
+        'Partida': ['Excavaciones', 'Solado'],
+        'Total': [100.0, 100.0],
+        'Ejecutado': [0.0, 0.0],
+    }).to_csv(ruta, index=False)
+
+    # Ensancha la ventana entre leer y reescribir para forzar el entrelazado
+    escribir = escritura.escribir_atomico
+    monkeypatch.setattr(escritura, 'escribir_atomico', lambda df, r: (time.sleep(0.01), escribir(df, r)))
+
+    destino = DestinoSnapshot(ruta, claves=['Disciplina', 'Partida'], columna='Ejecutado')
+    escritor = EscritorAgrupado(str(tmp_path / 'avance.journal'), destino)
+
+    def reportar():
+        for _ in range(10):
+            escritor.registrar([{'Disciplina': 'Civil', 'Partida': 'Excavaciones', 'Cantidad': 1.0}])
+
+    def editar_metas():
+        for i in range(10):
+            metas = pd.read_csv(ruta)
+            metas['Total'] = 200.0 + i
+            destino.actualizar_columnas(metas, ['Total'])
+
+    hilos = [threading.Thread(target=f) for f in (reportar, reportar, editar_metas, editar_metas)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    final = pd.read_csv(ruta).set_index('Partida')
+    assert final.loc['Excavaciones', 'Ejecutado'] == 20.0
+    assert final.loc['Solado', 'Total'] == 209.0
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from pebbles.graficos import lttb, reducir_series, figura_esfuerzo, UMBRAL_WEBGL
+
+
+def test_lttb_conserva_extremos_y_presupuesto():
+    x = np.arange(10_000)
+    y = np.sin(x / 300.0)
+    idx = lttb(x, y, 400)
+    assert len(idx) == 400
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert (np.diff(idx) > 0).all()
+    assert len(lttb(x[:50], y[:50], 400)) == 50  # Serie corta: intacta
+
+
+def test_reducir_series_por_disciplina():
+    fechas = pd.date_range('2020-01-01', periods=3000)
+    df = pd.concat([
+        pd.DataFrame({'Fecha': fechas, '% Avance': np.linspace(0, 100, len(fechas)), 'Disciplina': d})
+        for d in ('Civil', 'Mecánica')
+    ] + [pd.DataFrame({'Fecha': fechas[:10], '% Avance': 1.0, 'Disciplina': 'Plan'})])
+    reducida = reducir_series(df, 'Fecha', '% Avance', 'Disciplina', presupuesto=200)
+    tamanos = reducida.groupby('Disciplina').size()
+    assert tamanos.to_dict() == {'Civil': 200, 'Mecánica': 200, 'Plan': 10}
+    civil = reducida[reducida['Disciplina'] == 'Civil']
+    assert civil['Fecha'].iloc[0] == fechas[0] and civil['Fecha'].iloc[-1] == fechas[-1]
+
+
+def test_esfuerzo_siempre_en_barras():
+    grouper = pd.DataFrame({
+        'Fecha': pd.date_range('2020-01-01', periods=UMBRAL_WEBGL + 1), 'Esfuerzo': 1.0, 'Disciplina': 'Civil',
+    })
+    assert {t.type for t in figura_esfuerzo(grouper, 'x').data} == {'bar'}
+    assert {t.type for t in figura_esfuerzo(grouper.head(10), 'x').data} == {'bar'}
@@ -0,0 +1,36 @@
+import io
+import os
+import pytest
+from PIL import Image
+from pebbles.imagenes import AlmacenImagenes
+
+
+def test_referencia_fuera_del_almacen_no_se_sigue(tmp_path):
+    almacen = AlmacenImagenes(str(tmp_path / 'imagenes'))
+    salida = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(salida, 'PNG')
+    referencia = almacen.guardar(salida.getvalue())
+    assert almacen.miniatura(referencia) is not None
+    assert almacen.miniatura('img:../../x') is None
+    assert almacen.miniatura('img:' + referencia[4:].upper()) is None
+
+
+def test_bomba_de_descompresion_es_imagen_invalida(tmp_path, monkeypatch):
+    almacen = AlmacenImagenes(str(tmp_path / 'imagenes'))
+    salida = io.BytesIO()
+    Image.new('L', (100, 100)).save(salida, 'PNG')
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 50)  # 100x100 supera el doble: DecompressionBombError
+    with pytest.raises(ValueError):
+        almacen.guardar(salida.getvalue())
+
+
+def test_original_restaurado_vuelve_a_mostrarse(tmp_path):
+    almacen = AlmacenImagenes(str(tmp_path / 'imagenes'))
+    salida = io.BytesIO()
+    Image.new('RGB', (10, 10), 'blue').save(salida, 'PNG')
+    referencia = almacen.guardar(salida.getvalue())
+    original = os.path.join(almacen.dir_originales, referencia[4:] + '.png')
+    os.replace(original, original + '.bak')
+    assert almacen.miniatura(referencia) is None
+    os.replace(original + '.bak', original)
+    assert almacen.miniatura(referencia) is not None
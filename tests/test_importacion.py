@@ -0,0 +1,51 @@
+import io
+import pandas as pd
+import pytest
+from pebbles.importacion import leer_archivo, validar_lote
+
+
+def _lote(filas):
+    return pd.DataFrame(filas, columns=['Fecha', 'Disciplina', 'Partida', 'Cantidad'])
+
+
+def test_predecesora_mas_abajo_en_el_archivo_habilita_el_mismo_dia(master_y_grafo):
+    df_master, grafo = master_y_grafo
+    aceptadas, rechazadas = validar_lote(_lote([
+        ('2025-01-10', 'Civil', 'Solado', 30),        # Antes en el archivo que su predecesora
+        ('2025-01-10', 'Civil', 'Excavaciones', 50),
+        ('2025-01-11', 'Civil', 'Solado', 30),        # 60% > 50% + 2: se rechaza
+        ('2025-01-09', 'Civil', 'Encofrado', 5),      # Día anterior: Solado todavía en 0%
+    ]), df_master, grafo)
+
+    assert sorted(map(tuple, aceptadas[['Partida', 'Cantidad']].values.tolist())) == [('Excavaciones', 50.0), ('Solado', 30.0)]
+    assert rechazadas['Fila'].tolist() == [4, 5]
+    assert rechazadas['Motivo'].str.startswith('Secuencia').all()
+
+
+def test_filas_invalidas(master_y_grafo):
+    df_master, grafo = master_y_grafo
+    aceptadas, rechazadas = validar_lote(_lote([
+        ('no es fecha', 'Civil', 'Excavaciones', 1),
+        ('2025-01-10', 'Civil', 'Excavaciones', 0),
+        ('2025-01-10', 'Civil', 'Excavaciones', 'abc'),
+        ('2025-01-10', 'Civil', 'Pilotes', 1),
+        ('2025-01-10', 'Civil', 'Excavaciones', 5),
+    ]), df_master, grafo)
+
+    assert aceptadas['Cantidad'].tolist() == [5.0]
+    assert rechazadas['Motivo'].tolist() == [
+        'Fecha inválida',
+        'La cantidad debe ser mayor a 0',
+        'La cantidad debe ser mayor a 0',
+        'Partida no existe en el catálogo',
+    ]
+
+
+def test_faltan_columnas(master_y_grafo):
+    with pytest.raises(ValueError, match='Cantidad'):
+        validar_lote(pd.DataFrame({'Fecha': [], 'Disciplina': [], 'Partida': []}), *master_y_grafo)
+
+
+def test_xls_rechazado():
+    with pytest.raises(ValueError, match='xls'):
+        leer_archivo(io.BytesIO(b''), 'reportes.XLS')
@@ -0,0 +1,75 @@
+import threading
+from pebbles.escritura import EscritorAgrupado
+from pebbles.ingesta import ServicioIngesta, crear_servidor, enviar_reportes
+from pebbles.storage import SqliteBackend
+
+
+def _servidor(servicio):
+    servidor = crear_servidor(servicio, puerto=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def test_filas_aceptadas_llegan_al_backend_y_rechazadas_con_motivo(proyecto):
+    backend = SqliteBackend(str(proyecto / 'pebbles_catalogo.csv'), str(proyecto / 'pebbles_historial.db'))
+    backend.init()
+    escritor = EscritorAgrupado(str(proyecto / 'pebbles_historial.journal'), backend)
+    servidor, url = _servidor(ServicioIngesta(backend, escritor, str(proyecto / 'pebbles_dependencias.csv')))
+    try:
+        codigo, respuesta = enviar_reportes(url, [
+            {'Fecha': '2025-01-10', 'Disciplina': 'Civil', 'Partida': 'Excavaciones', 'Cantidad': 40, 'Nota': 'tablet 1'},
+            {'Fecha': '2025-01-10', 'Disciplina': 'Civil', 'Partida': 'Solado', 'Cantidad': 80, 'Nota': ''},
+            {'Fecha': '2025-01-10', 'Disciplina': 'Civil', 'Partida': 'No existe', 'Cantidad': 1, 'Nota': ''},
+        ])
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    assert codigo == 200
+    assert respuesta['aceptadas'] == 1
+    motivos = {r['indice']: r['motivo'] for r in respuesta['rechazadas']}
+    assert motivos[1].startswith('Secuencia')
+    assert motivos[2] == 'Partida no existe en el catálogo'
+    hist = backend.leer_historial()
+    assert hist[['Partida', 'Cantidad', 'Nota']].values.tolist() == [['Excavaciones', 40.0, 'tablet 1']]
+
+
+class EscritorRetenido:
+    # Mantiene ocupado al hilo validador hasta que se suelta
+    def __init__(self):
+        self.ocupado = threading.Event()
+        self.soltar = threading.Event()
+
+    def registrar(self, items):
+        self.ocupado.set()
+        self.soltar.wait(10)
+        return len(items)
+
+
+def test_cola_llena_responde_503(proyecto):
+    backend = SqliteBackend(str(proyecto / 'pebbles_catalogo.csv'), str(proyecto / 'pebbles_historial.db'))
+    backend.init()
+    escritor = EscritorRetenido()
+    servicio = ServicioIngesta(backend, escritor, str(proyecto / 'pebbles_dependencias.csv'), capacidad=1)
+    servidor, url = _servidor(servicio)
+    reporte = [{'Fecha': '2025-01-10', 'Disciplina': 'Civil', 'Partida': 'Excavaciones', 'Cantidad': 1, 'Nota': ''}]
+    respuestas = []
+    enviar = lambda: respuestas.append(enviar_reportes(url, reporte)[0])
+    try:
+        en_curso = threading.Thread(target=enviar)
+        en_curso.start()
+        assert escritor.ocupado.wait(10)       # El primero ya salió de la cola y se está grabando
+        en_cola = threading.Thread(target=enviar)
+        en_cola.start()
+        while servicio.cola.qsize() < 1:        # El segundo ocupa la única plaza
+            en_cola.join(0.01)
+        codigo, respuesta = enviar_reportes(url, reporte)
+        assert codigo == 503
+        assert 'Cola llena' in respuesta['error']
+    finally:
+        escritor.soltar.set()
+        en_curso.join()
+        en_cola.join()
+        servidor.shutdown()
+        servidor.server_close()
+    assert respuestas == [200, 200]
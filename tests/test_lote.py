@@ -0,0 +1,14 @@
+from pebbles.benchmark import generar_catalogo, generar_historial, escribir_historial_csv
+from pebbles.lote import procesar_proyecto
+
+
+def test_segunda_corrida_sin_cambios_se_salta(tmp_path):
+    proyecto = tmp_path / 'P1'
+    proyecto.mkdir()
+    cat, _ = generar_catalogo(5)
+    cat.to_csv(proyecto / 'pebbles_catalogo.csv', index=False)
+    escribir_historial_csv(str(proyecto / 'pebbles_historial.csv'), cat, generar_historial(cat, 200))
+    salida = str(tmp_path / 'reportes')
+
+    assert procesar_proyecto(str(proyecto), salida, ['csv'])['estado'] == 'generado'
+    assert procesar_proyecto(str(proyecto), salida, ['csv'])['estado'] == 'sin cambios'
@@ -0,0 +1,67 @@
+import os
+import shutil
+import threading
+import pandas as pd
+from pebbles.storage import SqliteBackend, COLUMNAS_HISTORIAL, SUFIJO_MIGRADO, migrar_csv
+
+
+def _proyecto(directorio, filas=50):
+    os.makedirs(directorio)
+    pd.DataFrame({
+        'Fecha': pd.date_range('2024-01-01', periods=filas).strftime('%Y-%m-%d'),
+        'Disciplina': 'Civil',
+        'Partida': 'Excavaciones',
+        'Cantidad': 1.0,
+        'Nota': '',
+    })[COLUMNAS_HISTORIAL].to_csv(os.path.join(directorio, 'pebbles_historial.csv'), index=False)
+
+
+def _backend(directorio, iniciar=True):
+    backend = SqliteBackend(
+        os.path.join(directorio, 'pebbles_catalogo.csv'),
+        os.path.join(directorio, 'pebbles_historial.db'),
+        os.path.join(directorio, 'pebbles_historial.csv'),
+    )
+    if iniciar:
+        SqliteBackend._migradas.discard(os.path.abspath(backend.file_db))  # Como un proceso nuevo
+        backend.init()
+    return backend
+
+
+def test_migracion_no_se_repite_al_copiar_el_proyecto(tmp_path):
+    origen = str(tmp_path / 'origen')
+    _proyecto(origen)
+    assert _backend(origen).contar() == 50
+    assert _backend(origen).contar() == 50
+    assert not os.path.exists(os.path.join(origen, 'pebbles_historial.csv'))
+    assert os.path.exists(os.path.join(origen, 'pebbles_historial.csv' + SUFIJO_MIGRADO))
+
+    copia = str(tmp_path / 'proyectos' / 'X')
+    shutil.copytree(origen, copia)
+    assert _backend(copia).contar() == 50
+
+
+def test_marca_de_otra_ruta_con_el_csv_todavia_presente(tmp_path):
+    # Base migrada por una versión anterior (el CSV no se renombraba) y luego movida
+    origen = str(tmp_path / 'origen')
+    _proyecto(origen)
+    _backend(origen)
+    os.replace(os.path.join(origen, 'pebbles_historial.csv' + SUFIJO_MIGRADO), os.path.join(origen, 'pebbles_historial.csv'))
+    movido = str(tmp_path / 'movido')
+    shutil.move(origen, movido)
+    assert _backend(movido).contar() == 50
+    assert not os.path.exists(os.path.join(movido, 'pebbles_historial.csv'))
+
+
+def test_dos_migraciones_simultaneas_importan_una_vez(tmp_path):
+    directorio = str(tmp_path / 'p')
+    _proyecto(directorio, filas=5000)
+    backend = _backend(directorio, iniciar=False)
+    SqliteBackend(backend.file_catalogo, backend.file_db).init()  # Solo crea las tablas
+
+    hilos = [threading.Thread(target=migrar_csv, args=(backend.file_historial, backend)) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert backend.contar() == 5000
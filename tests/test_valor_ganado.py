@@ -0,0 +1,19 @@
+import pandas as pd
+from pebbles.curva_s import IndiceAcumulado
+from pebbles.valor_ganado import valor_ganado
+
+
+def test_ritmo_infimo_no_rompe_el_pronostico():
+    claves = [('Civil', 'Excavaciones'), ('Civil', 'Solado')]
+    rollup = pd.DataFrame({
+        'Fecha': pd.to_datetime(['2025-01-10', '2025-01-10']),
+        'Disciplina': ['Civil', 'Civil'],
+        'Partida': ['Excavaciones', 'Solado'],
+        'Cantidad': [0.001, 50.0],
+    })
+    master = pd.DataFrame({'Disciplina': ['Civil', 'Civil'], 'Partida': ['Excavaciones', 'Solado'], 'Meta': [1e7, 100.0]})
+    linea_base = master[['Disciplina', 'Partida']].assign(Inicio=pd.Timestamp('2025-01-01'), Fin=pd.Timestamp('2025-03-01'))
+
+    ev = valor_ganado(IndiceAcumulado(rollup, claves), master, linea_base, '2025-01-15').set_index('Partida')
+    assert pd.isna(ev.loc['Excavaciones', 'Fin Proyectado'])
+    assert ev.loc['Solado', 'Fin Proyectado'] == pd.Timestamp('2025-01-29')
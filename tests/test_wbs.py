@@ -0,0 +1,10 @@
+import pandas as pd
+from pebbles.wbs import CatalogoWBS
+
+
+def test_hijos_en_orden_del_catalogo():
+    partidas = ['Excavaciones', 'Solado', 'Encofrado', 'Vaciado de Concreto', 'Desencofrado']
+    cat = pd.DataFrame({'Disciplina': ['Civil'] * 5 + ['Mecánica'], 'Partida': partidas + ['Chancadora']})
+    wbs = CatalogoWBS(cat)
+    assert wbs.hijos(('Pebbles',)) == ['Civil', 'Mecánica']
+    assert wbs.hijos(('Pebbles', 'Civil')) == partidas